@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark of MCP tool output formatting: the previous per-call string
+concatenation against the cached fragments in mcp-server/rendering.py, for
+query results of 10, 100 and 1,000 rules.
+
+"cold" renders every fragment (first call after the rules change); "warm"
+assembles the same result again from the cache, as repeated queries do.
+"speedup" is concatenation time over warm time; "cold cost" is cold time
+over concatenation time, since a cold render also fills the cache and is
+slower than concatenating. Runs offline; no API access is needed.
+"""
+
+import argparse
+import random
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'mcp-server'))
+
+from rendering import RuleRenderer, assemble  # noqa: E402
+from rules_common.rule import Rule  # noqa: E402
+from rules_common.timing import best_of  # noqa: E402
+
+def sample_results(count, rng):
+    return [{
+        'rule_id': f'{i:012x}',
+        'title': f'Rule {i}',
+        'description': 'Synthetic rule for the rendering benchmark',
+        'category': rng.choice(['privacy', 'safety', 'ethics']),
+        'priority': rng.randint(1, 8),
+        'tags': ['benchmark', f'tag{i % 7}'],
+        'rule_text': f'Governance rule number {i}: ' + 'keep personal data out of logs. ' * 4,
+        'generation': 1,
+        'created_at': '2024-01-01T00:00:00',
+        'updated_at': '2024-01-01T00:00:00',
+        'score': rng.random()
+    } for i in range(count)]
+
+def concatenated_output(results):
+    # The formatting the query tool used before the render cache
+    rules = [Rule.from_document(rule) for rule in results]
+    output = f"Found {len(rules)} governance rules (total: {len(rules)}):\n\n"
+    for i, rule in enumerate(rules, 1):
+        output += f"{i}. **{rule.title}**\n"
+        output += f"   Category: {rule.category}\n"
+        output += f"   Priority: {rule.priority}\n"
+        if rule.description:
+            output += f"   Description: {rule.description}\n"
+        output += f"   Rule: {rule.rule_text}\n"
+        if rule.tags:
+            output += f"   Tags: {', '.join(rule.tags)}\n"
+        output += f"   Score: {rule.score or 0:.3f}\n\n"
+    return output
+
+def cached_output(renderer, results, max_chars):
+    return assemble(f"Found {len(results)} governance rules (total: {len(results)}):\n\n", [
+        (f"{i}. ", renderer.fragment("query", rule), f"   Score: {rule.get('score') or 0:.3f}\n\n")
+        for i, rule in enumerate(results, 1)
+    ], max_chars=max_chars)
+
+def main():
+    parser = argparse.ArgumentParser(description="MCP rule rendering microbenchmark")
+    parser.add_argument('--sizes', default='10,100,1000', help='Comma-separated result sizes')
+    parser.add_argument('--repeats', type=int, default=20, help='Timing repeats (best is reported)')
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    print(f"{'rules':>6} {'concat ms':>10} {'cold ms':>9} {'warm ms':>9} {'speedup':>8} {'cold cost':>10}")
+    for size in (int(value) for value in args.sizes.split(',')):
+        results = sample_results(size, rng)
+        # Uncapped, so all three produce the same text
+        assert cached_output(RuleRenderer(), results, sys.maxsize) == concatenated_output(results)
+
+        concat_ms = best_of(args.repeats, lambda: concatenated_output(results))
+        cold_ms = best_of(args.repeats, lambda: cached_output(RuleRenderer(), results, sys.maxsize))
+        renderer = RuleRenderer()
+        cached_output(renderer, results, sys.maxsize)
+        warm_ms = best_of(args.repeats, lambda: cached_output(renderer, results, sys.maxsize))
+        print(f"{size:>6} {concat_ms:>10.3f} {cold_ms:>9.3f} {warm_ms:>9.3f} "
+              f"{concat_ms / warm_ms:>7.1f}x {cold_ms / concat_ms:>9.1f}x")
+
+if __name__ == "__main__":
+    main()
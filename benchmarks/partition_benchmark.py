@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Benchmark category-scoped kNN queries against a single shared index
+(category filter) and against one partition index per category.
+
+Both layouts keep the category term filter, as the API does, since
+partition names are slugs that distinct categories can share.
+
+Uses the same OPENSEARCH_ENDPOINT, EMBEDDING_DIMENSION and AWS credentials
+as the Lambda handler. Scratch indices are filled with random vectors and
+deleted afterwards, so no Bedrock calls are made and no live index is
+touched.
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+os.environ.setdefault('INDEX_NAME', 'governance-rules-bench')
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'lambda'))
+
+from opensearchpy import helpers  # noqa: E402
+import rules_api  # noqa: E402
+from rules_common.timing import percentile  # noqa: E402
+
+DIMENSION = rules_api.EMBEDDING_DIMENSION
+
+def random_vector():
+    return [random.uniform(-1.0, 1.0) for _ in range(DIMENSION)]
+
+def time_queries(client, index, category, queries, k):
+    latencies = []
+    for vector in queries:
+        body = {
+            "size": k,
+            "query": {"bool": {
+                "must": [{"knn": {"embedding": {"vector": vector, "k": k}}}],
+                "filter": [{"term": {"category": category}}]
+            }},
+            "_source": False
+        }
+        start = time.perf_counter()
+        client.search(index=index, body=body)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+def main():
+    parser = argparse.ArgumentParser(description="Partitioned vs shared index kNN benchmark")
+    parser.add_argument('--docs', type=int, default=5000, help='Total number of synthetic rules')
+    parser.add_argument('--categories', type=int, default=5, help='Number of categories')
+    parser.add_argument('--queries', type=int, default=200, help='Queries per configuration')
+    parser.add_argument('--k', type=int, default=10, help='Neighbours per query')
+    args = parser.parse_args()
+
+    client = rules_api.OpenSearchClient(bootstrap=False).client
+    prefix = rules_api.INDEX_NAME
+    shared_index = f"{prefix}-shared"
+    categories = [f"cat{i}" for i in range(args.categories)]
+    partition_indices = {c: f"{prefix}-part-{c}" for c in categories}
+
+    print(f"Indexing {args.docs} synthetic rules across {args.categories} categories...")
+    try:
+        for index in [shared_index, *partition_indices.values()]:
+            client.indices.create(index=index, body=rules_api.build_index_body(1, 0))
+        actions = []
+        for i in range(args.docs):
+            category = categories[i % len(categories)]
+            doc = {'rule_id': str(i), 'category': category, 'embedding': random_vector()}
+            actions.append({'_index': shared_index, '_id': str(i), '_source': doc})
+            actions.append({'_index': partition_indices[category], '_id': str(i), '_source': doc})
+        helpers.bulk(client, actions, chunk_size=500)
+        client.indices.refresh(index=','.join([shared_index, *partition_indices.values()]))
+
+        queries = [random_vector() for _ in range(args.queries)]
+        category = categories[0]
+
+        # Warm up both graphs before measuring
+        time_queries(client, shared_index, category, queries[:10], args.k)
+        time_queries(client, partition_indices[category], category, queries[:10], args.k)
+
+        shared = time_queries(client, shared_index, category, queries, args.k)
+        partitioned = time_queries(client, partition_indices[category], category, queries, args.k)
+
+        print(f"\nCategory-scoped kNN, k={args.k}, {args.queries} queries, {args.docs} rules, "
+              f"{args.categories} categories, {DIMENSION} dimensions")
+        print(f"{'layout':<14}{'p50 ms':>10}{'p99 ms':>10}{'mean ms':>10}")
+        for name, samples in [('shared', shared), ('partitioned', partitioned)]:
+            print(f"{name:<14}{percentile(samples, 50):>10.2f}{percentile(samples, 99):>10.2f}"
+                  f"{statistics.mean(samples):>10.2f}")
+        print(f"\nMedian speedup: {percentile(shared, 50) / percentile(partitioned, 50):.2f}x")
+    finally:
+        client.indices.delete(index=','.join([shared_index, *partition_indices.values()]), ignore_unavailable=True)
+
+if __name__ == "__main__":
+    main()
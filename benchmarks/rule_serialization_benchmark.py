@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark of rule representations on the bulk paths: embeddings as
+Python float lists vs array('f'), dict rules vs the slotted Rule type, and
+stdlib json vs rules_common.codec (orjson when installed).
+
+Runs offline; no OpenSearch or Bedrock access is needed.
+"""
+
+import argparse
+import json
+import random
+import sys
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from rules_common import codec  # noqa: E402
+from rules_common.rule import Rule, as_vector  # noqa: E402
+from rules_common.timing import best_of  # noqa: E402
+
+def measure_memory(build):
+    """Bytes allocated by build() that are still alive when it returns"""
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    result = build()
+    used = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    return used, result
+
+def sample_input(i, rng):
+    return {
+        'title': f'Rule {i}',
+        'rule_text': f'Governance rule number {i}: ' + 'keep personal data out of logs. ' * 4,
+        'description': 'Synthetic rule for the serialization benchmark',
+        'category': rng.choice(['privacy', 'safety', 'ethics']),
+        'priority': rng.randint(1, 10),
+        'tags': ['benchmark', f'tag{i % 7}']
+    }
+
+def random_vectors(count, dimension, seed):
+    rng = random.Random(seed)
+    return [[rng.uniform(-1.0, 1.0) for _ in range(dimension)] for _ in range(count)]
+
+def validate_dict(entry):
+    # The checks each component used to repeat on the raw dict
+    if not isinstance(entry, dict):
+        raise ValueError('Rule must be a JSON object')
+    if not entry.get('rule_text') or not isinstance(entry['rule_text'], str):
+        raise ValueError('rule_text is required')
+    if not entry.get('title') or not isinstance(entry['title'], str):
+        raise ValueError('title is required')
+    priority = entry.get('priority', 1)
+    if not isinstance(priority, int) or isinstance(priority, bool):
+        raise ValueError('priority must be an integer')
+    tags = entry.get('tags', [])
+    if not isinstance(tags, list) or not all(isinstance(tag, str) for tag in tags):
+        raise ValueError('tags must be a list of strings')
+
+def dict_document(entry, embedding):
+    # The pre-Rule shape: fields copied out of the request with .get()
+    validate_dict(entry)
+    return {
+        'rule_id': str(hash(entry['rule_text'])),
+        'title': entry.get('title', ''),
+        'description': entry.get('description', ''),
+        'category': entry.get('category', 'general'),
+        'priority': entry.get('priority', 1),
+        'tags': entry.get('tags', []),
+        'rule_text': entry.get('rule_text', ''),
+        'embedding': embedding,
+        'generation': 1,
+        'created_at': '2024-01-01T00:00:00',
+        'updated_at': '2024-01-01T00:00:00'
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Rule representation and JSON codec microbenchmark")
+    parser.add_argument('--rules', type=int, default=1000, help='Rules per batch')
+    parser.add_argument('--dimension', type=int, default=1536, help='Embedding dimension')
+    parser.add_argument('--repeats', type=int, default=5, help='Timing repeats (best is reported)')
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    entries = [sample_input(i, rng) for i in range(args.rules)]
+
+    print(f"{args.rules} rules x {args.dimension}-dim embeddings, codec backend: {codec.BACKEND}\n")
+
+    # Both start from freshly parsed floats, as when decoding a Bedrock or OpenSearch response
+    list_bytes, list_vectors = measure_memory(lambda: random_vectors(args.rules, args.dimension, 7))
+    array_bytes, array_vectors = measure_memory(
+        lambda: [as_vector(vector) for vector in random_vectors(args.rules, args.dimension, 7)])
+    print("Embedding memory")
+    print(f"  list of floats  {list_bytes / 2**20:8.1f} MiB  ({list_bytes / args.rules / 1024:.1f} KiB/rule)")
+    print(f"  array('f')      {array_bytes / 2**20:8.1f} MiB  ({array_bytes / args.rules / 1024:.1f} KiB/rule)")
+    print(f"  reduction       {list_bytes / array_bytes:8.1f}x\n")
+
+    dict_docs = [dict_document(entry, vector) for entry, vector in zip(entries, list_vectors)]
+    rules = []
+    for entry, vector in zip(entries, array_vectors):
+        rule = Rule.from_input(entry)
+        rule.embedding = vector
+        rules.append(rule)
+
+    dict_ms = best_of(args.repeats, lambda: [dict_document(entry, None) for entry in entries])
+    rule_ms = best_of(args.repeats, lambda: [Rule.from_input(entry) for entry in entries])
+    print("Build from request (validate + copy fields)")
+    print(f"  dict + .get()   {dict_ms:8.1f} ms")
+    print(f"  Rule.from_input {rule_ms:8.1f} ms\n")
+
+    stdlib_ms = best_of(args.repeats, lambda: [json.dumps(doc) for doc in dict_docs])
+    codec_ms = best_of(args.repeats, lambda: [codec.dumps_bytes(rule.to_document()) for rule in rules])
+    print("Serialize OpenSearch documents (with embeddings)")
+    print(f"  json + lists    {stdlib_ms:8.1f} ms")
+    print(f"  codec + arrays  {codec_ms:8.1f} ms  ({stdlib_ms / codec_ms:.1f}x)\n")
+
+    payload = json.dumps({'success': True, 'rules': [rule.to_dict() for rule in rules]})
+    stdlib_ms = best_of(args.repeats, lambda: json.loads(payload))
+    codec_ms = best_of(args.repeats, lambda: codec.loads(payload))
+    print(f"Parse a {len(payload) / 2**20:.1f} MiB list response")
+    print(f"  json            {stdlib_ms:8.1f} ms")
+    print(f"  codec           {codec_ms:8.1f} ms  ({stdlib_ms / codec_ms:.1f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -27,7 +27,8 @@ echo "📦 Installing dependencies to temporary directory..."
 python -m pip install -r requirements.txt -t $TEMP_DIR
 
 # Copy Lambda code
-cp handler.py $TEMP_DIR/
+cp handler.py rules_api.py ingest_queue.py response_cache.py query_planner.py $TEMP_DIR/
+cp -r "$PROJECT_ROOT/rules_common" $TEMP_DIR/
 
 # Create deployment package
 cd $TEMP_DIR
@@ -5,29 +5,94 @@ Workaround for Q CLI MCP tool validation issues
 """
 
 import argparse
+import base64
 import json
 import requests
 import sys
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional
+
+from rules_common import codec
+from rules_common.compression import ACCEPT_ENCODING
+from rules_common.rule import RULE_FIELDS, Rule
+from rules_common.snapshot import Snapshot, SnapshotWriter
 
 # API Gateway URL
 API_GATEWAY_URL = "https://t9rfu4e2s7.execute-api.us-east-1.amazonaws.com/dev"
 
-def list_all_rules(limit: int = 100) -> Dict:
-    """List all governance rules"""
+# Keep-alive session asking for compressed responses (br only when brotli can decode it)
+session = requests.Session()
+session.headers["Accept-Encoding"] = ACCEPT_ENCODING
+
+def field_params(fields: Optional[List[str]]) -> Dict:
+    """Query parameters selecting a projection of each rule's fields"""
+    return {"fields": ",".join(fields)} if fields else {}
+
+def list_all_rules(limit: int = 100, since: Optional[str] = None, fields: Optional[List[str]] = None) -> Dict:
+    """List governance rules, or every change after a generation/timestamp
+
+    The API caps each change feed response at ``limit`` changes and sets
+    ``has_more``; pages are requested until the feed is caught up.
+    """
     try:
-        response = requests.get(f"{API_GATEWAY_URL}/rules")
-        response.raise_for_status()
-        data = response.json()
-        
-        if limit and limit < len(data.get('rules', [])):
-            data['rules'] = data['rules'][:limit]
-            
+        params = field_params(fields)
+        params["limit"] = limit
+        if not since:
+            response = session.get(f"{API_GATEWAY_URL}/rules", params=params)
+            response.raise_for_status()
+            return codec.loads(response.content)
+
+        data = {"success": True, "rules": [], "deleted": []}
+        while True:
+            params["since"] = since
+            response = session.get(f"{API_GATEWAY_URL}/rules", params=params)
+            response.raise_for_status()
+            page = codec.loads(response.content)
+            if not page.get("success"):
+                return page
+            data["rules"].extend(page.get("rules", []))
+            data["deleted"].extend(page.get("deleted", []))
+            data["generation"] = since = str(page["generation"])
+            if not page.get("has_more"):
+                break
+        data["generation"] = int(data["generation"])
+        data["total"] = len(data["rules"])
         return data
     except Exception as e:
         return {"error": str(e)}
 
-def query_rules(query: str, category: Optional[str] = None, limit: int = 10) -> Dict:
+def stream_records(path: str, params: Optional[Dict] = None) -> Iterator[Dict]:
+    """Yield NDJSON records from a streamed endpoint as they arrive"""
+    with session.get(f"{API_GATEWAY_URL}{path}", params=params,
+                      headers={"Accept": "application/x-ndjson"}, stream=True) as response:
+        response.raise_for_status()
+        for line in response.iter_lines():
+            if line:
+                record = codec.loads(line)
+                if "error" in record:
+                    raise RuntimeError(record["error"])
+                yield record
+
+def stream_rules(limit: Optional[int] = None, since: Optional[str] = None,
+                 fields: Optional[List[str]] = None) -> Dict:
+    """Print rules (and tombstones) one JSON line at a time as the stream arrives"""
+    try:
+        params = field_params(fields)
+        if since:
+            params["since"] = since
+        if limit:
+            params["limit"] = limit
+        for record in stream_records("/rules", params):
+            if "done" in record:
+                return {"success": True, "count": record["count"], "deleted": record["deleted"],
+                        "generation": record["generation"], "has_more": record.get("has_more", False)}
+            print(codec.dumps(record.get("rule") or {"deleted": record["deleted"]}))
+        return {"error": "Stream ended before completion"}
+    except Exception as e:
+        return {"error": str(e)}
+
+def query_rules(query: str, category: Optional[str] = None, limit: int = 10,
+                mode: Optional[str] = None, fields: Optional[List[str]] = None,
+                include_pinned: bool = True) -> Dict:
     """Query governance rules by context"""
     try:
         payload = {
@@ -36,45 +101,148 @@ def query_rules(query: str, category: Optional[str] = None, limit: int = 10) ->
         }
         if category:
             payload["category"] = category
+        if mode:
+            payload["mode"] = mode
+        if fields:
+            payload["fields"] = fields
+        if not include_pinned:
+            payload["include_pinned"] = False
             
-        response = requests.post(f"{API_GATEWAY_URL}/rules/query", json=payload)
+        response = session.post(f"{API_GATEWAY_URL}/rules/query", json=payload)
         response.raise_for_status()
         return response.json()
     except Exception as e:
         return {"error": str(e)}
 
 def load_rule(title: str, rule_text: str, description: str = "", 
-              category: str = "general", priority: int = 5, tags: List[str] = None) -> Dict:
-    """Load a new governance rule"""
+              category: str = "general", priority: int = 5, tags: List[str] = None,
+              queue: bool = False) -> Dict:
+    """Load a new governance rule, optionally queued for asynchronous indexing"""
     try:
-        payload = {
+        rule = Rule.from_input({
             "title": title,
             "rule_text": rule_text,
             "description": description,
             "category": category,
             "priority": priority,
             "tags": tags or []
-        }
+        })
         
-        response = requests.post(f"{API_GATEWAY_URL}/rules", json=payload)
+        params = {"mode": "async"} if queue else None
+        response = session.post(f"{API_GATEWAY_URL}/rules", params=params, data=codec.dumps_bytes(rule.to_input()),
+                                 headers={"Content-Type": "application/json"})
         response.raise_for_status()
         return response.json()
     except Exception as e:
         return {"error": str(e)}
 
+def rule_status(rule_id: str) -> Dict:
+    """Check whether a queued rule has been indexed"""
+    try:
+        response = session.get(f"{API_GATEWAY_URL}/rules/{rule_id}/status")
+        response.raise_for_status()
+        return response.json()
+    except Exception as e:
+        return {"error": str(e)}
+
+def delete_rule(rule_id: str) -> Dict:
+    """Delete a governance rule"""
+    try:
+        response = session.delete(f"{API_GATEWAY_URL}/rules/{rule_id}")
+        response.raise_for_status()
+        return response.json()
+    except Exception as e:
+        return {"error": str(e)}
+
+def export_pages(dtype: str, batch_size: int, stream: bool) -> Iterator[Dict]:
+    """Yield export pages, from one NDJSON stream or one request per page"""
+    params = {"limit": batch_size, "dtype": dtype}
+    if stream:
+        for record in stream_records("/rules/export", params):
+            if "page" in record:
+                yield record["page"]
+        return
+
+    while True:
+        response = session.get(f"{API_GATEWAY_URL}/rules/export", params=params)
+        response.raise_for_status()
+        page = codec.loads(response.content)
+        if not page.get("success"):
+            raise RuntimeError(page.get("error", "Export failed"))
+        yield page
+        if not page.get("next"):
+            return
+        params["after"] = page["next"]
+
+def export_snapshot(path: str, dtype: str = "float32", batch_size: int = 200, stream: bool = False) -> Dict:
+    """Export every rule and its embedding into a binary snapshot file"""
+    try:
+        writer = None
+        for page in export_pages(dtype, batch_size, stream):
+            if page["rules"]:
+                if writer is None:
+                    writer = SnapshotWriter(path, page["dimension"], dtype, page.get("embedding_model"))
+                elif page.get("embedding_model") != writer.embedding_model:
+                    raise RuntimeError("The embedding model changed during the export; export again")
+                writer.add(page["rules"], base64.b64decode(page["vectors"]))
+
+        if writer is None:
+            return {"error": "No rules to export"}
+        header = writer.close()
+        return {"success": True, "path": path, "count": header["count"],
+                "dimension": header["dimension"], "dtype": dtype}
+    except Exception as e:
+        return {"error": str(e)}
+
+def import_snapshot(path: str, batch_size: int = 200) -> Dict:
+    """Import a snapshot through the bulk API without re-embedding"""
+    try:
+        imported = 0
+        with Snapshot(path) as snapshot:
+            for rules, vector_block in snapshot.batches(batch_size):
+                payload = {
+                    "rules": rules,
+                    "dimension": snapshot.dimension,
+                    "dtype": snapshot.dtype,
+                    "embedding_model": snapshot.embedding_model,
+                    "vectors": base64.b64encode(vector_block).decode("ascii")
+                }
+                response = session.post(f"{API_GATEWAY_URL}/rules/import", json=payload)
+                response.raise_for_status()
+                result = response.json()
+                if not result.get("success"):
+                    return result
+                imported += result.get("imported", 0)
+        return {"success": True, "imported": imported}
+    except Exception as e:
+        return {"error": str(e)}
+
 def main():
     parser = argparse.ArgumentParser(description="Governance Rules CLI")
     subparsers = parser.add_subparsers(dest='command', help='Available commands')
     
     # List command
     list_parser = subparsers.add_parser('list', help='List all governance rules')
-    list_parser.add_argument('--limit', type=int, default=100, help='Maximum number of rules to return')
+    list_parser.add_argument('--limit', type=int,
+                             help='Maximum number of rules to return, or changes fetched per request with --since '
+                                  '(default: 100, or all with --stream)')
+    list_parser.add_argument('--since', help='Only return changes after this generation or ISO timestamp')
+    list_parser.add_argument('--stream', action='store_true',
+                             help='Stream every rule as one JSON line each instead of a single document')
+    list_parser.add_argument('--fields', nargs='+', choices=RULE_FIELDS, metavar='FIELD',
+                             help='Only return these rule fields (rule_id is always included)')
     
     # Query command
     query_parser = subparsers.add_parser('query', help='Query governance rules')
     query_parser.add_argument('query', help='Query text')
     query_parser.add_argument('--category', help='Optional category filter')
     query_parser.add_argument('--limit', type=int, default=10, help='Maximum number of rules to return')
+    query_parser.add_argument('--mode', choices=['lexical', 'vector', 'hybrid'],
+                              help='Force a retrieval mode instead of letting the query planner choose')
+    query_parser.add_argument('--fields', nargs='+', choices=RULE_FIELDS, metavar='FIELD',
+                              help='Only return these rule fields (rule_id is always included)')
+    query_parser.add_argument('--no-pinned', dest='include_pinned', action='store_false',
+                              help='Leave out the pinned high-priority rules')
     
     # Load command
     load_parser = subparsers.add_parser('load', help='Load a new governance rule')
@@ -84,6 +252,30 @@ def main():
     load_parser.add_argument('--category', default='general', help='Rule category')
     load_parser.add_argument('--priority', type=int, default=5, help='Rule priority (1-10)')
     load_parser.add_argument('--tags', nargs='*', default=[], help='Rule tags')
+    load_parser.add_argument('--async', dest='queue', action='store_true',
+                             help='Queue the rule and return without waiting for indexing')
+    
+    # Status command
+    status_parser = subparsers.add_parser('status', help='Show indexing status of a queued rule')
+    status_parser.add_argument('rule_id', help='ID returned by load --async')
+    
+    # Export command
+    export_parser = subparsers.add_parser('export', help='Export all rules and embeddings to a snapshot file')
+    export_parser.add_argument('path', help='Snapshot file to write')
+    export_parser.add_argument('--dtype', choices=['float32', 'float16'], default='float32',
+                               help='Vector precision stored in the snapshot')
+    export_parser.add_argument('--batch-size', type=int, default=200, help='Rules fetched per API call')
+    export_parser.add_argument('--stream', action='store_true',
+                               help='Fetch all pages over one NDJSON stream (HTTP server mode)')
+    
+    # Import command
+    import_parser = subparsers.add_parser('import', help='Import a snapshot file without re-embedding')
+    import_parser.add_argument('path', help='Snapshot file to read')
+    import_parser.add_argument('--batch-size', type=int, default=200, help='Rules sent per API call')
+    
+    # Delete command
+    delete_parser = subparsers.add_parser('delete', help='Delete a governance rule')
+    delete_parser.add_argument('rule_id', help='ID of the rule to delete')
     
     args = parser.parse_args()
     
@@ -91,13 +283,23 @@ def main():
         parser.print_help()
         return
     
-    if args.command == 'list':
-        result = list_all_rules(args.limit)
+    if args.command == 'list' and args.stream:
+        result = stream_rules(args.limit, args.since, args.fields)
+    elif args.command == 'list':
+        result = list_all_rules(args.limit or 100, args.since, args.fields)
     elif args.command == 'query':
-        result = query_rules(args.query, args.category, args.limit)
+        result = query_rules(args.query, args.category, args.limit, args.mode, args.fields, args.include_pinned)
     elif args.command == 'load':
         result = load_rule(args.title, args.rule_text, args.description, 
-                          args.category, args.priority, args.tags)
+                          args.category, args.priority, args.tags, args.queue)
+    elif args.command == 'status':
+        result = rule_status(args.rule_id)
+    elif args.command == 'export':
+        result = export_snapshot(args.path, args.dtype, args.batch_size, args.stream)
+    elif args.command == 'import':
+        result = import_snapshot(args.path, args.batch_size)
+    elif args.command == 'delete':
+        result = delete_rule(args.rule_id)
     
     print(json.dumps(result, indent=2))
 
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Standalone HTTP server for the governance rules API
+
+Serves the same routes as the Lambda function (see rules_api.route_request)
+as an ASGI application, for container deployments and local load testing.
+
+Requests are handled on the asyncio event loop; the OpenSearch and Bedrock
+calls made by the shared routing code run on a bounded thread pool so one
+worker process serves many concurrent queries over a single warm,
+keep-alive connection pool.
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import threading
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl
+
+# Configuration
+SERVER_HOST = os.environ.get('SERVER_HOST', '0.0.0.0')
+SERVER_PORT = int(os.environ.get('SERVER_PORT', '8080'))
+SERVER_WORKERS = int(os.environ.get('SERVER_WORKERS', '2'))
+# Concurrent backend calls per worker process
+SERVER_THREADS = int(os.environ.get('SERVER_THREADS', '32'))
+SERVER_KEEPALIVE_SECONDS = int(os.environ.get('SERVER_KEEPALIVE_SECONDS', '75'))
+SERVER_SHUTDOWN_TIMEOUT = int(os.environ.get('SERVER_SHUTDOWN_TIMEOUT', '30'))
+# One keep-alive OpenSearch connection per backend thread, unless set
+# explicitly; rules_api reads this when imported below
+os.environ.setdefault('OPENSEARCH_POOL_SIZE', str(SERVER_THREADS))
+
+from ingest_queue import LocalIngestQueue, get_ingest_queue  # noqa: E402
+from rules_api import drain_ingest_queue, get_opensearch_client, internal_error_response, route_request  # noqa: E402
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class RulesApp:
+    """ASGI application adapting HTTP requests to the shared router"""
+
+    def __init__(self, threads: int = SERVER_THREADS):
+        self.threads = threads
+        self.executor = None
+        self.opensearch_client = None
+        self.ingest_worker = None
+        self.stopping = threading.Event()
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self._http(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                try:
+                    self.executor = ThreadPoolExecutor(max_workers=self.threads)
+                    loop = asyncio.get_running_loop()
+                    self.opensearch_client = await loop.run_in_executor(self.executor, get_opensearch_client)
+                    self._start_ingest_worker()
+                    await send({'type': 'lifespan.startup.complete'})
+                except Exception as e:
+                    logger.error(f"Server startup failed: {str(e)}")
+                    await send({'type': 'lifespan.startup.failed', 'message': str(e)})
+                    return
+            elif message['type'] == 'lifespan.shutdown':
+                # In-flight requests have drained by now; flush queued rules and
+                # let running backend calls finish
+                self.stopping.set()
+                if self.ingest_worker:
+                    await asyncio.get_running_loop().run_in_executor(None, self.ingest_worker.join)
+                if self.executor:
+                    self.executor.shutdown(wait=True)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    def _start_ingest_worker(self):
+        """Drain the in-process ingestion queue; SQS queues are drained by the worker Lambda"""
+        ingest_queue = get_ingest_queue()
+        if not isinstance(ingest_queue, LocalIngestQueue):
+            return
+
+        def run():
+            while True:
+                try:
+                    drained = drain_ingest_queue(self.opensearch_client, ingest_queue)
+                except Exception as e:
+                    logger.error(f"Ingestion worker error: {str(e)}")
+                    drained = 0
+                if not drained and self.stopping.is_set():
+                    return
+
+        self.ingest_worker = threading.Thread(target=run, name='ingest-worker', daemon=True)
+        self.ingest_worker.start()
+
+    async def _http(self, scope, receive, send):
+        body = b''
+        while True:
+            message = await receive()
+            body += message.get('body', b'')
+            if not message.get('more_body'):
+                break
+
+        query_params = dict(parse_qsl(scope.get('query_string', b'').decode()))
+        headers = {name.decode(): value.decode() for name, value in scope.get('headers', [])}
+        loop = asyncio.get_running_loop()
+        try:
+            response = await loop.run_in_executor(
+                self.executor,
+                route_request,
+                self.opensearch_client,
+                scope['method'],
+                scope['path'],
+                query_params,
+                body.decode() if body else None,
+                headers
+            )
+        except Exception as e:
+            logger.error(f"HTTP server error: {str(e)}")
+            response = internal_error_response()
+
+        await send_response(send, response, self.executor)
+
+async def send_response(send, response: Dict, executor: Optional[Executor] = None) -> None:
+    """Write a router response dict to the ASGI send channel
+
+    Streamed bodies (iterators of bytes chunks) are sent with chunked transfer
+    encoding; each chunk is produced on the executor because producing it may
+    fetch the next page from OpenSearch.
+    """
+    payload = response['body']
+    if isinstance(payload, str):
+        payload = payload.encode()
+    headers: List[Tuple[bytes, bytes]] = [
+        (name.lower().encode(), str(value).encode()) for name, value in response['headers'].items()
+    ]
+    await send({'type': 'http.response.start', 'status': response['statusCode'], 'headers': headers})
+    if isinstance(payload, bytes):
+        await send({'type': 'http.response.body', 'body': payload})
+        return
+
+    loop = asyncio.get_running_loop()
+    try:
+        while True:
+            chunk = await loop.run_in_executor(executor, next, payload, None)
+            if chunk is None:
+                break
+            await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+        await send({'type': 'http.response.body', 'body': b''})
+    finally:
+        await loop.run_in_executor(executor, payload.close)
+
+app = RulesApp()
+
+def main():
+    parser = argparse.ArgumentParser(description="Governance Rules HTTP server")
+    parser.add_argument('--host', default=SERVER_HOST, help='Interface to bind')
+    parser.add_argument('--port', type=int, default=SERVER_PORT, help='Port to listen on')
+    parser.add_argument('--workers', type=int, default=SERVER_WORKERS, help='Worker processes')
+    args = parser.parse_args()
+
+    import uvicorn
+
+    uvicorn.run(
+        'http_server:app',
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        timeout_keep_alive=SERVER_KEEPALIVE_SECONDS,
+        timeout_graceful_shutdown=SERVER_SHUTDOWN_TIMEOUT,
+        lifespan='on'
+    )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Write-behind ingestion queues
+
+POST /rules in async mode validates a rule, puts it on an IngestQueue and
+returns 202 straight away; a worker drains the queue in micro-batches (see
+rules_api.drain_ingest_queue and handler.sqs_handler).
+
+SqsIngestQueue is used when INGEST_QUEUE_URL is set. LocalIngestQueue keeps
+messages in process memory, for the standalone HTTP server and offline runs;
+it is never used on Lambda, where nothing would drain it.
+"""
+
+import json
+import logging
+import os
+import queue
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Tuple
+
+import boto3
+
+logger = logging.getLogger(__name__)
+
+INGEST_QUEUE_URL = os.environ.get('INGEST_QUEUE_URL')
+AWS_REGION = os.environ.get('AWS_REGION', os.environ.get('AWS_DEFAULT_REGION', 'us-east-1'))
+# Set by the Lambda runtime
+ON_LAMBDA = 'AWS_LAMBDA_FUNCTION_NAME' in os.environ
+
+class IngestQueue(ABC):
+    """Queue of validated rule documents awaiting embedding and indexing"""
+
+    @abstractmethod
+    def send(self, rule: Dict[str, Any]) -> None:
+        """Queue a rule for indexing"""
+
+    @abstractmethod
+    def receive(self, max_messages: int, wait_seconds: float) -> List[Tuple[Any, Dict[str, Any]]]:
+        """Return up to max_messages (receipt, rule) pairs, waiting at most wait_seconds"""
+
+    @abstractmethod
+    def ack(self, receipts: List[Any]) -> None:
+        """Remove processed messages from the queue"""
+
+    @abstractmethod
+    def retry(self, messages: List[Tuple[Any, Dict[str, Any]]]) -> None:
+        """Make received but unprocessed messages available again"""
+
+class LocalIngestQueue(IngestQueue):
+    """In-process queue; messages are lost if the process exits"""
+
+    def __init__(self):
+        self._queue: queue.Queue = queue.Queue()
+
+    def send(self, rule: Dict[str, Any]) -> None:
+        self._queue.put(rule)
+
+    def receive(self, max_messages: int, wait_seconds: float) -> List[Tuple[Any, Dict[str, Any]]]:
+        messages = []
+        deadline = time.monotonic() + wait_seconds
+        while len(messages) < max_messages:
+            remaining = deadline - time.monotonic()
+            try:
+                rule = self._queue.get(timeout=max(remaining, 0)) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            messages.append((None, rule))
+        return messages
+
+    def ack(self, receipts: List[Any]) -> None:
+        # Messages leave the in-process queue when they are received
+        pass
+
+    def retry(self, messages: List[Tuple[Any, Dict[str, Any]]]) -> None:
+        for _, rule in messages:
+            self._queue.put(rule)
+
+class SqsIngestQueue(IngestQueue):
+    """Amazon SQS backed queue"""
+
+    # SQS limits per ReceiveMessage/DeleteMessageBatch call
+    MAX_BATCH = 10
+
+    def __init__(self, queue_url: str):
+        self.queue_url = queue_url
+        self.sqs = boto3.client('sqs', region_name=AWS_REGION)
+
+    def send(self, rule: Dict[str, Any]) -> None:
+        self.sqs.send_message(QueueUrl=self.queue_url, MessageBody=json.dumps(rule))
+
+    def receive(self, max_messages: int, wait_seconds: float) -> List[Tuple[Any, Dict[str, Any]]]:
+        messages = []
+        deadline = time.monotonic() + wait_seconds
+        while len(messages) < max_messages:
+            remaining = deadline - time.monotonic()
+            response = self.sqs.receive_message(
+                QueueUrl=self.queue_url,
+                MaxNumberOfMessages=min(self.MAX_BATCH, max_messages - len(messages)),
+                WaitTimeSeconds=max(0, min(20, int(remaining)))
+            )
+            received = response.get('Messages', [])
+            messages.extend((m['ReceiptHandle'], json.loads(m['Body'])) for m in received)
+            if not received or remaining <= 0:
+                break
+        return messages
+
+    def ack(self, receipts: List[Any]) -> None:
+        for start in range(0, len(receipts), self.MAX_BATCH):
+            chunk = receipts[start:start + self.MAX_BATCH]
+            self.sqs.delete_message_batch(
+                QueueUrl=self.queue_url,
+                Entries=[{'Id': str(i), 'ReceiptHandle': receipt} for i, receipt in enumerate(chunk)]
+            )
+
+    def retry(self, messages: List[Tuple[Any, Dict[str, Any]]]) -> None:
+        # Unacknowledged messages reappear once their visibility timeout expires
+        pass
+
+_ingest_queue: Optional[IngestQueue] = None
+
+def get_ingest_queue() -> IngestQueue:
+    """Return the configured ingestion queue, creating it on first use
+
+    Raises RuntimeError on Lambda without INGEST_QUEUE_URL: queued rules
+    would be held by a container that nothing drains, and lost.
+    """
+    global _ingest_queue
+    if _ingest_queue is None:
+        if INGEST_QUEUE_URL:
+            _ingest_queue = SqsIngestQueue(INGEST_QUEUE_URL)
+        elif ON_LAMBDA:
+            raise RuntimeError("Asynchronous ingestion is not available: INGEST_QUEUE_URL is not set")
+        else:
+            logger.info("INGEST_QUEUE_URL not set; using in-process ingestion queue")
+            _ingest_queue = LocalIngestQueue()
+    return _ingest_queue
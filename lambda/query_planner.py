@@ -0,0 +1,110 @@
+"""
+Query planner choosing between lexical, vector and hybrid retrieval
+
+Exact keyword or tag lookups ("gdpr", "pii") are answered better and far
+cheaper by BM25/term queries than by a Bedrock embedding plus kNN search,
+while natural-language questions need semantic search. The planner looks at
+cheap features of the query text and picks a retrieval mode; hybrid plans
+merge both result lists with reciprocal rank fusion.
+"""
+
+import re
+from typing import AbstractSet, Any, Dict, Iterable, List, Optional
+
+LEXICAL = 'lexical'
+VECTOR = 'vector'
+HYBRID = 'hybrid'
+MODES = (LEXICAL, VECTOR, HYBRID)
+
+# Queries up to this many terms count as keyword lookups
+SHORT_QUERY_TERMS = 3
+# Standard RRF damping constant
+RRF_K = 60
+
+_QUOTED = re.compile(r'"([^"]+)"')
+_TERM = re.compile(r'[a-z0-9][a-z0-9_\-]*')
+
+class QueryPlan:
+    """Chosen retrieval mode plus the features and reason behind it"""
+
+    __slots__ = ('mode', 'reason', 'terms', 'phrases', 'tag_hits', 'category_hits', 'forced')
+
+    def __init__(self, mode: str, reason: str, terms: List[str], phrases: List[str],
+                 tag_hits: List[str], category_hits: List[str], forced: bool = False):
+        self.mode = mode
+        self.reason = reason
+        self.terms = terms
+        self.phrases = phrases
+        self.tag_hits = tag_hits
+        self.category_hits = category_hits
+        self.forced = forced
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'mode': self.mode,
+            'reason': self.reason,
+            'forced': self.forced,
+            'features': {
+                'terms': len(self.terms),
+                'phrases': self.phrases,
+                'tag_hits': self.tag_hits,
+                'category_hits': self.category_hits
+            }
+        }
+
+def plan_query(query_text: str, known_tags: AbstractSet[str], known_categories: AbstractSet[str],
+               forced_mode: Optional[str] = None) -> QueryPlan:
+    """Classify a query and choose a retrieval mode
+
+    known_tags and known_categories hold lowercased values; the query is
+    matched against them case-insensitively. forced_mode, when given,
+    overrides the classification.
+    """
+    normalized = query_text.strip().lower()
+    phrases = _QUOTED.findall(normalized)
+    terms = _TERM.findall(_QUOTED.sub(' ', normalized))
+    # A whole query such as "data-protection" may itself be a tag
+    candidates = set(terms) | ({normalized} if normalized else set())
+    tag_hits = sorted(candidates & known_tags)
+    category_hits = sorted(candidates & known_categories)
+
+    def plan(mode: str, reason: str, forced: bool = False) -> QueryPlan:
+        return QueryPlan(mode, reason, terms, phrases, tag_hits, category_hits, forced)
+
+    if forced_mode:
+        if forced_mode not in MODES:
+            raise ValueError(f"Unknown query mode: {forced_mode} (expected one of {', '.join(MODES)})")
+        return plan(forced_mode, 'requested by caller', forced=True)
+
+    if not terms and not phrases:
+        return plan(LEXICAL, 'empty query')
+
+    keyword_terms = set(terms) - known_tags - known_categories
+    if not phrases and len(terms) <= SHORT_QUERY_TERMS and (tag_hits or category_hits) and not keyword_terms:
+        return plan(LEXICAL, 'every term is a known tag or category')
+
+    if phrases:
+        return plan(HYBRID, 'quoted phrase needs exact matching alongside semantic recall')
+
+    if tag_hits or category_hits or len(terms) <= SHORT_QUERY_TERMS:
+        return plan(HYBRID, 'short or keyword-bearing query')
+
+    return plan(VECTOR, 'natural-language query')
+
+def reciprocal_rank_fusion(result_lists: Iterable[List[Dict[str, Any]]], limit: int,
+                           key: str = 'rule_id', k: int = RRF_K) -> List[Dict[str, Any]]:
+    """Merge ranked hit lists: score(d) = sum over lists of 1 / (k + rank of d)"""
+    scores: Dict[str, float] = {}
+    docs: Dict[str, Dict[str, Any]] = {}
+    for results in result_lists:
+        for rank, doc in enumerate(results, 1):
+            doc_id = doc[key]
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank)
+            docs.setdefault(doc_id, doc)
+
+    merged = []
+    for doc_id in sorted(scores, key=scores.get, reverse=True)[:limit]:
+        doc = dict(docs[doc_id])
+        doc['score'] = scores[doc_id]
+        merged.append(doc)
+    return merged
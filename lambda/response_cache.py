@@ -0,0 +1,70 @@
+"""
+Warm-container cache of serialized API responses
+
+Entries are keyed by route and parameters and tagged with the index
+generation they were computed at. Every write bumps the generation in
+OpenSearch, so an entry is only served while the generation it was built
+from is still current - across all containers writing to the same index.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Dict, Hashable, Iterable, Optional, Union
+
+from rules_common.compression import compress
+
+class CachedResponse:
+    """A serialized response body, optionally with pre-compressed copies per Content-Encoding"""
+
+    __slots__ = ('generation', 'body', 'encoded')
+
+    def __init__(self, generation: int, body: Union[str, bytes], encodings: Iterable[str] = ()):
+        self.generation = generation
+        self.body = body.encode() if isinstance(body, str) else body
+        self.encoded: Dict[str, bytes] = {encoding: compress(self.body, encoding) for encoding in encodings}
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + sum(len(body) for body in self.encoded.values())
+
+class ResponseCache:
+    """Thread-safe LRU of CachedResponse entries capped at max_bytes of body data"""
+
+    def __init__(self, max_bytes: int, encodings: Iterable[str] = ()):
+        self.max_bytes = max_bytes
+        self.encodings = tuple(encodings)
+        self._entries: 'OrderedDict[Hashable, CachedResponse]' = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, generation: int) -> Optional[CachedResponse]:
+        """Return the entry for key if it was built at the current generation"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.generation != generation:
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: Hashable, generation: int, body: Union[str, bytes]) -> CachedResponse:
+        """Store a serialized body, evicting least recently used entries over the cap"""
+        entry = CachedResponse(generation, body, self.encodings)
+        if entry.size > self.max_bytes:
+            return entry
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            self._bytes += entry.size
+            while self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+        return entry
+
+    def _remove(self, key: Hashable) -> None:
+        self._bytes -= self._entries.pop(key).size
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,1900 @@
+import hashlib
+import json
+import os
+import sys
+import boto3
+import logging
+from typing import Dict, Iterable, Iterator, List, Any, Optional, Set, Tuple, Union
+from array import array
+from botocore.config import Config
+from opensearchpy import OpenSearch, RequestsHttpConnection, AWSV4SignerAuth, helpers
+from opensearchpy.exceptions import NotFoundError, SerializationError
+from opensearchpy.serializer import JSONSerializer
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+# Modules shared with the CLI and MCP server live at the repository root;
+# deploy-lambda.sh bundles them next to this file
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from rules_common import codec
+from rules_common.compression import SUPPORTED_ENCODINGS, compress, compress_chunks, negotiate_encoding
+from rules_common.profiling import ProfiledIterator, profile_call, should_profile
+from rules_common.rule import RULE_FIELDS, Rule, RuleValidationError, as_vector, generate_rule_id
+from rules_common.snapshot import decode_vectors, encode_vectors
+from ingest_queue import IngestQueue, get_ingest_queue
+from response_cache import CachedResponse, ResponseCache
+from query_planner import HYBRID, LEXICAL, QueryPlan, plan_query, reciprocal_rank_fusion
+
+# Configure logging
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# Environment variables
+OPENSEARCH_ENDPOINT = os.environ['OPENSEARCH_ENDPOINT']
+INDEX_NAME = os.environ['INDEX_NAME']
+AWS_REGION = os.environ.get('AWS_REGION', os.environ.get('AWS_DEFAULT_REGION', 'us-east-1'))
+# Keep-alive connections held per client; the HTTP server defaults it to SERVER_THREADS
+OPENSEARCH_POOL_SIZE = int(os.environ.get('OPENSEARCH_POOL_SIZE', '10'))
+
+# Index layout. PARTITION_MODE selects how rules are spread across the cluster:
+#   none    - a single index named INDEX_NAME (default)
+#   index   - one index per category, all reachable through the INDEX_NAME alias
+#   routing - a single index with documents routed to shards by category
+INDEX_SHARDS = int(os.environ.get('INDEX_SHARDS', '1'))
+INDEX_REPLICAS = int(os.environ.get('INDEX_REPLICAS', '0'))
+PARTITION_MODE = os.environ.get('PARTITION_MODE', 'none').lower()
+# Per-partition overrides, e.g. {"privacy": {"shards": 2, "replicas": 1}}
+PARTITION_SETTINGS = json.loads(os.environ.get('PARTITION_SETTINGS') or '{}')
+
+# Bookkeeping index holding the generation counter and delete tombstones.
+# The underscore keeps it clear of the INDEX_NAME-<category> partition names.
+META_INDEX_NAME = f"{INDEX_NAME}_meta"
+GENERATION_DOC_ID = 'generation'
+# A write that has not closed its generation after this long is presumed lost
+# (its container died) and stops holding back change-feed resume points
+PENDING_WRITE_TIMEOUT_SECONDS = int(os.environ.get('PENDING_WRITE_TIMEOUT_SECONDS', '900'))
+# Present while tools/reindex.py builds a new physical index behind INDEX_NAME
+REINDEX_DOC_ID = 'reindex'
+# Writes rejected by the write block set on the old index just before a swap
+# are retried until the INDEX_NAME alias points at the new one
+WRITE_BLOCK_RETRY_SECONDS = float(os.environ.get('WRITE_BLOCK_RETRY_SECONDS', '0.5'))
+WRITE_BLOCK_MAX_WAIT_SECONDS = float(os.environ.get('WRITE_BLOCK_MAX_WAIT_SECONDS', '15'))
+
+# Rule ingestion. In async mode POST /rules enqueues the rule and returns 202;
+# a worker embeds and bulk-indexes queued rules in micro-batches.
+INGEST_MODE = os.environ.get('INGEST_MODE', 'sync').lower()
+INGEST_BATCH_SIZE = int(os.environ.get('INGEST_BATCH_SIZE', '25'))
+INGEST_MAX_WAIT_SECONDS = float(os.environ.get('INGEST_MAX_WAIT_SECONDS', '2'))
+# Parallel Bedrock calls when embedding a batch, and attempts per call; throttled
+# calls are retried with adaptive client-side rate limiting
+EMBEDDING_CONCURRENCY = int(os.environ.get('EMBEDDING_CONCURRENCY', '8'))
+BEDROCK_MAX_ATTEMPTS = int(os.environ.get('BEDROCK_MAX_ATTEMPTS', '6'))
+
+# Serialized responses for GET /rules and POST /rules/query kept in a warm
+# container, invalidated by the index generation. 0 disables the cache.
+# Entries also hold a compressed copy per supported Content-Encoding unless
+# RESPONSE_CACHE_PRECOMPRESS is false.
+RESPONSE_CACHE_MAX_BYTES = int(os.environ.get('RESPONSE_CACHE_MAX_BYTES', str(32 * 1024 * 1024)))
+RESPONSE_CACHE_PRECOMPRESS = os.environ.get('RESPONSE_CACHE_PRECOMPRESS', 'true').lower() == 'true'
+
+# Response bodies smaller than this are sent uncompressed: the coding
+# overhead outweighs the saving
+COMPRESS_MIN_BYTES = int(os.environ.get('COMPRESS_MIN_BYTES', '1024'))
+
+# Query planning: distinct tags/categories the planner recognises, and how
+# many candidates each side of a hybrid query contributes to the fusion
+PLANNER_VOCABULARY_SIZE = int(os.environ.get('PLANNER_VOCABULARY_SIZE', '1000'))
+HYBRID_CANDIDATES = int(os.environ.get('HYBRID_CANDIDATES', '20'))
+
+# Rules at or above this priority are pinned: kept as a precomputed set per
+# category in the meta index and attached to every matching query, so they
+# never compete with contextual rules for search slots
+PINNED_PRIORITY = int(os.environ.get('PINNED_PRIORITY', '9'))
+
+# Streaming (NDJSON) responses: hits fetched per search_after page, and bytes
+# buffered before a chunk is handed to the transport
+STREAM_PAGE_SIZE = int(os.environ.get('STREAM_PAGE_SIZE', '500'))
+STREAM_CHUNK_BYTES = int(os.environ.get('STREAM_CHUNK_BYTES', str(64 * 1024)))
+NDJSON_CONTENT_TYPE = 'application/x-ndjson'
+
+# Embedding model and vector size; recorded in each rules index's mapping _meta
+EMBEDDING_MODEL_ID = os.environ.get('EMBEDDING_MODEL_ID', 'amazon.titan-embed-text-v1')
+EMBEDDING_DIMENSION = int(os.environ.get('EMBEDDING_DIMENSION', '1536'))
+
+# Initialize AWS clients
+bedrock_runtime = boto3.client('bedrock-runtime', region_name=AWS_REGION, config=Config(
+    retries={'max_attempts': BEDROCK_MAX_ATTEMPTS, 'mode': 'adaptive'}
+))
+session = boto3.Session()
+credentials = session.get_credentials()
+
+class FastJSONSerializer(JSONSerializer):
+    """OpenSearch request/response serializer backed by rules_common.codec
+
+    Lets float32 embedding arrays go straight into index, bulk and kNN bodies.
+    Codec errors are raised as SerializationError, as the stock serializer
+    does, so the transport reports them the same way.
+    """
+
+    def dumps(self, data):
+        if isinstance(data, str):
+            return data
+        try:
+            return codec.dumps(data)
+        except (ValueError, TypeError) as e:
+            raise SerializationError(data, e)
+
+    def loads(self, s):
+        try:
+            return codec.loads(s)
+        except (ValueError, TypeError) as e:
+            raise SerializationError(s, e)
+
+class OpenSearchClient:
+    def __init__(self, bootstrap: bool = True):
+        """Connect to the cluster; with bootstrap, create the rules and meta indices if missing
+
+        Operator tools pass bootstrap=False so running them never creates or
+        alters indices as a side effect.
+        """
+        logger.info(f"Initializing OpenSearch client for endpoint: {OPENSEARCH_ENDPOINT}")
+        logger.info("Using IAM authentication with AWS request signing")
+        
+        # Create AWS V4 signer for authentication
+        auth = AWSV4SignerAuth(credentials, AWS_REGION, 'es')
+        
+        # Initialize OpenSearch client with IAM authentication
+        self.client = OpenSearch(
+            hosts=[{'host': OPENSEARCH_ENDPOINT, 'port': 443}],
+            http_auth=auth,
+            use_ssl=True,
+            verify_certs=True,
+            connection_class=RequestsHttpConnection,
+            pool_maxsize=OPENSEARCH_POOL_SIZE,
+            serializer=FastJSONSerializer(),
+            timeout=30
+        )
+        
+        # Test connection first
+        try:
+            logger.info("Testing OpenSearch connection...")
+            health = self.client.cluster.health()
+            logger.info(f"OpenSearch cluster health: {health}")
+        except Exception as e:
+            logger.error(f"Failed to connect to OpenSearch: {str(e)}")
+            raise
+        
+        if not bootstrap:
+            return
+
+        # Try to ensure indices exist, but don't fail if it doesn't work
+        try:
+            self._ensure_meta_index_exists()
+            self._ensure_index_exists()
+        except Exception as e:
+            logger.warning(f"Could not ensure index exists during initialization: {str(e)}. Will continue anyway.")
+
+    def _ensure_meta_index_exists(self):
+        """Create the bookkeeping index for the generation counter and tombstones"""
+        if self.client.indices.exists(index=META_INDEX_NAME):
+            return
+        try:
+            self.client.indices.create(index=META_INDEX_NAME, body={
+                "settings": {
+                    "number_of_shards": 1,
+                    "number_of_replicas": INDEX_REPLICAS
+                },
+                "mappings": {
+                    "dynamic": False,
+                    "properties": {
+                        "type": {"type": "keyword"},
+                        "rule_id": {"type": "keyword"},
+                        "generation": {"type": "long"},
+                        "state": {"type": "keyword"},
+                        "deleted_at": {"type": "date"}
+                    }
+                }
+            })
+            logger.info(f"Created index: {META_INDEX_NAME}")
+        except Exception as e:
+            if 'resource_already_exists_exception' not in str(e).lower():
+                raise
+    
+    def _ensure_index_exists(self):
+        """Create the index if it doesn't exist"""
+        if PARTITION_MODE == 'index':
+            # Partition indices are created on first write to each category
+            return
+
+        try:
+            # Try to check if index exists
+            if self.client.indices.exists(index=INDEX_NAME):
+                logger.info(f"Index {INDEX_NAME} already exists")
+                return
+        except Exception as e:
+            logger.warning(f"Could not check index existence: {str(e)}. Will attempt to create index.")
+        
+        # Create the first physical index behind the INDEX_NAME alias, so
+        # tools/reindex.py can later swap in a rebuilt index without downtime
+        try:
+            index_body = build_index_body(INDEX_SHARDS, INDEX_REPLICAS)
+            index_body['aliases'] = {INDEX_NAME: {'is_write_index': True}}
+            self.client.indices.create(index=physical_index_name(1), body=index_body)
+            logger.info(f"Created index: {physical_index_name(1)} (alias {INDEX_NAME})")
+        except Exception as e:
+            # If index creation fails, it might already exist
+            logger.warning(f"Could not create index {INDEX_NAME}: {str(e)}. Index might already exist.")
+
+    def _ensure_partition_exists(self, category: str) -> str:
+        """Create the partition index for a category and attach it to the INDEX_NAME alias"""
+        index_name = partition_index_name(category)
+        if index_name in _known_partitions:
+            return index_name
+
+        if not self.client.indices.exists(index=index_name):
+            overrides = PARTITION_SETTINGS.get(category, {})
+            index_body = build_index_body(
+                overrides.get('shards', INDEX_SHARDS),
+                overrides.get('replicas', INDEX_REPLICAS)
+            )
+            index_body['aliases'] = {INDEX_NAME: {}}
+            try:
+                self.client.indices.create(index=index_name, body=index_body)
+                logger.info(f"Created partition index: {index_name}")
+            except Exception as e:
+                # Another writer may have created it concurrently
+                if 'resource_already_exists_exception' not in str(e).lower():
+                    raise
+
+        _known_partitions.add(index_name)
+        return index_name
+
+    def write_target(self, category: str) -> Dict[str, Any]:
+        """Return the index/routing arguments used to write a rule of the given category"""
+        if PARTITION_MODE == 'index':
+            return {'index': self._ensure_partition_exists(category)}
+        if PARTITION_MODE == 'routing':
+            return {'index': INDEX_NAME, 'routing': category}
+        return {'index': INDEX_NAME}
+
+    def search_target(self, category: Optional[str]) -> Dict[str, Any]:
+        """Return the index/routing arguments used to search, optionally scoped to one category"""
+        if category and PARTITION_MODE == 'index':
+            return {'index': partition_index_name(category)}
+        if category and PARTITION_MODE == 'routing':
+            return {'index': INDEX_NAME, 'routing': category}
+        return {'index': INDEX_NAME}
+
+# Partition indices already known to exist in this container
+_known_partitions = set()
+
+def partition_index_name(category: str) -> str:
+    """Name of the partition index holding rules of the given category"""
+    slug = re.sub(r'[^a-z0-9]+', '-', category.lower()).strip('-') or 'general'
+    return f"{INDEX_NAME}-{slug}"
+
+def physical_index_name(version: int) -> str:
+    """Name of a versioned physical index behind the INDEX_NAME alias"""
+    return f"{INDEX_NAME}_v{version}"
+
+def build_index_body(shards: int, replicas: int, dimension: int = EMBEDDING_DIMENSION,
+                     model_id: str = EMBEDDING_MODEL_ID, ef_search: int = 100,
+                     hnsw_parameters: Optional[Dict[str, int]] = None) -> Dict[str, Any]:
+    """Settings and mappings for a governance rules index embedded with the given model
+
+    hnsw_parameters (``m``, ``ef_construction``) default to the engine's own.
+    """
+    method = {
+        "name": "hnsw",
+        "space_type": "cosinesimil",
+        "engine": "nmslib"
+    }
+    if hnsw_parameters:
+        method["parameters"] = hnsw_parameters
+    return {
+        "settings": {
+            "number_of_shards": shards,
+            "number_of_replicas": replicas,
+            "index": {
+                "knn": True,
+                "knn.algo_param.ef_search": ef_search
+            }
+        },
+        "mappings": {
+            "_meta": {
+                "embedding_model": model_id,
+                "embedding_dimension": dimension
+            },
+            "properties": {
+                "rule_id": {"type": "keyword"},
+                "title": {"type": "text"},
+                "description": {"type": "text"},
+                "category": {"type": "keyword"},
+                "priority": {"type": "integer"},
+                "tags": {"type": "keyword"},
+                "rule_text": {"type": "text"},
+                "embedding": {
+                    "type": "knn_vector",
+                    "dimension": dimension,
+                    "method": method
+                },
+                "generation": {"type": "long"},
+                "created_at": {"type": "date"},
+                "updated_at": {"type": "date"}
+            }
+        }
+    }
+
+def current_generation(opensearch_client: OpenSearchClient) -> int:
+    """Return the index generation, bumped by every write; 0 before the first write"""
+    try:
+        doc = opensearch_client.client.get(index=META_INDEX_NAME, id=GENERATION_DOC_ID)
+        return doc['_source']['generation']
+    except NotFoundError:
+        return 0
+
+def feed_generation(opensearch_client: OpenSearchClient) -> int:
+    """Generation a change feed can safely resume from
+
+    The current generation, or the oldest generation still held by a write
+    in flight: its documents are stamped with that generation but may only
+    become visible after later writes have finished.
+    """
+    try:
+        source = opensearch_client.client.get(index=META_INDEX_NAME, id=GENERATION_DOC_ID)['_source']
+    except NotFoundError:
+        return 0
+    cutoff = (time.time() - PENDING_WRITE_TIMEOUT_SECONDS) * 1000
+    pending = [int(generation) for generation, opened_at in (source.get('pending') or {}).items()
+               if opened_at > cutoff]
+    return min(pending, default=source['generation'])
+
+# Painless scripts for the generation document. pending maps each generation
+# a write has opened but not closed to the epoch millis it was opened at.
+BEGIN_WRITE_SCRIPT = """
+if (ctx._source.pending == null) { ctx._source.pending = [:]; }
+ctx._source.pending.values().removeIf(openedAt -> openedAt < params.now - params.timeout);
+ctx._source.generation += 1;
+ctx._source.pending[String.valueOf(ctx._source.generation)] = params.now;
+"""
+END_WRITE_SCRIPT = """
+ctx._source.generation += 1;
+if (ctx._source.pending != null) { ctx._source.pending.remove(params.generation); }
+"""
+
+def _update_generation(opensearch_client: OpenSearchClient, script: str, params: Dict[str, Any],
+                       upsert: Dict[str, Any]) -> int:
+    response = opensearch_client.client.update(
+        index=META_INDEX_NAME,
+        id=GENERATION_DOC_ID,
+        body={
+            "script": {"source": script, "lang": "painless", "params": params},
+            "upsert": upsert
+        },
+        _source=True,
+        retry_on_conflict=10,
+        refresh=True
+    )
+    return response['get']['_source']['generation']
+
+def bump_generation(opensearch_client: OpenSearchClient) -> int:
+    """Atomically increment the index generation and return the new value
+
+    The counter lives in OpenSearch so every container sees the same sequence.
+    Used on its own to invalidate caches; writes that stamp documents use
+    begin_write / end_write.
+    """
+    return _update_generation(opensearch_client, "ctx._source.generation += 1", {},
+                              {"type": "generation", "generation": 1})
+
+def begin_write(opensearch_client: OpenSearchClient) -> int:
+    """Open a write: increment the generation and return it, marked pending
+
+    The returned generation is stamped on the documents written. Until
+    end_write closes it, feed_generation will not hand out a resume point
+    past it.
+    """
+    now = int(time.time() * 1000)
+    return _update_generation(opensearch_client, BEGIN_WRITE_SCRIPT,
+                              {'now': now, 'timeout': PENDING_WRITE_TIMEOUT_SECONDS * 1000},
+                              {"type": "generation", "generation": 1, "pending": {"1": now}})
+
+def end_write(opensearch_client: OpenSearchClient, generation: int) -> int:
+    """Close a write opened at ``generation`` once it is visible, returning the new generation
+
+    The second increment invalidates ETags and cached responses computed
+    while the write was in flight.
+    """
+    return _update_generation(opensearch_client, END_WRITE_SCRIPT, {'generation': str(generation)},
+                              {"type": "generation", "generation": 1})
+
+def generation_etag(generation: int, *representation: Any) -> str:
+    """Weak ETag for a response computed at an index generation
+
+    ``representation`` holds the request parameters that shape the body
+    (format, limit, since, fields), so two requests only share a tag when
+    they get the same content. The tag is weak because that content may be
+    sent with any content coding; responses carry Vary: Accept-Encoding.
+    """
+    digest = hashlib.sha1(repr(representation).encode()).hexdigest()[:12]
+    return f'W/"g{generation}-{digest}"'
+
+def etag_matches(etag: str, if_none_match: Optional[str]) -> bool:
+    """Weak comparison of an ETag against an If-None-Match header"""
+    if not if_none_match:
+        return False
+    opaque = etag[2:] if etag.startswith('W/') else etag
+    tags = [tag.strip() for tag in if_none_match.split(',')]
+    return '*' in tags or any((tag[2:] if tag.startswith('W/') else tag) == opaque for tag in tags)
+
+def is_write_blocked(error: Any) -> bool:
+    """Whether a write failed on an index blocked for an alias swap"""
+    return 'cluster_block_exception' in str(error)
+
+def retry_write_blocked(func, *args: Any, **kwargs: Any) -> Any:
+    """Run a write through the alias, retrying while a reindex swap blocks the old index
+
+    The swap moves the alias within seconds, after which the retried write
+    lands in the new index.
+    """
+    deadline = time.monotonic() + WRITE_BLOCK_MAX_WAIT_SECONDS
+    while True:
+        try:
+            return func(*args, **kwargs)
+        except Exception as e:
+            if not is_write_blocked(e) or time.monotonic() >= deadline:
+                raise
+            logger.info("Index is write-blocked for an alias swap; retrying")
+            time.sleep(WRITE_BLOCK_RETRY_SECONDS)
+
+def reindex_target(opensearch_client: OpenSearchClient) -> Optional[str]:
+    """Index being built by a running reindex, which must receive every write too"""
+    try:
+        doc = opensearch_client.client.get(index=META_INDEX_NAME, id=REINDEX_DOC_ID)['_source']
+    except NotFoundError:
+        return None
+    return doc['target'] if doc.get('state') == 'copying' else None
+
+def set_write_block(opensearch_client: OpenSearchClient, indices: List[str], blocked: Optional[bool]) -> None:
+    """Block writes to indices ahead of an alias swap; None lifts the block"""
+    opensearch_client.client.indices.put_settings(index=','.join(indices),
+                                                  body={"index": {"blocks.write": blocked}})
+
+def swap_alias(opensearch_client: OpenSearchClient, sources: List[str], is_alias: bool, target: str) -> None:
+    """Point INDEX_NAME at target in one atomic _aliases call"""
+    actions = [{"add": {"index": target, "alias": INDEX_NAME, "is_write_index": True}}]
+    if is_alias:
+        actions += [{"remove": {"index": source, "alias": INDEX_NAME}} for source in sources]
+    else:
+        # A concrete index cannot coexist with an alias of the same name
+        actions.append({"remove_index": {"index": INDEX_NAME}})
+    opensearch_client.client.indices.update_aliases(body={"actions": actions})
+
+def rule_ids(opensearch_client: OpenSearchClient, index: str) -> Set[str]:
+    """Every rule_id held by an index"""
+    by_rule_id = {"query": {"match_all": {}}, "_source": False, "sort": [{"rule_id": {"order": "asc"}}]}
+    return {hit['sort'][0] for hit in iter_hits(opensearch_client, index, by_rule_id)}
+
+def mirror_writes(opensearch_client: OpenSearchClient, actions: List[Dict[str, Any]]) -> None:
+    """Repeat bulk write actions on the index a running reindex is building
+
+    Called once the write is visible in the live index: a writer that does
+    not see the dual-write marker yet finished before the copy began, so
+    the copy picks its document up. One that no longer sees it wrote before
+    the old index was write-blocked for the swap, and the reindex tool's
+    final sync copies its document.
+    """
+    target = reindex_target(opensearch_client)
+    if target and actions:
+        helpers.bulk(opensearch_client.client, [dict(action, _index=target) for action in actions],
+                     raise_on_error=False)
+
+def remove_moved_copies(opensearch_client: OpenSearchClient, docs: Iterable[Dict[str, Any]]) -> None:
+    """Delete copies of just-written rules still stored under another category
+
+    With partitioning a rule's _id is only unique within one partition index
+    or routing key, so a rule reloaded with a new category would otherwise
+    keep its old copy next to the new one. Runs once the write is visible.
+    """
+    if PARTITION_MODE not in ('index', 'routing'):
+        return
+    moved = [
+        {"bool": {
+            "filter": [{"term": {"rule_id": doc['rule_id']}}],
+            "must_not": [{"term": {"category": doc['category']}}]
+        }}
+        for doc in docs
+    ]
+    if not moved:
+        return
+    body = {"query": {"bool": {"should": moved, "minimum_should_match": 1}}}
+    retry_write_blocked(opensearch_client.client.delete_by_query, index=INDEX_NAME, body=body,
+                        conflicts='proceed', refresh=True)
+    target = reindex_target(opensearch_client)
+    if target:
+        opensearch_client.client.delete_by_query(index=target, body=body, conflicts='proceed')
+
+def tombstone_id(rule_id: str) -> str:
+    return f"tombstone:{rule_id}"
+
+def ingest_status_id(rule_id: str) -> str:
+    return f"ingest:{rule_id}"
+
+def pinned_id(rule_id: str) -> str:
+    return f"pinned:{rule_id}"
+
+def pinned_actions(docs: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Meta index bulk actions putting written rules into, or taking them out of, the pinned tier"""
+    actions = []
+    for doc in docs:
+        if doc.get('priority', 1) >= PINNED_PRIORITY:
+            source = {name: doc.get(name) for name in RULE_FIELDS}
+            source['type'] = 'pinned'
+            actions.append({'_index': META_INDEX_NAME, '_id': pinned_id(doc['rule_id']), '_source': source})
+        else:
+            # A rule reloaded with a lower priority leaves the tier
+            actions.append({'_op_type': 'delete', '_index': META_INDEX_NAME, '_id': pinned_id(doc['rule_id'])})
+    return actions
+
+def sync_pinned(opensearch_client: OpenSearchClient, docs: Iterable[Dict[str, Any]]) -> None:
+    """Bring the pinned tier in line with rules just written
+
+    Runs before the closing generation bump, so the refreshed tier is what
+    readers load for the new generation.
+    """
+    # Deleting an entry for a rule that was never pinned reports a 404, which is fine here
+    helpers.bulk(opensearch_client.client, pinned_actions(docs), refresh='wait_for', raise_on_error=False)
+
+def get_embedding(text: str, model_id: Optional[str] = None, dimension: Optional[int] = None,
+                  strict: bool = False) -> array:
+    """Generate embedding using Amazon Bedrock Titan Embeddings
+
+    Defaults to EMBEDDING_MODEL_ID / EMBEDDING_DIMENSION. Titan text v2
+    models are asked for the configured dimension (256, 512 or 1024).
+    Unless ``strict``, a failed Bedrock call yields a zero vector so local
+    development works without Bedrock access; writes that must not store
+    such a vector pass ``strict=True`` and get the error instead.
+    """
+    model_id = model_id or EMBEDDING_MODEL_ID
+    dimension = dimension or EMBEDDING_DIMENSION
+    try:
+        request = {
+            "inputText": text
+        }
+        if 'titan-embed-text-v2' in model_id:
+            request["dimensions"] = dimension
+            request["normalize"] = True
+        
+        response = bedrock_runtime.invoke_model(
+            modelId=model_id,
+            body=json.dumps(request),
+            contentType="application/json",
+            accept="application/json"
+        )
+        
+        response_body = codec.loads(response['body'].read())
+        embedding = as_vector(response_body['embedding'])
+    except Exception as e:
+        logger.error(f"Error generating embedding: {str(e)}")
+        if strict:
+            raise
+        # Return a dummy embedding for development
+        return array('f', bytes(4 * dimension))
+
+    if len(embedding) != dimension:
+        raise ValueError(f"{model_id} returned a {len(embedding)}-dimension embedding, expected {dimension}")
+    return embedding
+
+def get_embeddings(texts: List[str], model_id: Optional[str] = None, dimension: Optional[int] = None,
+                   strict: bool = False, return_exceptions: bool = False) -> List[Union[array, Exception]]:
+    """Generate embeddings for a batch of texts
+
+    Titan text embeddings take one input per call, so the batch is spread over
+    EMBEDDING_CONCURRENCY parallel requests. ``strict`` is passed on to
+    get_embedding; with ``return_exceptions`` a failed text gets its
+    exception in place of a vector instead of failing the whole batch.
+    """
+    def embed(text: str) -> Union[array, Exception]:
+        try:
+            return get_embedding(text, model_id, dimension, strict)
+        except Exception as e:
+            if not return_exceptions:
+                raise
+            return e
+
+    if len(texts) <= 1:
+        return [embed(text) for text in texts]
+    with ThreadPoolExecutor(max_workers=min(EMBEDDING_CONCURRENCY, len(texts))) as executor:
+        return list(executor.map(embed, texts))
+
+def index_embedding_config(opensearch_client: OpenSearchClient, index: str = INDEX_NAME) -> Dict[str, Tuple[Optional[str], int]]:
+    """Embedding model and dimension of each physical index behind ``index``
+
+    The dimension comes from the knn_vector mapping; the model from the mapping
+    _meta, absent on indices created before it was recorded.
+    """
+    configs = {}
+    for name, mapping in opensearch_client.client.indices.get_mapping(index=index).items():
+        mapping = mapping['mappings']
+        embedding = mapping.get('properties', {}).get('embedding')
+        if embedding:
+            configs[name] = (mapping.get('_meta', {}).get('embedding_model'), embedding['dimension'])
+    return configs
+
+# Result of the last embedding configuration check, as (generation, error)
+_embedding_check: Optional[Tuple[int, Optional[str]]] = None
+
+def embedding_mismatch(opensearch_client: OpenSearchClient, generation: Optional[int] = None) -> Optional[str]:
+    """Explain why the configured embedding model cannot be used with the live index, if so
+
+    Vectors of another dimension, or from another model, are not comparable,
+    so kNN searches and writes against such an index are refused until it is
+    re-embedded (tools/migrate_embeddings.py). Checked once per generation.
+    """
+    global _embedding_check
+    if generation is None:
+        generation = current_generation(opensearch_client)
+    if _embedding_check is None or _embedding_check[0] != generation:
+        try:
+            configs = index_embedding_config(opensearch_client)
+        except NotFoundError:
+            configs = {}
+        error = None
+        for index, (model_id, dimension) in sorted(configs.items()):
+            if dimension != EMBEDDING_DIMENSION or (model_id and model_id != EMBEDDING_MODEL_ID):
+                error = (f"Index {index} holds {dimension}-dimension {model_id or 'unrecorded model'} "
+                         f"embeddings but the API is configured for {EMBEDDING_DIMENSION}-dimension "
+                         f"{EMBEDDING_MODEL_ID}; re-embed it with tools/migrate_embeddings.py")
+                break
+        _embedding_check = (generation, error)
+    return _embedding_check[1]
+
+def new_rule_document(rule: Rule, embedding: array, generation: int) -> Dict[str, Any]:
+    """Stamp a validated rule with its embedding, generation and timestamps"""
+    now = datetime.utcnow().isoformat()
+    rule.embedding = embedding
+    rule.generation = generation
+    rule.created_at = rule.updated_at = now
+    return rule.to_document()
+
+def load_rule(opensearch_client: OpenSearchClient, rule_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Load a governance rule into OpenSearch"""
+    try:
+        rule = Rule.from_input(rule_data)
+        
+        error = embedding_mismatch(opensearch_client)
+        if error:
+            return {
+                'success': False,
+                'error': error
+            }
+
+        # Generate embedding for the rule; never store the zero-vector fallback
+        embedding = get_embedding(rule.embedding_text, strict=True)
+        
+        # Prepare document
+        generation = begin_write(opensearch_client)
+        try:
+            doc = new_rule_document(rule, embedding, generation)
+            rule_id = rule.rule_id
+        
+            # Index the document into the partition for its category
+            target = opensearch_client.write_target(doc['category'])
+            response = retry_write_blocked(
+                opensearch_client.client.index,
+                id=rule_id,
+                body=doc,
+                refresh='wait_for',
+                **target
+            )
+            action = {'_id': rule_id, '_source': doc}
+            if 'routing' in target:
+                action['_routing'] = target['routing']
+            mirror_writes(opensearch_client, [action])
+            remove_moved_copies(opensearch_client, [doc])
+
+            # A re-created rule supersedes any earlier delete, and any status left
+            # by an earlier asynchronous submission
+            for meta_id in (tombstone_id(rule_id), ingest_status_id(rule_id)):
+                opensearch_client.client.delete(
+                    index=META_INDEX_NAME,
+                    id=meta_id,
+                    ignore=404
+                )
+            sync_pinned(opensearch_client, [doc])
+        finally:
+            generation = end_write(opensearch_client, generation)
+        
+        logger.info(f"Loaded rule: {rule_id}")
+        return {
+            'success': True,
+            'rule_id': rule_id,
+            'generation': generation,
+            'message': 'Rule loaded successfully'
+        }
+        
+    except RuleValidationError as e:
+        return {
+            'success': False,
+            'error': str(e)
+        }
+    except Exception as e:
+        logger.error(f"Error loading rule: {str(e)}")
+        return {
+            'success': False,
+            'error': str(e)
+        }
+
+def enqueue_rule(opensearch_client: OpenSearchClient, ingest_queue: IngestQueue,
+                 rule_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Validate a rule and queue it for write-behind indexing"""
+    try:
+        rule = Rule.from_input(rule_data)
+        rule_id = rule.rule_id
+        opensearch_client.client.index(
+            index=META_INDEX_NAME,
+            id=ingest_status_id(rule_id),
+            body={
+                'type': 'ingest',
+                'rule_id': rule_id,
+                'state': 'queued',
+                'queued_at': datetime.utcnow().isoformat()
+            }
+        )
+        ingest_queue.send(rule.to_input())
+
+        return {
+            'success': True,
+            'rule_id': rule_id,
+            'status': 'queued',
+            'status_url': f'/rules/{rule_id}/status',
+            'message': 'Rule queued for indexing'
+        }
+
+    except RuleValidationError as e:
+        return {
+            'success': False,
+            'error': str(e)
+        }
+    except Exception as e:
+        logger.error(f"Error queueing rule: {str(e)}")
+        return {
+            'success': False,
+            'error': str(e)
+        }
+
+def index_rules_batch(opensearch_client: OpenSearchClient, rules: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Embed and bulk-index a micro-batch of queued rules
+
+    Returns the IDs that were indexed and those that failed, plus the failed
+    IDs worth retrying (``retryable``: embedding failures and writes
+    rejected during a reindex swap); the outcome of each rule is recorded
+    for GET /rules/{rule_id}/status.
+    """
+    error = embedding_mismatch(opensearch_client)
+    if error:
+        raise RuntimeError(error)
+    # Queued rules were validated by enqueue_rule
+    batch = [Rule(**rule) for rule in rules]
+    # A rule whose embedding failed (e.g. Bedrock throttling) is reported as
+    # failed so the queue retries it, rather than indexed with a zero vector
+    embeddings = get_embeddings([rule.embedding_text for rule in batch], strict=True, return_exceptions=True)
+    failed = {}
+    embedded = []
+    for rule, embedding in zip(batch, embeddings):
+        if isinstance(embedding, Exception):
+            failed[rule.rule_id] = f"Embedding failed: {str(embedding)}"
+        else:
+            embedded.append((rule, embedding))
+    retryable = list(failed)
+    generation = begin_write(opensearch_client)
+    try:
+        docs = [new_rule_document(rule, embedding, generation) for rule, embedding in embedded]
+
+        actions = []
+        for doc in docs:
+            target = opensearch_client.write_target(doc['category'])
+            action = {'_index': target['index'], '_id': doc['rule_id'], '_source': doc}
+            if 'routing' in target:
+                action['_routing'] = target['routing']
+            actions.append(action)
+
+        _, errors = helpers.bulk(opensearch_client.client, actions, refresh='wait_for', raise_on_error=False)
+        for item in errors:
+            details = next(iter(item.values()))
+            failed[details['_id']] = str(details.get('error', 'Indexing failed'))
+            if is_write_blocked(details.get('error')):
+                retryable.append(details['_id'])
+        indexed = [doc['rule_id'] for doc in docs if doc['rule_id'] not in failed]
+        mirror_writes(opensearch_client, [action for action in actions if action['_id'] not in failed])
+        remove_moved_copies(opensearch_client, [doc for doc in docs if doc['rule_id'] not in failed])
+
+        now = datetime.utcnow().isoformat()
+        status_actions = []
+        for rule_id in indexed:
+            status_actions.append({'_op_type': 'delete', '_index': META_INDEX_NAME, '_id': tombstone_id(rule_id)})
+            status_actions.append({'_index': META_INDEX_NAME, '_id': ingest_status_id(rule_id), '_source': {
+                'type': 'ingest', 'rule_id': rule_id, 'state': 'indexed', 'generation': generation, 'indexed_at': now
+            }})
+        for rule_id, error in failed.items():
+            status_actions.append({'_index': META_INDEX_NAME, '_id': ingest_status_id(rule_id), '_source': {
+                'type': 'ingest', 'rule_id': rule_id, 'state': 'failed', 'error': error, 'failed_at': now
+            }})
+        # Deleting a tombstone that does not exist reports a 404, which is fine here
+        helpers.bulk(opensearch_client.client, status_actions, raise_on_error=False)
+        sync_pinned(opensearch_client, [doc for doc in docs if doc['rule_id'] not in failed])
+    finally:
+        end_write(opensearch_client, generation)
+
+    logger.info(f"Indexed batch of {len(indexed)} rules ({len(failed)} failed)")
+    return {
+        'indexed': indexed,
+        'failed': failed,
+        'retryable': retryable,
+        'generation': generation
+    }
+
+def drain_ingest_queue(opensearch_client: OpenSearchClient, ingest_queue: IngestQueue,
+                       batch_size: int = INGEST_BATCH_SIZE,
+                       max_wait_seconds: float = INGEST_MAX_WAIT_SECONDS) -> int:
+    """Pull one micro-batch (up to batch_size rules or max_wait_seconds) and index it
+
+    Rules whose embedding failed go back on the queue. Returns the number
+    of rules taken off the queue.
+    """
+    messages = ingest_queue.receive(batch_size, max_wait_seconds)
+    if not messages:
+        return 0
+    try:
+        result = index_rules_batch(opensearch_client, [rule for _, rule in messages])
+    except Exception as e:
+        logger.error(f"Error indexing ingestion batch: {str(e)}")
+        ingest_queue.retry(messages)
+        return 0
+    retryable = set(result['retryable'])
+    retry = [message for message in messages if generate_rule_id(message[1]['rule_text']) in retryable]
+    if retry:
+        ingest_queue.retry(retry)
+    ingest_queue.ack([receipt for receipt, rule in messages if generate_rule_id(rule['rule_text']) not in retryable])
+    return len(messages) - len(retry)
+
+def get_ingest_status(opensearch_client: OpenSearchClient, rule_id: str) -> Dict[str, Any]:
+    """Report whether a rule submitted asynchronously has been indexed"""
+    try:
+        try:
+            status = opensearch_client.client.get(index=META_INDEX_NAME, id=ingest_status_id(rule_id))['_source']
+        except NotFoundError:
+            status = None
+
+        if status is None:
+            # Rules loaded synchronously have no ingestion record
+            found = opensearch_client.client.count(
+                index=INDEX_NAME,
+                body={"query": {"term": {"rule_id": rule_id}}}
+            )['count']
+            if not found:
+                return {
+                    'success': False,
+                    'error': f'Rule not found: {rule_id}'
+                }
+            status = {'rule_id': rule_id, 'state': 'indexed'}
+
+        status.pop('type', None)
+        return {
+            'success': True,
+            **status
+        }
+
+    except Exception as e:
+        logger.error(f"Error reading ingestion status: {str(e)}")
+        return {
+            'success': False,
+            'error': str(e)
+        }
+
+def delete_rule(opensearch_client: OpenSearchClient, rule_id: str) -> Dict[str, Any]:
+    """Delete a governance rule and record a tombstone for delta consumers"""
+    try:
+        # The rule may live in any partition, so delete through the alias
+        response = retry_write_blocked(
+            opensearch_client.client.delete_by_query,
+            index=INDEX_NAME,
+            body={"query": {"term": {"rule_id": rule_id}}},
+            refresh=True
+        )
+        if not response.get('deleted'):
+            return {
+                'success': False,
+                'error': f'Rule not found: {rule_id}'
+            }
+        target = reindex_target(opensearch_client)
+        if target:
+            opensearch_client.client.delete_by_query(
+                index=target,
+                body={"query": {"term": {"rule_id": rule_id}}},
+                conflicts='proceed'
+            )
+
+        opensearch_client.client.delete(
+            index=META_INDEX_NAME,
+            id=ingest_status_id(rule_id),
+            ignore=404
+        )
+        opensearch_client.client.delete(
+            index=META_INDEX_NAME,
+            id=pinned_id(rule_id),
+            refresh='wait_for',
+            ignore=404
+        )
+        generation = begin_write(opensearch_client)
+        try:
+            opensearch_client.client.index(
+                index=META_INDEX_NAME,
+                id=tombstone_id(rule_id),
+                body={
+                    'type': 'tombstone',
+                    'rule_id': rule_id,
+                    'generation': generation,
+                    'deleted_at': datetime.utcnow().isoformat()
+                },
+                refresh='wait_for'
+            )
+        finally:
+            generation = end_write(opensearch_client, generation)
+
+        logger.info(f"Deleted rule: {rule_id}")
+        return {
+            'success': True,
+            'rule_id': rule_id,
+            'generation': generation,
+            'message': 'Rule deleted successfully'
+        }
+
+    except Exception as e:
+        logger.error(f"Error deleting rule: {str(e)}")
+        return {
+            'success': False,
+            'error': str(e)
+        }
+
+# Tags and categories known to the query planner, as (generation, tags, categories);
+# each maps the lowercased value the planner matches on to the values as indexed
+_vocabulary: Optional[Tuple[int, Dict[str, List[str]], Dict[str, List[str]]]] = None
+
+def _case_map(buckets: List[Dict[str, Any]]) -> Dict[str, List[str]]:
+    values: Dict[str, List[str]] = {}
+    for bucket in buckets:
+        values.setdefault(bucket['key'].lower(), []).append(bucket['key'])
+    return values
+
+def get_vocabulary(opensearch_client: OpenSearchClient,
+                   generation: int) -> Tuple[Dict[str, List[str]], Dict[str, List[str]]]:
+    """Return the indexed tags and categories, refreshed when the generation changes
+
+    Both map a lowercased value to its spellings in the index: the planner
+    matches queries case-insensitively, while the keyword fields are
+    searched with the values as stored.
+    """
+    global _vocabulary
+    if _vocabulary is None or _vocabulary[0] != generation:
+        try:
+            response = opensearch_client.client.search(
+                index=INDEX_NAME,
+                body={
+                    "size": 0,
+                    "aggs": {
+                        "tags": {"terms": {"field": "tags", "size": PLANNER_VOCABULARY_SIZE}},
+                        "categories": {"terms": {"field": "category", "size": PLANNER_VOCABULARY_SIZE}}
+                    }
+                }
+            )
+            aggregations = response['aggregations']
+            tags = _case_map(aggregations['tags']['buckets'])
+            categories = _case_map(aggregations['categories']['buckets'])
+        except NotFoundError:
+            tags, categories = {}, {}
+        _vocabulary = (generation, tags, categories)
+    return _vocabulary[1], _vocabulary[2]
+
+# Pinned tier as (generation, rules by category, all rules)
+_pinned: Optional[Tuple[int, Dict[str, List[Dict[str, Any]]], List[Dict[str, Any]]]] = None
+
+def get_pinned_rules(opensearch_client: OpenSearchClient, generation: int,
+                     category: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Return the pinned rules of a category (all of them when unscoped), highest priority first
+
+    The tier is loaded from the meta index once per generation; between
+    writes a lookup is a dictionary access.
+    """
+    global _pinned
+    if _pinned is None or _pinned[0] != generation:
+        search_body = {
+            "query": {"term": {"type": "pinned"}},
+            "sort": [{"rule_id": {"order": "asc"}}]
+        }
+        try:
+            rules = [hit['_source'] for hit in iter_hits(opensearch_client, META_INDEX_NAME, search_body)]
+        except NotFoundError:
+            rules = []
+        rules.sort(key=lambda rule: -rule['priority'])
+        by_category: Dict[str, List[Dict[str, Any]]] = {}
+        for rule in rules:
+            rule.pop('type', None)
+            by_category.setdefault(rule['category'], []).append(rule)
+        _pinned = (generation, by_category, rules)
+    if category:
+        return _pinned[1].get(category, [])
+    return _pinned[2]
+
+def category_filter(category: Optional[str]) -> List[Dict[str, Any]]:
+    """Category filter clauses for a search scoped to one category
+
+    Kept in every partition mode: partition index names are slugs, so
+    categories such as "Data Privacy" and "data-privacy" share an index,
+    and routed shards hold several categories.
+    """
+    if category:
+        return [{"term": {"category": category}}]
+    return []
+
+def parse_fields(value: Any) -> Optional[Tuple[str, ...]]:
+    """Validate a ``fields`` projection: a list or comma-separated string of rule fields
+
+    Returns the sorted field names, always including rule_id, or None for
+    whole rules. Raises ValueError for anything else.
+    """
+    if value is None or value == '' or value == []:
+        return None
+    names = value.split(',') if isinstance(value, str) else value
+    if not isinstance(names, list) or not all(isinstance(name, str) for name in names):
+        raise ValueError('fields must be a list of rule field names')
+    names = {name.strip() for name in names if name.strip()}
+    unknown = names - set(RULE_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))} (valid: {', '.join(RULE_FIELDS)})")
+    return tuple(sorted(names | {'rule_id'}))
+
+def source_filter(fields: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+    """_source filter for rule hits: never the embedding, and only ``fields`` when given"""
+    source: Dict[str, Any] = {"excludes": ["embedding"]}
+    if fields:
+        source["includes"] = list(fields)
+    return source
+
+def vector_search_body(query_embedding: Iterable[float], category: Optional[str], size: int,
+                       fields: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+    """kNN search body"""
+    search_body = {
+        "size": size,
+        "query": {
+            "bool": {
+                "must": [
+                    {
+                        "knn": {
+                            "embedding": {
+                                "vector": query_embedding,
+                                "k": size
+                            }
+                        }
+                    }
+                ]
+            }
+        },
+        "_source": source_filter(fields)
+    }
+    filters = category_filter(category)
+    if filters:
+        search_body["query"]["bool"]["filter"] = filters
+    return search_body
+
+def lexical_search_body(query_text: str, plan: QueryPlan, category: Optional[str], size: int,
+                        fields: Optional[Iterable[str]] = None,
+                        vocabulary: Optional[Tuple[Dict[str, List[str]], Dict[str, List[str]]]] = None) -> Dict[str, Any]:
+    """BM25 search body: exact tag/category terms, quoted phrases and full-text match
+
+    ``vocabulary`` (see get_vocabulary) turns the planner's lowercased tag
+    and category hits back into the values stored in the keyword fields.
+    """
+    tags, categories = vocabulary or ({}, {})
+    tag_terms = [value for hit in plan.tag_hits for value in tags.get(hit, [hit])]
+    category_terms = [value for hit in plan.category_hits for value in categories.get(hit, [hit])]
+    should: List[Dict[str, Any]] = []
+    if tag_terms:
+        should.append({"terms": {"tags": tag_terms, "boost": 3.0}})
+    if category_terms:
+        should.append({"terms": {"category": category_terms, "boost": 2.0}})
+    for phrase in plan.phrases:
+        should.append({"multi_match": {
+            "query": phrase,
+            "type": "phrase",
+            "fields": ["title^2", "rule_text", "description"],
+            "boost": 2.0
+        }})
+    if plan.terms:
+        should.append({"multi_match": {
+            "query": " ".join(plan.terms),
+            "fields": ["title^3", "description^2", "rule_text", "tags^2"]
+        }})
+
+    query: Dict[str, Any] = {"bool": {"filter": category_filter(category)}}
+    if should:
+        query["bool"]["should"] = should
+        query["bool"]["minimum_should_match"] = 1
+    return {
+        "size": size,
+        "query": query,
+        "_source": source_filter(fields)
+    }
+
+def _scored_rules(hits: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    rules = []
+    for hit in hits:
+        rule = hit['_source']
+        rule['score'] = hit['_score']
+        rules.append(rule)
+    return rules
+
+def query_rules(opensearch_client: OpenSearchClient, query_text: str, category: Optional[str] = None,
+                limit: int = 10, mode: Optional[str] = None, generation: Optional[int] = None,
+                fields: Optional[Iterable[str]] = None, include_pinned: bool = True) -> Dict[str, Any]:
+    """Query governance rules using lexical, vector or hybrid retrieval
+
+    The query planner picks the retrieval mode unless the caller forces one
+    with ``mode``; the chosen plan is returned alongside the rules. Hybrid
+    queries run the lexical and kNN searches in a single _msearch and merge
+    them with reciprocal rank fusion. ``fields`` (see parse_fields) limits
+    the rule fields returned.
+
+    Pinned rules in scope are returned separately under ``pinned`` and left
+    out of ``rules``, which holds up to ``limit`` contextual matches.
+
+    With index partitioning a category-scoped query only searches that category's
+    HNSW graph; an unscoped query fans out over every partition behind the alias
+    and OpenSearch merges the per-partition top-k.
+    """
+    plan = None
+    try:
+        if generation is None:
+            generation = current_generation(opensearch_client)
+        vocabulary = get_vocabulary(opensearch_client, generation)
+        plan = plan_query(query_text, vocabulary[0].keys(), vocabulary[1].keys(), mode)
+        if plan.mode != LEXICAL:
+            error = embedding_mismatch(opensearch_client, generation)
+            if error:
+                return {
+                    'success': False,
+                    'error': error,
+                    'rules': [],
+                    'pinned': [],
+                    'total': 0,
+                    'plan': plan.to_dict()
+                }
+        target = opensearch_client.search_target(category)
+        pinned = get_pinned_rules(opensearch_client, generation, category) if include_pinned else []
+        pinned_ids = {rule['rule_id'] for rule in pinned}
+        # Pinned rules the search finds are dropped, so fetch enough to still fill the limit
+        size = limit + len(pinned_ids)
+
+        if plan.mode == LEXICAL:
+            response = opensearch_client.client.search(
+                body=lexical_search_body(query_text, plan, category, size, fields, vocabulary),
+                **target
+            )
+            rules = _scored_rules(response['hits']['hits'])
+            total = response['hits']['total']['value']
+        elif plan.mode == HYBRID:
+            candidates = max(size, HYBRID_CANDIDATES)
+            query_embedding = get_embedding(query_text, strict=True)
+            header = dict(target)
+            responses = opensearch_client.client.msearch(body=[
+                header, lexical_search_body(query_text, plan, category, candidates, fields, vocabulary),
+                header, vector_search_body(query_embedding, category, candidates, fields)
+            ])['responses']
+            for response in responses:
+                if 'error' in response:
+                    raise RuntimeError(codec.dumps(response['error']))
+            rules = reciprocal_rank_fusion(
+                [_scored_rules(response['hits']['hits']) for response in responses],
+                size
+            )
+            total = max(response['hits']['total']['value'] for response in responses)
+        else:
+            # Generate embedding for query; a zero-vector fallback would return
+            # (and cache) arbitrary neighbours, so a Bedrock failure fails the query
+            query_embedding = get_embedding(query_text, strict=True)
+            response = opensearch_client.client.search(
+                body=vector_search_body(query_embedding, category, size, fields),
+                **target
+            )
+            rules = _scored_rules(response['hits']['hits'])
+            total = response['hits']['total']['value']
+
+        if pinned_ids:
+            rules = [rule for rule in rules if rule['rule_id'] not in pinned_ids]
+        if fields:
+            pinned = [{name: rule[name] for name in fields if name in rule} for rule in pinned]
+        
+        return {
+            'success': True,
+            'rules': rules[:limit],
+            'pinned': pinned,
+            'total': total,
+            'plan': plan.to_dict()
+        }
+        
+    except Exception as e:
+        error_msg = str(e)
+        logger.error(f"Error querying rules: {error_msg}")
+
+        # A category without a partition yet simply has no rules
+        if category and PARTITION_MODE == 'index' and "index_not_found_exception" in error_msg.lower():
+            return {
+                'success': True,
+                'rules': [],
+                'pinned': [],
+                'total': 0,
+                'plan': plan.to_dict() if plan else None
+            }
+
+        return {
+            'success': False,
+            'error': error_msg,
+            'rules': [],
+            'pinned': [],
+            'total': 0,
+            'plan': plan.to_dict() if plan else None
+        }
+
+def export_rules(opensearch_client: OpenSearchClient, after: Optional[str] = None, limit: int = 200,
+                 dtype: str = 'float32') -> Dict[str, Any]:
+    """Export one page of rules with their embeddings, ordered by rule_id
+
+    Embeddings are returned as a single base64 vector block (see
+    rules_common.snapshot) rather than JSON floats, labelled with the model
+    that produced them. Pass ``next`` back as ``after`` to fetch the
+    following page.
+    """
+    try:
+        # The pages are labelled with the configured model, so refuse to
+        # label an index embedded with another one
+        error = embedding_mismatch(opensearch_client)
+        if error:
+            return {
+                'success': False,
+                'error': error
+            }
+        search_body = {
+            "size": limit,
+            "query": {"match_all": {}},
+            "sort": [{"rule_id": {"order": "asc"}}]
+        }
+        if after:
+            search_body["search_after"] = [after]
+
+        response = opensearch_client.client.search(
+            index=INDEX_NAME,
+            body=search_body
+        )
+        hits = response['hits']['hits']
+
+        rules = []
+        vectors = []
+        for hit in hits:
+            rule = hit['_source']
+            vectors.append(rule.pop('embedding'))
+            rules.append(rule)
+
+        return {
+            'success': True,
+            'rules': rules,
+            'dimension': len(vectors[0]) if vectors else 0,
+            'dtype': dtype,
+            'embedding_model': EMBEDDING_MODEL_ID,
+            'vectors': encode_vectors(vectors, dtype),
+            'next': rules[-1]['rule_id'] if len(rules) == limit else None
+        }
+
+    except Exception as e:
+        logger.error(f"Error exporting rules: {str(e)}")
+        return {
+            'success': False,
+            'error': str(e)
+        }
+
+def import_rules(opensearch_client: OpenSearchClient, page: Dict[str, Any]) -> Dict[str, Any]:
+    """Bulk-index a page of exported rules, reusing their embeddings instead of calling Bedrock
+
+    Rules are validated like POST /rules input; their exported rule_id and
+    timestamps are kept. Pages whose embedding model or dimension differ
+    from the API's configuration are refused.
+    """
+    try:
+        rules = page.get('rules', [])
+        if not rules:
+            return {
+                'success': True,
+                'imported': 0
+            }
+
+        error = embedding_mismatch(opensearch_client)
+        if error:
+            return {
+                'success': False,
+                'error': error
+            }
+        dimension = page['dimension']
+        model_id = page.get('embedding_model')
+        if dimension != EMBEDDING_DIMENSION or model_id != EMBEDDING_MODEL_ID:
+            return {
+                'success': False,
+                'error': f'Snapshot holds {dimension}-dimension {model_id or "unrecorded model"} embeddings '
+                         f'but the API is configured for {EMBEDDING_DIMENSION}-dimension {EMBEDDING_MODEL_ID}'
+            }
+        vectors = decode_vectors(page['vectors'], dimension, page.get('dtype', 'float32'))
+        if len(vectors) != len(rules):
+            return {
+                'success': False,
+                'error': f'Got {len(vectors)} vectors for {len(rules)} rules'
+            }
+
+        batch = []
+        for rule_data in rules:
+            rule = Rule.from_input(rule_data)
+            rule_id = rule_data.get('rule_id')
+            if rule_id is not None:
+                if not isinstance(rule_id, str) or not rule_id:
+                    raise RuleValidationError('rule_id must be a non-empty string')
+                rule.rule_id = rule_id
+            rule.created_at = rule_data.get('created_at')
+            rule.updated_at = rule_data.get('updated_at')
+            batch.append(rule)
+
+        generation = begin_write(opensearch_client)
+        try:
+            now = datetime.utcnow().isoformat()
+            actions = []
+            for rule, vector in zip(batch, vectors):
+                rule.embedding = vector
+                rule.generation = generation
+                rule.created_at = rule.created_at or now
+                rule.updated_at = rule.updated_at or now
+                doc = rule.to_document()
+                target = opensearch_client.write_target(doc['category'])
+                action = {'_index': target['index'], '_id': doc['rule_id'], '_source': doc}
+                if 'routing' in target:
+                    action['_routing'] = target['routing']
+                actions.append(action)
+
+            imported, _ = retry_write_blocked(helpers.bulk, opensearch_client.client, actions, refresh='wait_for')
+            mirror_writes(opensearch_client, actions)
+            docs = [action['_source'] for action in actions]
+            remove_moved_copies(opensearch_client, docs)
+
+            # Imported rules supersede any earlier delete; missing tombstones report a 404, which is fine here
+            helpers.bulk(opensearch_client.client, [
+                {'_op_type': 'delete', '_index': META_INDEX_NAME, '_id': tombstone_id(doc['rule_id'])}
+                for doc in docs
+            ], raise_on_error=False)
+            sync_pinned(opensearch_client, docs)
+        finally:
+            generation = end_write(opensearch_client, generation)
+
+        logger.info(f"Imported {imported} rules")
+        return {
+            'success': True,
+            'imported': imported,
+            'generation': generation
+        }
+
+    except RuleValidationError as e:
+        return {
+            'success': False,
+            'error': str(e)
+        }
+    except Exception as e:
+        logger.error(f"Error importing rules: {str(e)}")
+        return {
+            'success': False,
+            'error': str(e)
+        }
+
+def change_filter(since: str, timestamp_field: str) -> Dict[str, Any]:
+    """Range filter selecting changes after a generation number or an ISO timestamp
+
+    Generations are matched inclusively: a document stamped with the generation
+    a client last saw may not have been visible yet, so it is sent again.
+    """
+    if since.isdigit():
+        return {"range": {"generation": {"gte": int(since)}}}
+    return {"range": {timestamp_field: {"gt": since}}}
+
+def change_generation(hit: Dict[str, Any]) -> int:
+    """Generation of a change feed hit; documents written before generations existed count as 0"""
+    return hit['_source'].get('generation') or 0
+
+def change_hits(opensearch_client: OpenSearchClient, index: str, search_body: Dict[str, Any],
+                limit: int) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+    """Take up to ``limit`` hits of a generation-ordered change query, never splitting a generation
+
+    Returns the hits and, when more changes remain, the generation of the
+    first change left out. A single generation with more than ``limit``
+    changes (a large batch or import) is returned whole so callers always
+    make progress.
+    """
+    hits: List[Dict[str, Any]] = []
+    for hit in iter_hits(opensearch_client, index, search_body, page_size=min(limit + 1, STREAM_PAGE_SIZE)):
+        if len(hits) >= limit and change_generation(hit) != change_generation(hits[-1]):
+            return hits, change_generation(hit)
+        hits.append(hit)
+    return hits, None
+
+def change_sort() -> List[Dict[str, Any]]:
+    """Change feed order: by generation, unstamped documents first, then rule_id"""
+    return [
+        {"generation": {"order": "asc", "missing": "_first", "unmapped_type": "long"}},
+        {"rule_id": {"order": "asc"}}
+    ]
+
+def tombstone_query(since: str) -> Dict[str, Any]:
+    return {"bool": {"filter": [
+        {"term": {"type": "tombstone"}},
+        change_filter(since, 'deleted_at')
+    ]}}
+
+def deleted_record(hit: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        'rule_id': hit['_source']['rule_id'],
+        'generation': hit['_source']['generation'],
+        'deleted_at': hit['_source']['deleted_at']
+    }
+
+def change_feed(opensearch_client: OpenSearchClient, since: str, limit: int,
+                fields: Optional[Iterable[str]] = None) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], Optional[int]]:
+    """Rule and tombstone hits changed since ``since``, at most ``limit`` of each
+
+    Returns both hit lists and, when changes were left out, the generation
+    the next poll must resume from. Changes at or after that generation are
+    dropped from both lists so they are sent once, on the next poll.
+    """
+    try:
+        rule_hits, rules_resume = change_hits(opensearch_client, INDEX_NAME, {
+            "query": {"bool": {"filter": [change_filter(since, 'updated_at')]}},
+            "_source": source_filter(fields),
+            "sort": change_sort()
+        }, limit)
+    except NotFoundError:
+        rule_hits, rules_resume = [], None
+    tombstone_hits, tombstones_resume = change_hits(opensearch_client, META_INDEX_NAME, {
+        "query": tombstone_query(since),
+        "sort": change_sort()
+    }, limit)
+
+    pending = [value for value in (rules_resume, tombstones_resume) if value is not None]
+    resume = min(pending) if pending else None
+    if resume is not None:
+        rule_hits = [hit for hit in rule_hits if change_generation(hit) < resume]
+        tombstone_hits = [hit for hit in tombstone_hits if change_generation(hit) < resume]
+    return rule_hits, tombstone_hits, resume
+
+def list_all_rules(opensearch_client: OpenSearchClient, limit: int = 100, since: Optional[str] = None,
+                   generation: Optional[int] = None, fields: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+    """List all governance rules
+
+    With ``since`` (a generation number or ISO timestamp) only rules created or
+    updated after that point are returned, plus tombstones for deleted rules.
+    The result carries the generation to pass as the next ``since``: never
+    past a write still in flight (see feed_generation), so a change stamped
+    with an earlier generation that becomes visible late is still picked up.
+    When there are more than ``limit`` changes, ``has_more`` is set and that
+    generation is at most the first one not yet delivered, so the caller
+    keeps polling until ``has_more`` is false. ``fields`` (see parse_fields)
+    limits the rule fields returned.
+    """
+    try:
+        # Read the generation before searching so a concurrent write is
+        # reported again on the next poll rather than skipped
+        if generation is None:
+            generation = current_generation(opensearch_client)
+
+        if since:
+            floor = feed_generation(opensearch_client)
+            rule_hits, tombstone_hits, resume = change_feed(opensearch_client, since, limit, fields)
+            return {
+                'success': True,
+                'rules': [hit['_source'] for hit in rule_hits],
+                'deleted': [deleted_record(hit) for hit in tombstone_hits],
+                'total': len(rule_hits),
+                'generation': floor if resume is None else min(resume, floor),
+                'has_more': resume is not None
+            }
+
+        response = opensearch_client.client.search(
+            index=INDEX_NAME,
+            body={
+                "size": limit,
+                "query": {"match_all": {}},
+                "_source": source_filter(fields),
+                "sort": [
+                    {"priority": {"order": "desc"}},
+                    {"created_at": {"order": "desc"}}
+                ]
+            }
+        )
+        
+        rules = [hit['_source'] for hit in response['hits']['hits']]
+        
+        return {
+            'success': True,
+            'rules': rules,
+            'total': response['hits']['total']['value'],
+            'generation': generation
+        }
+        
+    except Exception as e:
+        error_msg = str(e)
+        logger.error(f"Error listing rules: {error_msg}")
+        
+        # If index doesn't exist, return empty results instead of error
+        if "index_not_found_exception" in error_msg.lower() or "no such index" in error_msg.lower():
+            logger.info(f"Index {INDEX_NAME} does not exist yet. Returning empty results.")
+            return {
+                'success': True,
+                'rules': [],
+                'total': 0,
+                'generation': generation or 0
+            }
+        
+        return {
+            'success': False,
+            'error': error_msg
+        }
+
+def iter_hits(opensearch_client: OpenSearchClient, index: str, search_body: Dict[str, Any],
+              limit: Optional[int] = None, page_size: int = STREAM_PAGE_SIZE) -> Iterator[Dict[str, Any]]:
+    """Yield the hits of a sorted search page by page using search_after
+
+    The sort must end with a unique field so pages neither overlap nor skip hits.
+    """
+    search_body = dict(search_body)
+    yielded = 0
+    while True:
+        size = page_size if limit is None else min(page_size, limit - yielded)
+        if size <= 0:
+            return
+        search_body['size'] = size
+        hits = opensearch_client.client.search(index=index, body=search_body)['hits']['hits']
+        yield from hits
+        yielded += len(hits)
+        if len(hits) < size:
+            return
+        search_body['search_after'] = hits[-1]['sort']
+
+def stream_rules(opensearch_client: OpenSearchClient, limit: Optional[int] = None, since: Optional[str] = None,
+                 generation: Optional[int] = None, fields: Optional[Iterable[str]] = None) -> Iterator[Dict[str, Any]]:
+    """Yield NDJSON records for the rule list: one per rule, one per tombstone, then a summary
+
+    Same selection and ordering as list_all_rules, but pages arrive from
+    OpenSearch as they are written out so memory does not grow with the
+    result size. The final ``done`` record lets consumers detect truncation;
+    a change feed cut short by ``limit`` reports ``has_more`` and the
+    generation to resume from, as list_all_rules does.
+    """
+    if generation is None:
+        generation = current_generation(opensearch_client)
+    if since:
+        generation = feed_generation(opensearch_client)
+
+    if since and limit is not None:
+        # Bounded by limit (plus the rest of one generation), so collected
+        # first to find where the next poll must resume
+        rule_hits, tombstone_hits, resume = change_feed(opensearch_client, since, limit, fields)
+        for hit in rule_hits:
+            yield {'rule': hit['_source']}
+        for hit in tombstone_hits:
+            yield {'deleted': deleted_record(hit)}
+        yield {'done': True, 'count': len(rule_hits), 'deleted': len(tombstone_hits),
+               'generation': generation if resume is None else min(resume, generation),
+               'has_more': resume is not None}
+        return
+
+    search_body: Dict[str, Any] = {
+        "query": {"match_all": {}},
+        "_source": source_filter(fields),
+        "sort": [
+            {"priority": {"order": "desc"}},
+            {"created_at": {"order": "desc"}},
+            {"rule_id": {"order": "asc"}}
+        ]
+    }
+    if since:
+        search_body["query"] = {"bool": {"filter": [change_filter(since, 'updated_at')]}}
+        search_body["sort"] = change_sort()
+
+    count = 0
+    try:
+        for hit in iter_hits(opensearch_client, INDEX_NAME, search_body, limit):
+            count += 1
+            yield {'rule': hit['_source']}
+    except NotFoundError:
+        logger.info(f"Index {INDEX_NAME} does not exist yet. Streaming empty results.")
+
+    deleted = 0
+    if since:
+        tombstones = {"query": tombstone_query(since), "sort": change_sort()}
+        for hit in iter_hits(opensearch_client, META_INDEX_NAME, tombstones):
+            deleted += 1
+            yield {'deleted': deleted_record(hit)}
+
+    yield {'done': True, 'count': count, 'deleted': deleted, 'generation': generation}
+
+def stream_export(opensearch_client: OpenSearchClient, limit: int = 200,
+                  dtype: str = 'float32') -> Iterator[Dict[str, Any]]:
+    """Yield every export page (see export_rules) as an NDJSON record, then a summary"""
+    after = None
+    exported = 0
+    while True:
+        page = export_rules(opensearch_client, after, limit, dtype)
+        if not page.get('success'):
+            yield {'error': page.get('error', 'Export failed')}
+            return
+        if page['rules']:
+            exported += len(page['rules'])
+            yield {'page': page}
+        after = page['next']
+        if not after:
+            break
+    yield {'done': True, 'count': exported}
+
+def ndjson_chunks(records: Iterable[Dict[str, Any]], chunk_bytes: int = STREAM_CHUNK_BYTES) -> Iterator[bytes]:
+    """Encode records as NDJSON, yielding chunks of roughly chunk_bytes
+
+    Headers are already on the wire once streaming starts, so a failure
+    part-way through is reported as a final ``error`` record.
+    """
+    buffer = bytearray()
+    try:
+        for record in records:
+            buffer += codec.dumps_bytes(record)
+            buffer += b'\n'
+            if len(buffer) >= chunk_bytes:
+                yield bytes(buffer)
+                buffer.clear()
+    except Exception as e:
+        logger.error(f"Error streaming response: {str(e)}")
+        buffer += codec.dumps_bytes({'error': str(e)}) + b'\n'
+    if buffer:
+        yield bytes(buffer)
+
+def wants_stream(query_params: Dict[str, str], request_headers: Dict[str, str]) -> bool:
+    """Whether the client asked for an NDJSON stream instead of a single JSON document"""
+    return (query_params.get('format') == 'ndjson'
+            or NDJSON_CONTENT_TYPE in request_headers.get('accept', ''))
+
+# OpenSearch client reused across requests in a warm container or server worker
+_opensearch_client = None
+
+def get_opensearch_client() -> OpenSearchClient:
+    """Return the shared OpenSearch client, creating it on first use"""
+    global _opensearch_client
+    if _opensearch_client is None:
+        _opensearch_client = OpenSearchClient()
+    return _opensearch_client
+
+def route_request(opensearch_client: OpenSearchClient, http_method: str, path: str,
+                  query_params: Optional[Dict[str, str]] = None,
+                  body: Optional[str] = None,
+                  headers: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    """Dispatch an API request and return a response dict with statusCode, headers and body
+
+    The body is bytes (compressed when the response carries a
+    Content-Encoding header), a str for bodiless and error responses, or an
+    iterator of bytes chunks for streamed NDJSON responses.
+
+    Shared by the Lambda adapter (handler.py) and the standalone HTTP server
+    (http_server.py), so both expose exactly the same routes. Requests sent
+    with ``X-Profile: 1`` (or sampled via PROFILE_SAMPLE_RATE) are profiled
+    when PROFILING_ENABLED is set; a streamed body is produced after
+    dispatch returns, so it gets a second report of its own.
+    """
+    request_headers = {name.lower(): value for name, value in (headers or {}).items()}
+    if should_profile(request_headers.get('x-profile') == '1'):
+        label = f"{http_method} {path}"
+        response = profile_call(label, _dispatch_request, opensearch_client,
+                                http_method, path, query_params, body, request_headers)
+        if not isinstance(response['body'], (str, bytes)):
+            response['body'] = ProfiledIterator(f"{label} (stream)", response['body'])
+        return response
+    return _dispatch_request(opensearch_client, http_method, path, query_params, body, request_headers)
+
+def _dispatch_request(opensearch_client: OpenSearchClient, http_method: str, path: str,
+                      query_params: Optional[Dict[str, str]], body: Optional[str],
+                      request_headers: Dict[str, str]) -> Dict[str, Any]:
+    try:
+        query_params = query_params or {}
+        response_headers = {
+            'Content-Type': 'application/json',
+            'Access-Control-Allow-Origin': '*',
+            'Access-Control-Allow-Methods': 'GET, POST, DELETE, OPTIONS',
+            'Access-Control-Allow-Headers': 'Content-Type, Authorization, Accept, If-None-Match, X-Profile',
+            'Access-Control-Expose-Headers': 'ETag'
+        }
+        
+        if body:
+            try:
+                body = codec.loads(body)
+            except json.JSONDecodeError:
+                body = {}
+        else:
+            body = {}
+        
+        # Route requests
+        status_code = None
+        cache_key = None
+        generation = None
+        if http_method == 'POST' and path == '/rules':
+            # Load rule, or queue it for write-behind indexing in async mode
+            if query_params.get('mode', INGEST_MODE) == 'async':
+                try:
+                    ingest_queue = get_ingest_queue()
+                except RuntimeError as e:
+                    result = {'success': False, 'error': str(e)}
+                else:
+                    result = enqueue_rule(opensearch_client, ingest_queue, body)
+                    status_code = 202
+            else:
+                result = load_rule(opensearch_client, body)
+        elif http_method == 'GET' and path == '/rules':
+            # List all rules, answering unchanged conditional requests without searching
+            since = query_params.get('since')
+            try:
+                fields = parse_fields(query_params.get('fields'))
+            except ValueError as e:
+                return bad_request_response(str(e), response_headers)
+            stream = wants_stream(query_params, request_headers)
+            limit = int(query_params['limit']) if 'limit' in query_params else (None if stream else 100)
+            generation = current_generation(opensearch_client)
+            etag = generation_etag(generation, NDJSON_CONTENT_TYPE if stream else 'json', limit, since, fields)
+            response_headers['ETag'] = etag
+            response_headers['Vary'] = 'Accept-Encoding'
+            if etag_matches(etag, request_headers.get('if-none-match')):
+                return {
+                    'statusCode': 304,
+                    'headers': response_headers,
+                    'body': ''
+                }
+            if stream:
+                return ndjson_response(stream_rules(opensearch_client, limit, since, generation, fields),
+                                       response_headers, request_headers)
+            cache_key = ('GET /rules', limit, since, fields)
+            cached = _response_cache.get(cache_key, generation) if _response_cache is not None else None
+            if cached:
+                return cached_json_response(cached, response_headers, request_headers)
+            result = list_all_rules(opensearch_client, limit, since, generation, fields)
+        elif http_method == 'POST' and path == '/rules/query':
+            # Query rules
+            query_text = body.get('query', '')
+            category = body.get('category')
+            limit = body.get('limit', 10)
+            mode = body.get('mode')
+            try:
+                fields = parse_fields(body.get('fields'))
+            except ValueError as e:
+                return bad_request_response(str(e), response_headers)
+            include_pinned = body.get('include_pinned', True) is not False
+            generation = current_generation(opensearch_client)
+            if _response_cache is not None:
+                cache_key = ('POST /rules/query', query_text, category, limit, mode, fields, include_pinned)
+                cached = _response_cache.get(cache_key, generation)
+                if cached:
+                    return cached_json_response(cached, response_headers, request_headers)
+            result = query_rules(opensearch_client, query_text, category, limit, mode, generation, fields,
+                                 include_pinned)
+        elif http_method == 'GET' and path == '/rules/export':
+            # Export one page of rules with embeddings, or every page as a stream
+            if wants_stream(query_params, request_headers):
+                return ndjson_response(
+                    stream_export(opensearch_client, int(query_params.get('limit', 200)),
+                                  query_params.get('dtype', 'float32')),
+                    response_headers,
+                    request_headers
+                )
+            result = export_rules(
+                opensearch_client,
+                query_params.get('after'),
+                int(query_params.get('limit', 200)),
+                query_params.get('dtype', 'float32')
+            )
+        elif http_method == 'POST' and path == '/rules/import':
+            # Import a page of exported rules without re-embedding
+            result = import_rules(opensearch_client, body)
+        elif http_method == 'GET' and path.startswith('/rules/') and path.endswith('/status'):
+            # Async ingestion status
+            result = get_ingest_status(opensearch_client, path[len('/rules/'):-len('/status')])
+        elif http_method == 'DELETE' and path.startswith('/rules/'):
+            # Delete rule
+            result = delete_rule(opensearch_client, path[len('/rules/'):])
+        else:
+            result = {
+                'success': False,
+                'error': f'Unsupported method/path: {http_method} {path}'
+            }
+        
+        if not result.get('success'):
+            status_code = 400
+        elif cache_key and _response_cache is not None:
+            cached = _response_cache.put(cache_key, generation, codec.dumps_bytes(result))
+            return cached_json_response(cached, response_headers, request_headers)
+        return encoded_response(status_code or 200, codec.dumps_bytes(result), response_headers, request_headers)
+        
+    except Exception as e:
+        logger.error(f"Request handling error: {str(e)}")
+        return internal_error_response()
+
+_response_cache = (ResponseCache(RESPONSE_CACHE_MAX_BYTES, SUPPORTED_ENCODINGS if RESPONSE_CACHE_PRECOMPRESS else ())
+                   if RESPONSE_CACHE_MAX_BYTES > 0 else None)
+
+def encoded_response(status_code: int, body: bytes, response_headers: Dict[str, str],
+                     request_headers: Dict[str, str], precompressed: Optional[Dict[str, bytes]] = None) -> Dict[str, Any]:
+    """JSON response compressed with the best coding the client's Accept-Encoding allows
+
+    ``precompressed`` holds ready-made bodies per coding (from the response
+    cache); other codings are compressed on the fly.
+    """
+    response_headers['Vary'] = 'Accept-Encoding'
+    encoding = negotiate_encoding(request_headers.get('accept-encoding'))
+    if encoding and len(body) >= COMPRESS_MIN_BYTES:
+        response_headers['Content-Encoding'] = encoding
+        body = (precompressed or {}).get(encoding) or compress(body, encoding)
+    return {
+        'statusCode': status_code,
+        'headers': response_headers,
+        'body': body
+    }
+
+def cached_json_response(cached: CachedResponse, response_headers: Dict[str, str],
+                         request_headers: Dict[str, str]) -> Dict[str, Any]:
+    """200 response from a cached body, using its pre-compressed copies"""
+    return encoded_response(200, cached.body, response_headers, request_headers, cached.encoded)
+
+def ndjson_response(records: Iterable[Dict[str, Any]], response_headers: Dict[str, str],
+                    request_headers: Dict[str, str]) -> Dict[str, Any]:
+    """200 response whose body streams records as NDJSON chunks, compressed as they are produced"""
+    response_headers['Content-Type'] = NDJSON_CONTENT_TYPE
+    response_headers['Vary'] = 'Accept-Encoding'
+    chunks = ndjson_chunks(records)
+    encoding = negotiate_encoding(request_headers.get('accept-encoding'))
+    if encoding:
+        response_headers['Content-Encoding'] = encoding
+        chunks = compress_chunks(chunks, encoding)
+    return {
+        'statusCode': 200,
+        'headers': response_headers,
+        'body': chunks
+    }
+
+def bad_request_response(error: str, response_headers: Dict[str, str]) -> Dict[str, Any]:
+    """400 response for a malformed request parameter"""
+    return {
+        'statusCode': 400,
+        'headers': response_headers,
+        'body': codec.dumps({
+            'success': False,
+            'error': error
+        })
+    }
+
+def internal_error_response() -> Dict[str, Any]:
+    """Generic 500 response that does not leak error details"""
+    return {
+        'statusCode': 500,
+        'headers': {
+            'Content-Type': 'application/json',
+            'Access-Control-Allow-Origin': '*'
+        },
+        'body': json.dumps({
+            'success': False,
+            'error': 'Internal server error'
+        })
+    }
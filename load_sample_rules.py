@@ -3,36 +3,44 @@
 Load sample governance rules into the RAG system
 """
 
-import json
 import sys
 import requests
 import time
 from pathlib import Path
 
+from rules_common import codec
+from rules_common.rule import Rule, RuleValidationError
+
 def load_rules_from_file(api_url: str, file_path: str):
     """Load rules from a JSON file"""
     try:
-        with open(file_path, 'r') as f:
-            rules = json.load(f)
+        with open(file_path, 'rb') as f:
+            entries = codec.loads(f.read())
         
-        print(f"📁 Loading {len(rules)} rules from {file_path}...")
+        print(f"📁 Loading {len(entries)} rules from {file_path}...")
         
-        for rule in rules:
+        for entry in entries:
+            try:
+                rule = Rule.from_input(entry)
+            except RuleValidationError as e:
+                print(f"  ❌ Skipping invalid rule {entry.get('title', '?') if isinstance(entry, dict) else entry!r}: {e}")
+                continue
+
             response = requests.post(
                 f"{api_url}/rules",
-                json=rule,
+                data=codec.dumps_bytes(rule.to_input()),
                 headers={"Content-Type": "application/json"},
                 timeout=30
             )
             
             if response.status_code == 200:
-                result = response.json()
+                result = codec.loads(response.content)
                 if result.get("success"):
-                    print(f"  ✅ Loaded: {rule['title']}")
+                    print(f"  ✅ Loaded: {rule.title}")
                 else:
-                    print(f"  ❌ Failed to load {rule['title']}: {result.get('error')}")
+                    print(f"  ❌ Failed to load {rule.title}: {result.get('error')}")
             else:
-                print(f"  ❌ HTTP {response.status_code} for {rule['title']}: {response.text}")
+                print(f"  ❌ HTTP {response.status_code} for {rule.title}: {response.text}")
             
             # Small delay to avoid overwhelming the API
             time.sleep(0.5)
@@ -71,12 +79,12 @@ def main():
         )
         
         if response.status_code == 200:
-            result = response.json()
+            result = codec.loads(response.content)
             if result.get("success"):
-                rules = result.get("rules", [])
+                rules = [Rule.from_document(rule) for rule in result.get("rules", [])]
                 print(f"Found {len(rules)} relevant rules for 'personal data privacy':")
                 for rule in rules[:3]:
-                    print(f"  • {rule.get('title')} (score: {rule.get('score', 0):.3f})")
+                    print(f"  • {rule.title} (score: {rule.score or 0:.3f})")
             else:
                 print(f"❌ Query failed: {result.get('error')}")
         else:
@@ -0,0 +1,131 @@
+"""
+Text rendering of governance rules for MCP tool output
+
+Each rule's text fragment is rendered once per rule version and cached
+under (style, rule_id, updated_at, fields): a rule only changes when it is
+rewritten, which always stamps a new updated_at. Tool output is assembled
+with a single join over cached fragments and capped at OUTPUT_MAX_CHARS.
+
+Kept free of MCP imports so benchmarks can load it on its own.
+"""
+
+import os
+import sys
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from rules_common.rule import Rule
+
+# Rendered fragments kept per server process
+RENDER_CACHE_SIZE = int(os.environ.get('RENDER_CACHE_SIZE', '4096'))
+# Longest tool output; further rules are summarised in a single line
+OUTPUT_MAX_CHARS = int(os.environ.get('OUTPUT_MAX_CHARS', '100000'))
+
+def _details(rule: Rule) -> str:
+    # Fields left out by a projection are None and not shown
+    lines = []
+    if rule.category is not None:
+        lines.append(f"   Category: {rule.category}\n")
+    if rule.priority is not None:
+        lines.append(f"   Priority: {rule.priority}\n")
+    if rule.description:
+        lines.append(f"   Description: {rule.description}\n")
+    if rule.rule_text is not None:
+        lines.append(f"   Rule: {rule.rule_text}\n")
+    if rule.tags:
+        lines.append(f"   Tags: {', '.join(rule.tags)}\n")
+    return "".join(lines)
+
+def render_query(rule: Rule, fields: Optional[Tuple[str, ...]]) -> str:
+    """Query result entry, without its number and score"""
+    return f"**{rule.title or rule.rule_id}**\n{_details(rule)}"
+
+def render_list(rule: Rule, fields: Optional[Tuple[str, ...]]) -> str:
+    """Rule list entry, without its number"""
+    text = f"**{rule.title or rule.rule_id}**\n   ID: {rule.rule_id}\n{_details(rule)}"
+    if not fields or "created_at" in fields:
+        text += f"   Created: {rule.created_at or 'N/A'}\n"
+    return text + "\n"
+
+def render_pinned(rule: Rule, fields: Optional[Tuple[str, ...]]) -> str:
+    """Pinned rule entry of a query result"""
+    text = f"- **{rule.title or rule.rule_id}**"
+    if rule.priority is not None:
+        text += f" (priority {rule.priority})"
+    text += "\n"
+    if rule.rule_text is not None:
+        text += f"  {rule.rule_text}\n"
+    return text
+
+def render_prompt(rule: Rule, fields: Optional[Tuple[str, ...]]) -> str:
+    """One line of the <rules> block added to an augmented prompt"""
+    return f"- {rule.title}: {rule.rule_text}\n"
+
+STYLES: Dict[str, Callable[[Rule, Optional[Tuple[str, ...]]], str]] = {
+    'query': render_query,
+    'list': render_list,
+    'pinned': render_pinned,
+    'prompt': render_prompt,
+}
+
+class RuleRenderer:
+    """LRU of rendered rule fragments
+
+    Only used from the MCP server's event loop, so it takes no lock.
+    """
+
+    def __init__(self, max_entries: int = RENDER_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._fragments: 'OrderedDict[Hashable, str]' = OrderedDict()
+
+    def fragment(self, style: str, doc: Dict[str, Any], fields: Optional[Tuple[str, ...]] = None) -> str:
+        """Fragment for a rule document from the API, rendered on first use of this rule version
+
+        ``fields`` is the projection the document was requested with, since
+        it decides which fields the fragment can show.
+        """
+        updated_at = doc.get('updated_at')
+        if updated_at is None:
+            # Nothing identifies the version, so the fragment cannot be reused
+            return STYLES[style](Rule.from_document(doc), fields)
+
+        key = (style, doc['rule_id'], updated_at, fields)
+        text = self._fragments.get(key)
+        if text is not None:
+            self._fragments.move_to_end(key)
+            return text
+
+        text = STYLES[style](Rule.from_document(doc), fields)
+        self._fragments[key] = text
+        if len(self._fragments) > self.max_entries:
+            self._fragments.popitem(last=False)
+        return text
+
+    def __len__(self) -> int:
+        return len(self._fragments)
+
+def assemble(header: str, entries: Sequence[Sequence[str]], footer: str = "",
+             max_chars: int = OUTPUT_MAX_CHARS) -> str:
+    """Join header, per-rule entries (each a sequence of pieces) and footer with a single join
+
+    Entries that would take the output past max_chars are replaced by a
+    single line saying how many were left out.
+    """
+    output = "".join([header, *(piece for entry in entries for piece in entry), footer])
+    if len(output) <= max_chars:
+        return output
+
+    pieces: List[str] = [header]
+    size = len(header) + len(footer)
+    for index, entry in enumerate(entries):
+        entry_size = sum(len(piece) for piece in entry)
+        if size + entry_size > max_chars:
+            pieces.append(f"... {len(entries) - index} more rules not shown "
+                          f"(output is capped at {max_chars} characters)\n")
+            break
+        pieces.extend(entry)
+        size += entry_size
+    pieces.append(footer)
+    return "".join(pieces)
@@ -9,11 +9,11 @@ This server provides tools for interacting with the governance rules API:
 """
 
 import asyncio
-import json
 import logging
 import os
 import sys
-from typing import Any, Dict, List, Optional
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
 import httpx
 from mcp.server import Server
 from mcp.server.stdio import stdio_server
@@ -25,17 +25,47 @@ from mcp.types import (
     Tool,
 )
 
+# Modules shared with the API and CLI live at the repository root
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from rules_common import codec
+from rules_common.compression import ACCEPT_ENCODING
+from rules_common.profiling import profile_call_async, should_profile
+from rules_common.rule import RULE_FIELDS, Rule, RuleValidationError
+from rendering import RuleRenderer, assemble
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Configuration
 API_GATEWAY_URL = os.environ.get('API_GATEWAY_URL', 'https://your-api-gateway-url.amazonaws.com/dev')
+# 'async' queues loaded rules for write-behind indexing instead of waiting for them
+INGEST_MODE = os.environ.get('INGEST_MODE', 'sync')
+
+# Optional projection accepted by the query and list tools
+FIELDS_SCHEMA = {
+    "type": "array",
+    "items": {"type": "string", "enum": list(RULE_FIELDS)},
+    "description": "Only return these rule fields (rule_id is always included); omit for complete rules"
+}
+# The augment tool only renders titles and rule text; updated_at keys the render cache
+AUGMENT_FIELDS = ("rule_text", "title", "updated_at")
+
+def request_fields(fields: Optional[List[str]]) -> Optional[Tuple[str, ...]]:
+    """Projection to ask the API for: the caller's fields plus updated_at for the render cache"""
+    if not fields:
+        return None
+    return tuple(sorted(set(fields) | {"updated_at"}))
 
 class GovernanceRulesServer:
     def __init__(self):
         self.server = Server("governance-rules")
-        self.http_client = httpx.AsyncClient(timeout=30.0)
+        # Ask for compressed responses; br is only advertised when brotli can decode it
+        self.http_client = httpx.AsyncClient(timeout=30.0, headers={"Accept-Encoding": ACCEPT_ENCODING})
+        # Last rendered rule list per limit and projection with its ETag, revalidated with If-None-Match
+        self._list_cache: Dict[Tuple[int, Optional[Tuple[str, ...]]], Tuple[str, str]] = {}
+        # Rendered text per rule version, shared by all tools
+        self.renderer = RuleRenderer()
         
         # Register handlers
         self.server.list_tools = self.list_tools
@@ -84,7 +114,7 @@ class GovernanceRulesServer:
             ),
             Tool(
                 name="query-governance-rules",
-                description="Query governance rules by context or topic using semantic search",
+                description="Query governance rules by context or topic using keyword, semantic or hybrid search",
                 inputSchema={
                     "type": "object",
                     "properties": {
@@ -100,6 +130,17 @@ class GovernanceRulesServer:
                             "type": "integer",
                             "description": "Maximum number of rules to return",
                             "default": 10
+                        },
+                        "mode": {
+                            "type": "string",
+                            "enum": ["lexical", "vector", "hybrid"],
+                            "description": "Force a retrieval mode instead of letting the query planner choose"
+                        },
+                        "fields": FIELDS_SCHEMA,
+                        "include_pinned": {
+                            "type": "boolean",
+                            "description": "Also return the pinned (always-applicable, high-priority) rules in scope",
+                            "default": True
                         }
                     },
                     "required": ["query"]
@@ -115,7 +156,8 @@ class GovernanceRulesServer:
                             "type": "integer",
                             "description": "Maximum number of rules to return",
                             "default": 100
-                        }
+                        },
+                        "fields": FIELDS_SCHEMA
                     }
                 }
             ),
@@ -141,57 +183,74 @@ class GovernanceRulesServer:
         ]
     
     async def call_tool(self, request: CallToolRequest) -> CallToolResult:
-        """Handle tool calls"""
+        """Handle tool calls
+
+        With PROFILING_ENABLED set, passing ``"_profile": true`` in the tool
+        arguments (or sampling via PROFILE_SAMPLE_RATE) profiles the call.
+        """
         try:
-            if request.params.name == "load-governance-rule":
-                return await self._load_governance_rule(request.params.arguments)
-            elif request.params.name == "query-governance-rules":
-                return await self._query_governance_rules(request.params.arguments)
-            elif request.params.name == "list-all-rules":
-                return await self._list_all_rules(request.params.arguments)
-            elif request.params.name == "augment-prompt-with-rules":
-                return await self._augment_prompt_with_rules(request.params.arguments)
-            else:
-                return CallToolResult(
-                    content=[TextContent(type="text", text=f"Unknown tool: {request.params.name}")]
+            arguments = dict(request.params.arguments or {})
+            if should_profile(bool(arguments.pop("_profile", False))):
+                return await profile_call_async(
+                    f"tool {request.params.name}", self._dispatch_tool, request.params.name, arguments
                 )
+            return await self._dispatch_tool(request.params.name, arguments)
         except Exception as e:
             logger.error(f"Error calling tool {request.params.name}: {str(e)}")
             return CallToolResult(
                 content=[TextContent(type="text", text=f"Error: {str(e)}")]
             )
     
+    async def _dispatch_tool(self, name: str, arguments: Dict[str, Any]) -> CallToolResult:
+        """Route a tool call to its implementation"""
+        if name == "load-governance-rule":
+            return await self._load_governance_rule(arguments)
+        elif name == "query-governance-rules":
+            return await self._query_governance_rules(arguments)
+        elif name == "list-all-rules":
+            return await self._list_all_rules(arguments)
+        elif name == "augment-prompt-with-rules":
+            return await self._augment_prompt_with_rules(arguments)
+        else:
+            return CallToolResult(
+                content=[TextContent(type="text", text=f"Unknown tool: {name}")]
+            )
+    
     async def _augment_prompt_with_rules(self, arguments: Dict[str, Any]) -> CallToolResult:
         """Augment a prompt with relevant governance rules"""
         try:
             prompt = arguments.get("prompt")
             limit = arguments.get("limit", 5)
             
-            query_data = {"query": prompt, "limit": limit}
+            query_data = {"query": prompt, "limit": limit, "fields": list(AUGMENT_FIELDS)}
             
             # Make API request to query rules
             response = await self.http_client.post(
                 f"{API_GATEWAY_URL}/rules/query",
-                json=query_data,
+                content=codec.dumps_bytes(query_data),
                 headers={"Content-Type": "application/json"}
             )
             
             augmented_prompt = f"Original prompt: {prompt}\n\n"
 
             if response.status_code == 200:
-                result = response.json()
-                if result.get("success") and result.get("rules"):
-                    rules = result["rules"]
-                    
-                    rules_text = "\n".join(
-                        f"- {rule.get('title', 'Untitled')}: {rule.get('rule_text', '')}"
-                        for rule in rules
-                    )
-                    
-                    augmented_prompt = (
+                result = codec.loads(response.content)
+                # Pinned rules apply to every prompt, so they go in the header and
+                # are never capped; contextual matches follow them
+                if result.get("success") and (result.get("pinned") or result.get("rules")):
+                    header = [
                         "Please adhere to the following rules when responding to the user's request:\n"
                         "<rules>\n"
-                        f"{rules_text}\n"
+                    ]
+                    header.extend(self.renderer.fragment("prompt", rule, AUGMENT_FIELDS)
+                                  for rule in result.get("pinned", []))
+                    entries = [
+                        (self.renderer.fragment("prompt", rule, AUGMENT_FIELDS),)
+                        for rule in result.get("rules", [])
+                    ]
+                    augmented_prompt = assemble(
+                        "".join(header),
+                        entries,
                         "</rules>\n\n"
                         f"User's request: {prompt}"
                     )
@@ -214,25 +273,34 @@ class GovernanceRulesServer:
     async def _load_governance_rule(self, arguments: Dict[str, Any]) -> CallToolResult:
         """Load a governance rule"""
         try:
-            # Prepare rule data
-            rule_data = {
-                "title": arguments.get("title"),
-                "description": arguments.get("description", ""),
-                "rule_text": arguments.get("rule_text"),
-                "category": arguments.get("category", "general"),
-                "priority": arguments.get("priority", 1),
-                "tags": arguments.get("tags", [])
-            }
+            # Validate once here; the API receives a well-formed rule
+            try:
+                rule = Rule.from_input(arguments)
+            except RuleValidationError as e:
+                return CallToolResult(
+                    content=[TextContent(type="text", text=f"❌ Invalid rule: {str(e)}")]
+                )
+            rule_data = rule.to_input()
             
             # Make API request
             response = await self.http_client.post(
                 f"{API_GATEWAY_URL}/rules",
-                json=rule_data,
+                params={"mode": INGEST_MODE},
+                content=codec.dumps_bytes(rule_data),
                 headers={"Content-Type": "application/json"}
             )
             
-            if response.status_code == 200:
-                result = response.json()
+            if response.status_code == 202:
+                result = codec.loads(response.content)
+                return CallToolResult(
+                    content=[TextContent(
+                        type="text",
+                        text=f"⏳ Queued governance rule '{rule_data['title']}' with ID: {result.get('rule_id')} "
+                             f"(status: {API_GATEWAY_URL}{result.get('status_url')})"
+                    )]
+                )
+            elif response.status_code == 200:
+                result = codec.loads(response.content)
                 if result.get("success"):
                     return CallToolResult(
                         content=[TextContent(
@@ -266,7 +334,10 @@ class GovernanceRulesServer:
             query_data = {
                 "query": arguments.get("query"),
                 "category": arguments.get("category"),
-                "limit": arguments.get("limit", 10)
+                "limit": arguments.get("limit", 10),
+                "mode": arguments.get("mode"),
+                "fields": request_fields(arguments.get("fields")),
+                "include_pinned": arguments.get("include_pinned")
             }
             
             # Remove None values
@@ -275,17 +346,19 @@ class GovernanceRulesServer:
             # Make API request
             response = await self.http_client.post(
                 f"{API_GATEWAY_URL}/rules/query",
-                json=query_data,
+                content=codec.dumps_bytes(query_data),
                 headers={"Content-Type": "application/json"}
             )
             
             if response.status_code == 200:
-                result = response.json()
+                result = codec.loads(response.content)
                 if result.get("success"):
                     rules = result.get("rules", [])
+                    pinned = result.get("pinned", [])
                     total = result.get("total", 0)
+                    fields = request_fields(arguments.get("fields"))
                     
-                    if not rules:
+                    if not rules and not pinned:
                         return CallToolResult(
                             content=[TextContent(
                                 type="text",
@@ -293,18 +366,21 @@ class GovernanceRulesServer:
                             )]
                         )
                     
-                    # Format results
-                    output = f"Found {len(rules)} governance rules (total: {total}):\n\n"
-                    for i, rule in enumerate(rules, 1):
-                        output += f"{i}. **{rule.get('title', 'Untitled')}**\n"
-                        output += f"   Category: {rule.get('category', 'N/A')}\n"
-                        output += f"   Priority: {rule.get('priority', 'N/A')}\n"
-                        if rule.get('description'):
-                            output += f"   Description: {rule['description']}\n"
-                        output += f"   Rule: {rule.get('rule_text', 'N/A')}\n"
-                        if rule.get('tags'):
-                            output += f"   Tags: {', '.join(rule['tags'])}\n"
-                        output += f"   Score: {rule.get('score', 'N/A'):.3f}\n\n"
+                    # Format results from cached per-rule fragments; pinned rules are never capped
+                    header = []
+                    if pinned:
+                        header.append(f"Pinned rules (always apply, {len(pinned)}):\n\n")
+                        header.extend(self.renderer.fragment("pinned", rule, fields) for rule in pinned)
+                        header.append("\n")
+                    header.append(f"Found {len(rules)} governance rules (total: {total}):\n\n")
+                    plan = result.get("plan")
+                    if plan:
+                        header.append(f"Retrieval: {plan['mode']} ({plan['reason']})\n\n")
+                    output = assemble("".join(header), [
+                        (f"{i}. ", self.renderer.fragment("query", rule, fields),
+                         f"   Score: {rule.get('score') or 0:.3f}\n\n")
+                        for i, rule in enumerate(rules, 1)
+                    ])
                     
                     return CallToolResult(
                         content=[TextContent(type="text", text=output)]
@@ -330,60 +406,73 @@ class GovernanceRulesServer:
             )
     
     async def _list_all_rules(self, arguments: Dict[str, Any]) -> CallToolResult:
-        """List all governance rules"""
+        """List all governance rules
+
+        The rule list is streamed as NDJSON and each line is turned into its
+        cached fragment as it arrives, so only the formatted text is held in
+        memory, never the parsed list.
+        """
         try:
             limit = arguments.get("limit", 100)
+            fields = request_fields(arguments.get("fields"))
+            params = {"limit": limit}
+            if fields:
+                params["fields"] = ",".join(fields)
             
-            # Make API request
-            response = await self.http_client.get(
-                f"{API_GATEWAY_URL}/rules?limit={limit}"
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                if result.get("success"):
-                    rules = result.get("rules", [])
-                    total = result.get("total", 0)
-                    
-                    if not rules:
-                        return CallToolResult(
-                            content=[TextContent(
-                                type="text",
-                                text="No governance rules found in the system."
-                            )]
-                        )
-                    
-                    # Format results
-                    output = f"All Governance Rules ({len(rules)} of {total}):\n\n"
-                    for i, rule in enumerate(rules, 1):
-                        output += f"{i}. **{rule.get('title', 'Untitled')}**\n"
-                        output += f"   ID: {rule.get('rule_id', 'N/A')}\n"
-                        output += f"   Category: {rule.get('category', 'N/A')}\n"
-                        output += f"   Priority: {rule.get('priority', 'N/A')}\n"
-                        if rule.get('description'):
-                            output += f"   Description: {rule['description']}\n"
-                        output += f"   Rule: {rule.get('rule_text', 'N/A')}\n"
-                        if rule.get('tags'):
-                            output += f"   Tags: {', '.join(rule['tags'])}\n"
-                        output += f"   Created: {rule.get('created_at', 'N/A')}\n\n"
-                    
-                    return CallToolResult(
-                        content=[TextContent(type="text", text=output)]
-                    )
-                else:
+            # Make a conditional API request so an unchanged rule set costs a 304
+            cached = self._list_cache.get((limit, fields))
+            headers = {"Accept": "application/x-ndjson"}
+            if cached:
+                headers["If-None-Match"] = cached[0]
+            async with self.http_client.stream(
+                "GET", f"{API_GATEWAY_URL}/rules", params=params, headers=headers
+            ) as response:
+                if response.status_code == 304 and cached:
+                    return CallToolResult(content=[TextContent(type="text", text=cached[1])])
+                if response.status_code != 200:
+                    await response.aread()
                     return CallToolResult(
                         content=[TextContent(
                             type="text",
-                            text=f"❌ Failed to list rules: {result.get('error', 'Unknown error')}"
+                            text=f"❌ API request failed with status {response.status_code}: {response.text}"
                         )]
                     )
-            else:
+
+                fragments = []
+                count = None
+                async for line in response.aiter_lines():
+                    if not line:
+                        continue
+                    record = codec.loads(line)
+                    if "error" in record:
+                        return CallToolResult(
+                            content=[TextContent(
+                                type="text",
+                                text=f"❌ Failed to list rules: {record['error']}"
+                            )]
+                        )
+                    if "done" in record:
+                        count = record["count"]
+                        continue
+                    fragments.append(self.renderer.fragment("list", record["rule"], fields))
+                etag = response.headers.get("etag")
+
+            if count is None:
                 return CallToolResult(
-                    content=[TextContent(
-                        type="text",
-                        text=f"❌ API request failed with status {response.status_code}: {response.text}"
-                    )]
+                    content=[TextContent(type="text", text="❌ Failed to list rules: stream ended early")]
                 )
+            if not fragments:
+                output = "No governance rules found in the system."
+            else:
+                output = assemble(f"All Governance Rules ({count}):\n\n", [
+                    (f"{i}. ", fragment) for i, fragment in enumerate(fragments, 1)
+                ])
+            if etag:
+                self._list_cache[(limit, fields)] = (etag, output)
+
+            return CallToolResult(
+                content=[TextContent(type="text", text=output)]
+            )
                 
         except Exception as e:
             return CallToolResult(
@@ -406,6 +495,12 @@ async def main():
         print("Usage: python server.py")
         print("\nEnvironment Variables:")
         print("  API_GATEWAY_URL - URL of the API Gateway endpoint")
+        print("  INGEST_MODE - 'sync' or 'async' (queue rules and return immediately)")
+        print("  OUTPUT_MAX_CHARS - Longest tool output before rules are left out (default: 100000)")
+        print("  RENDER_CACHE_SIZE - Rendered rule fragments kept in memory (default: 4096)")
+        print("  PROFILING_ENABLED - 'true' to allow profiling tool calls (default: false)")
+        print("  PROFILE_SAMPLE_RATE - Fraction of tool calls to profile (default: 0)")
+        print("  PROFILE_SINK - 'log' or a directory for profile reports (default: log)")
         return
     
     server = GovernanceRulesServer()
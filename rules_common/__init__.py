@@ -0,0 +1,3 @@
+"""
+Modules shared by the Lambda/HTTP API, the MCP server and the CLI tools
+"""
@@ -0,0 +1,57 @@
+"""
+JSON encoding shared by the API, MCP server and CLI tools
+
+Uses orjson when it is installed and falls back to the stdlib json module.
+Both paths encode embedding buffers (``array('f')``, NumPy arrays) and Rule
+objects directly, so vectors are never converted to float lists only to be
+serialized. With orjson and NumPy available, float32 buffers are written
+with their shortest float32 representation.
+"""
+
+import json
+from array import array
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+BACKEND = 'orjson' if orjson is not None else 'json'
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, array):
+        if orjson is not None and np is not None and obj.typecode == 'f':
+            return np.frombuffer(obj, dtype=np.float32)
+        return obj.tolist()
+    if hasattr(obj, 'to_dict'):
+        return obj.to_dict()
+    if hasattr(obj, 'tolist'):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+if orjson is not None:
+    def dumps_bytes(obj: Any) -> bytes:
+        """Serialize to UTF-8 JSON bytes"""
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_SERIALIZE_NUMPY)
+
+    def loads(data: Union[str, bytes]) -> Any:
+        """Parse JSON; raises json.JSONDecodeError (orjson's error subclasses it)"""
+        return orjson.loads(data)
+else:
+    def dumps_bytes(obj: Any) -> bytes:
+        """Serialize to UTF-8 JSON bytes"""
+        return json.dumps(obj, default=_default).encode()
+
+    def loads(data: Union[str, bytes]) -> Any:
+        """Parse JSON"""
+        return json.loads(data)
+
+def dumps(obj: Any) -> str:
+    """Serialize to a JSON string"""
+    return dumps_bytes(obj).decode()
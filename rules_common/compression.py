@@ -0,0 +1,86 @@
+"""
+HTTP response compression (Content-Encoding) shared by the API and its clients
+
+The API compresses responses with the best coding the client's
+Accept-Encoding allows: br when the brotli package is installed, otherwise
+gzip. Clients send ACCEPT_ENCODING, which only advertises codings they can
+decode (requests and httpx decode br once brotli is installed).
+"""
+
+import gzip
+import zlib
+from typing import Dict, Iterator, Optional
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+GZIP = 'gzip'
+BR = 'br'
+# Server preference when the client weighs several codings equally
+SUPPORTED_ENCODINGS = (BR, GZIP) if brotli is not None else (GZIP,)
+ACCEPT_ENCODING = ', '.join(SUPPORTED_ENCODINGS)
+
+# Fast settings suited to compressing every response on the request path
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+def parse_accept_encoding(header: str) -> Dict[str, float]:
+    """Map each coding in an Accept-Encoding header to its q-value"""
+    accepted = {}
+    for item in header.split(','):
+        coding, _, params = item.partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(';'):
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted['gzip' if coding == 'x-gzip' else coding] = q
+    return accepted
+
+def negotiate_encoding(header: Optional[str]) -> Optional[str]:
+    """Best supported coding the client accepts, or None to send the body as-is"""
+    if not header:
+        return None
+    accepted = parse_accept_encoding(header)
+    best, best_q = None, 0.0
+    for coding in SUPPORTED_ENCODINGS:
+        q = accepted.get(coding, accepted.get('*', 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+def compress(body: bytes, encoding: str) -> bytes:
+    """Compress a complete body"""
+    if encoding == BR:
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+def compress_chunks(chunks: Iterator[bytes], encoding: str) -> Iterator[bytes]:
+    """Compress a streamed body, flushing after each chunk so clients can decode as it arrives
+
+    Concatenated, the output is one valid gzip or brotli stream.
+    """
+    try:
+        if encoding == BR:
+            compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+            for chunk in chunks:
+                yield compressor.process(chunk) + compressor.flush()
+            yield compressor.finish()
+        else:
+            # wbits 31: deflate with a gzip header and trailer
+            compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+            for chunk in chunks:
+                yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+            yield compressor.flush()
+    finally:
+        close = getattr(chunks, 'close', None)
+        if close:
+            close()
@@ -0,0 +1,187 @@
+"""
+Opt-in per-request profiling
+
+Profiling is off unless PROFILING_ENABLED is true. A request is then
+profiled when the caller asks for it (X-Profile header on the API,
+``_profile`` tool argument in the MCP server) or when it is picked by
+PROFILE_SAMPLE_RATE. Profiled calls capture cProfile stats and the top
+tracemalloc allocations and write them to PROFILE_SINK:
+
+    log          one JSON log line per profiled call (default)
+    <directory>  a .prof file (pstats, e.g. for snakeviz) and a .txt report
+
+tracemalloc is process-wide: while profiled calls overlap, each report's
+allocations and peak include the others'. Unprofiled calls only pay for
+the ``should_profile`` check.
+"""
+
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import random
+import re
+import threading
+import time
+import tracemalloc
+from typing import Any, Awaitable, Callable, Iterable, Iterator, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', 'false').lower() == 'true'
+PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', '0'))
+PROFILE_SINK = os.environ.get('PROFILE_SINK', 'log')
+PROFILE_TOP_N = int(os.environ.get('PROFILE_TOP_N', '25'))
+
+def should_profile(requested: bool = False) -> bool:
+    """Decide whether to profile this call"""
+    if not PROFILING_ENABLED:
+        return False
+    return requested or (PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE)
+
+# Profiled calls in flight share one tracemalloc session: the first starts
+# tracing and the last stops it, unless something else was tracing already
+_tracing_lock = threading.Lock()
+_tracing_users = 0
+_tracing_owned = False
+
+def _acquire_tracing() -> None:
+    global _tracing_users, _tracing_owned
+    with _tracing_lock:
+        if _tracing_users == 0:
+            _tracing_owned = not tracemalloc.is_tracing()
+            if _tracing_owned:
+                tracemalloc.start()
+        _tracing_users += 1
+
+def _release_tracing() -> Optional[Tuple[tracemalloc.Snapshot, int]]:
+    """Snapshot and peak of the shared session, or None if tracing was stopped elsewhere"""
+    global _tracing_users
+    with _tracing_lock:
+        memory = None
+        if tracemalloc.is_tracing():
+            memory = (tracemalloc.take_snapshot(), tracemalloc.get_traced_memory()[1])
+        _tracing_users -= 1
+        if _tracing_users == 0 and _tracing_owned and tracemalloc.is_tracing():
+            tracemalloc.stop()
+    return memory
+
+def _start(enable: bool = True) -> Tuple[cProfile.Profile, float]:
+    profiler = cProfile.Profile()
+    _acquire_tracing()
+    if enable:
+        profiler.enable()
+    return profiler, time.perf_counter()
+
+def _finish(label: str, profiler: cProfile.Profile, start: float) -> None:
+    profiler.disable()
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    memory = _release_tracing()
+
+    try:
+        _write_report(label, profiler, memory, elapsed_ms)
+    except Exception as e:
+        logger.error(f"Could not write profile for {label}: {str(e)}")
+
+def _write_report(label: str, profiler: cProfile.Profile, memory: Optional[Tuple[tracemalloc.Snapshot, int]],
+                  elapsed_ms: float) -> None:
+    stats_text = io.StringIO()
+    profiler.create_stats()
+    # A stream closed before its first chunk has no CPU stats
+    if profiler.stats:
+        pstats.Stats(profiler, stream=stats_text).sort_stats('cumulative').print_stats(PROFILE_TOP_N)
+    allocations = []
+    peak_bytes = None
+    if memory:
+        snapshot, peak_bytes = memory
+        allocations = [
+            {'location': str(stat.traceback), 'size_kb': round(stat.size / 1024, 1), 'count': stat.count}
+            for stat in snapshot.statistics('lineno')[:PROFILE_TOP_N]
+        ]
+
+    if PROFILE_SINK == 'log':
+        report = {
+            'label': label,
+            'elapsed_ms': round(elapsed_ms, 2),
+            'cpu': stats_text.getvalue()
+        }
+        if memory:
+            report['peak_memory_kb'] = round(peak_bytes / 1024, 1)
+            report['allocations'] = allocations
+        logger.info("PROFILE " + json.dumps(report))
+        return
+
+    os.makedirs(PROFILE_SINK, exist_ok=True)
+    name = f"{time.strftime('%Y%m%dT%H%M%S')}-{re.sub(r'[^A-Za-z0-9]+', '_', label).strip('_')}"
+    base = os.path.join(PROFILE_SINK, name)
+    profiler.dump_stats(f"{base}.prof")
+    with open(f"{base}.txt", 'w') as report:
+        if memory:
+            report.write(f"{label}: {elapsed_ms:.2f} ms, peak traced memory {peak_bytes / 1024:.1f} KiB\n\n")
+        else:
+            report.write(f"{label}: {elapsed_ms:.2f} ms (memory not traced)\n\n")
+        report.write(stats_text.getvalue())
+        if memory:
+            report.write("\nTop allocations:\n")
+            for allocation in allocations:
+                report.write(f"  {allocation['location']}: {allocation['size_kb']} KiB in {allocation['count']} blocks\n")
+    logger.info(f"Wrote profile for {label} to {base}.prof")
+
+def profile_call(label: str, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """Run func under cProfile and tracemalloc and report the results"""
+    profiler, start = _start()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        _finish(label, profiler, start)
+
+async def profile_call_async(label: str, func: Callable[..., Awaitable[Any]], *args: Any, **kwargs: Any) -> Any:
+    """Async variant of profile_call; other tasks running meanwhile are included in the stats"""
+    profiler, start = _start()
+    try:
+        return await func(*args, **kwargs)
+    finally:
+        _finish(label, profiler, start)
+
+class ProfiledIterator:
+    """Profile the production of a streamed body chunk by chunk
+
+    Each ``next()`` runs under the profiler in whichever thread calls it, so
+    a body pulled from a thread pool is still covered. The report is written
+    once the body is exhausted or closed.
+    """
+
+    def __init__(self, label: str, chunks: Iterable[Any]):
+        self.label = label
+        self.chunks = chunks
+        self._iterator = iter(chunks)
+        self._profiler, self._start = _start(enable=False)
+        self._finished = False
+
+    def __iter__(self) -> Iterator[Any]:
+        return self
+
+    def __next__(self) -> Any:
+        if self._finished:
+            raise StopIteration
+        self._profiler.enable()
+        try:
+            return next(self._iterator)
+        except BaseException:
+            self.close()
+            raise
+        finally:
+            self._profiler.disable()
+
+    def close(self) -> None:
+        if self._finished:
+            return
+        self._finished = True
+        try:
+            close = getattr(self.chunks, 'close', None)
+            if close:
+                close()
+        finally:
+            _finish(self.label, self._profiler, self._start)
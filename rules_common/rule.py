@@ -0,0 +1,116 @@
+"""
+Typed governance rule shared by the API, MCP server and CLI tools
+
+Rules are validated once, where they enter the system (``Rule.from_input``
+for API requests, rule files and CLI arguments); documents read back from
+OpenSearch or the API are trusted (``Rule.from_document``). Embeddings are
+held as ``array('f')``: 4 bytes per value instead of a list slot plus a
+24-byte Python float.
+"""
+
+import hashlib
+from array import array
+from typing import Any, Dict, Iterable, Optional
+
+# Fields of a rule document, in the order they are serialized
+RULE_FIELDS = (
+    'rule_id', 'title', 'description', 'category', 'priority', 'tags',
+    'rule_text', 'generation', 'created_at', 'updated_at'
+)
+# Fields a client sends to POST /rules
+INPUT_FIELDS = ('title', 'rule_text', 'description', 'category', 'priority', 'tags')
+
+class RuleValidationError(ValueError):
+    """Input that does not describe a loadable rule"""
+
+def generate_rule_id(rule_text: str) -> str:
+    """Generate a unique rule ID based on rule content"""
+    return hashlib.md5(rule_text.encode()).hexdigest()[:12]
+
+def as_vector(values: Iterable[float]) -> array:
+    """Embedding as a compact float32 array (returned as-is if it already is one)"""
+    if isinstance(values, array) and values.typecode == 'f':
+        return values
+    return array('f', values)
+
+class Rule:
+    """A governance rule, optionally with its embedding and search score"""
+
+    __slots__ = RULE_FIELDS + ('embedding', 'score')
+
+    def __init__(self, title: str, rule_text: str, description: str = '', category: str = 'general',
+                 priority: int = 1, tags: Iterable[str] = (), rule_id: Optional[str] = None,
+                 generation: Optional[int] = None, created_at: Optional[str] = None,
+                 updated_at: Optional[str] = None, embedding: Optional[Iterable[float]] = None,
+                 score: Optional[float] = None):
+        self.rule_id = rule_id or generate_rule_id(rule_text)
+        self.title = title
+        self.description = description
+        self.category = category
+        self.priority = priority
+        self.tags = list(tags)
+        self.rule_text = rule_text
+        self.generation = generation
+        self.created_at = created_at
+        self.updated_at = updated_at
+        self.embedding = as_vector(embedding) if embedding is not None else None
+        self.score = score
+
+    @classmethod
+    def from_input(cls, data: Any) -> 'Rule':
+        """Validate client input (a POST /rules body or rule file entry)"""
+        if not isinstance(data, dict):
+            raise RuleValidationError('Rule must be a JSON object')
+        rule_text = data.get('rule_text')
+        if not rule_text or not isinstance(rule_text, str):
+            raise RuleValidationError('rule_text is required')
+        title = data.get('title')
+        if not title or not isinstance(title, str):
+            raise RuleValidationError('title is required')
+        priority = data.get('priority', 1)
+        if not isinstance(priority, int) or isinstance(priority, bool):
+            raise RuleValidationError('priority must be an integer')
+        tags = data.get('tags', [])
+        if not isinstance(tags, list) or not all(isinstance(tag, str) for tag in tags):
+            raise RuleValidationError('tags must be a list of strings')
+        description = data.get('description', '')
+        category = data.get('category', 'general')
+        if not isinstance(description, str) or not isinstance(category, str) or not category:
+            raise RuleValidationError('description and category must be strings')
+        return cls(title, rule_text, description, category, priority, tags)
+
+    @classmethod
+    def from_document(cls, source: Dict[str, Any]) -> 'Rule':
+        """Wrap a stored document or API result without re-validating it
+
+        Fields the document lacks, e.g. because the API was asked for a
+        ``fields`` projection, are left as None.
+        """
+        rule = cls.__new__(cls)
+        for name in cls.__slots__:
+            setattr(rule, name, source.get(name))
+        if rule.embedding is not None:
+            rule.embedding = as_vector(rule.embedding)
+        return rule
+
+    @property
+    def embedding_text(self) -> str:
+        """Text embedded for the rule"""
+        return f"{self.title} {self.description} {self.rule_text}"
+
+    def to_input(self) -> Dict[str, Any]:
+        """Body for POST /rules"""
+        return {name: getattr(self, name) for name in INPUT_FIELDS}
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Public representation, without the embedding"""
+        result = {name: getattr(self, name) for name in RULE_FIELDS if getattr(self, name) is not None}
+        if self.score is not None:
+            result['score'] = self.score
+        return result
+
+    def to_document(self) -> Dict[str, Any]:
+        """OpenSearch document, embedding included as a float32 array"""
+        doc = {name: getattr(self, name) for name in RULE_FIELDS}
+        doc['embedding'] = self.embedding
+        return doc
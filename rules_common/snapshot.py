@@ -0,0 +1,237 @@
+"""
+Binary snapshot format for governance rules
+
+A snapshot holds every rule's metadata plus its embedding, so an index can be
+backed up, seeded or shipped to edge consumers without re-running Bedrock.
+
+Layout (all integers little-endian):
+
+    [0, 8)              magic b"GRSNAP01"
+    [8, 12)             header length (uint32)
+    [12, HEADER_SIZE)   header JSON, space padded: count, dimension, dtype,
+                        embedding_model and the block offsets
+    [HEADER_SIZE, ...)  vector block: count x dimension values, row-major,
+                        float32 or float16
+    [metadata_offset, ...)  metadata table JSON: {"fields": [...], "rows": [[...], ...]}
+
+The vector block starts on a page boundary so consumers can ``mmap`` the file
+and view it as a ``(count, dimension)`` array without parsing anything.
+"""
+
+import base64
+import json
+import mmap
+import struct
+import sys
+from array import array
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+MAGIC = b"GRSNAP01"
+HEADER_SIZE = 4096
+FORMAT_VERSION = 1
+
+# struct codes for the supported vector dtypes
+DTYPES = {'float32': 'f', 'float16': 'e'}
+
+# Rule fields stored in the metadata table, in column order
+METADATA_FIELDS = [
+    'rule_id', 'title', 'description', 'category', 'priority', 'tags',
+    'rule_text', 'created_at', 'updated_at'
+]
+
+def _check_dtype(dtype: str) -> str:
+    if dtype not in DTYPES:
+        raise ValueError(f"Unsupported vector dtype: {dtype} (expected one of {', '.join(DTYPES)})")
+    return DTYPES[dtype]
+
+def pack_vectors(vectors: Sequence[Sequence[float]], dtype: str = 'float32') -> bytes:
+    """Pack embeddings into a contiguous little-endian block"""
+    code = _check_dtype(dtype)
+    if dtype == 'float32':
+        # array('f') rows are copied as raw buffers, other sequences converted once
+        flat = array('f')
+        for vector in vectors:
+            if isinstance(vector, array) and vector.typecode == 'f':
+                flat.extend(vector)
+            else:
+                flat.fromlist(list(vector))
+        if sys.byteorder != 'little':
+            flat.byteswap()
+        return flat.tobytes()
+    flat = [value for vector in vectors for value in vector]
+    return struct.pack(f"<{len(flat)}{code}", *flat)
+
+def unpack_vectors(data: bytes, dimension: int, dtype: str = 'float32') -> List[array]:
+    """Unpack a contiguous vector block into one array('f') per rule"""
+    code = _check_dtype(dtype)
+    if dtype == 'float32':
+        flat = array('f')
+        flat.frombytes(data)
+        if sys.byteorder != 'little':
+            flat.byteswap()
+    else:
+        flat = array('f', struct.unpack(f"<{len(data) // struct.calcsize(code)}{code}", data))
+    return [flat[i:i + dimension] for i in range(0, len(flat), dimension)]
+
+def encode_vectors(vectors: Sequence[Sequence[float]], dtype: str = 'float32') -> str:
+    """Base64 vector block used by the export/import API pages"""
+    return base64.b64encode(pack_vectors(vectors, dtype)).decode('ascii')
+
+def decode_vectors(data: str, dimension: int, dtype: str = 'float32') -> List[array]:
+    return unpack_vectors(base64.b64decode(data), dimension, dtype)
+
+class SnapshotWriter:
+    """Write a snapshot incrementally, one page of rules at a time"""
+
+    def __init__(self, path: str, dimension: int, dtype: str = 'float32',
+                 embedding_model: Optional[str] = None, **header_fields: Any):
+        _check_dtype(dtype)
+        self.path = path
+        self.dimension = dimension
+        self.dtype = dtype
+        self.embedding_model = embedding_model
+        self.header_fields = header_fields
+        self.rows: List[List[Any]] = []
+        self.file = open(path, 'wb')
+        self.file.seek(HEADER_SIZE)
+
+    def add(self, rules: Sequence[Dict[str, Any]], vector_block: bytes) -> None:
+        """Append rules and their packed vectors (see pack_vectors)"""
+        expected = len(rules) * self.dimension * struct.calcsize(DTYPES[self.dtype])
+        if len(vector_block) != expected:
+            raise ValueError(f"Vector block is {len(vector_block)} bytes, expected {expected}")
+        self.file.write(vector_block)
+        self.rows.extend([rule.get(field) for field in METADATA_FIELDS] for rule in rules)
+
+    def close(self) -> Dict[str, Any]:
+        metadata_offset = self.file.tell()
+        metadata = json.dumps({'fields': METADATA_FIELDS, 'rows': self.rows}, separators=(',', ':')).encode()
+        self.file.write(metadata)
+
+        header = {
+            'version': FORMAT_VERSION,
+            'count': len(self.rows),
+            'dimension': self.dimension,
+            'dtype': self.dtype,
+            'embedding_model': self.embedding_model,
+            'vectors_offset': HEADER_SIZE,
+            'metadata_offset': metadata_offset,
+            'metadata_length': len(metadata),
+            **self.header_fields
+        }
+        header_bytes = json.dumps(header, separators=(',', ':')).encode()
+        if len(header_bytes) > HEADER_SIZE - 12:
+            raise ValueError("Snapshot header too large")
+        self.file.seek(0)
+        self.file.write(MAGIC + struct.pack('<I', len(header_bytes)) + header_bytes.ljust(HEADER_SIZE - 12))
+        self.file.close()
+        return header
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.file.close()
+
+class Snapshot:
+    """Read-only, memory-mapped view of a snapshot file
+
+    ``vectors`` is a zero-copy NumPy array when NumPy is installed, otherwise a
+    flat ``memoryview`` over the mapped block (raw bytes for float16, which
+    memoryview cannot cast; use ``vector()`` instead). Being views into the
+    mapping, they must be released (or copied) before the snapshot is closed.
+    The metadata table is only parsed when ``rules`` is first accessed.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'rb')
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[:8] != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a governance rules snapshot")
+        (header_length,) = struct.unpack_from('<I', self._mmap, 8)
+        self.header: Dict[str, Any] = json.loads(self._mmap[12:12 + header_length])
+        self.count: int = self.header['count']
+        self.dimension: int = self.header['dimension']
+        self.dtype: str = self.header['dtype']
+        # None for snapshots written before the model was recorded
+        self.embedding_model: Optional[str] = self.header.get('embedding_model')
+        self._rules: Optional[List[Dict[str, Any]]] = None
+
+    @property
+    def vectors(self):
+        offset = self.header['vectors_offset']
+        length = self.count * self.dimension * struct.calcsize(DTYPES[self.dtype])
+        try:
+            import numpy as np
+        except ImportError:
+            view = memoryview(self._mmap)[offset:offset + length]
+            return view.cast('f') if self.dtype == 'float32' else view
+        return np.frombuffer(
+            self._mmap, dtype=np.dtype(self.dtype).newbyteorder('<'),
+            count=self.count * self.dimension, offset=offset
+        ).reshape(self.count, self.dimension)
+
+    def vector(self, index: int) -> List[float]:
+        """Embedding of the rule at ``index`` as a list of floats"""
+        code = DTYPES[self.dtype]
+        offset = self.header['vectors_offset'] + index * self.dimension * struct.calcsize(code)
+        return list(struct.unpack_from(f"<{self.dimension}{code}", self._mmap, offset))
+
+    def vector_block(self, start: int, stop: int) -> bytes:
+        """Raw packed vectors for rules [start, stop)"""
+        row_bytes = self.dimension * struct.calcsize(DTYPES[self.dtype])
+        offset = self.header['vectors_offset']
+        return self._mmap[offset + start * row_bytes:offset + stop * row_bytes]
+
+    @property
+    def rules(self) -> List[Dict[str, Any]]:
+        if self._rules is None:
+            start = self.header['metadata_offset']
+            table = json.loads(self._mmap[start:start + self.header['metadata_length']])
+            self._rules = [dict(zip(table['fields'], row)) for row in table['rows']]
+        return self._rules
+
+    def batches(self, batch_size: int) -> Iterator[Tuple[List[Dict[str, Any]], bytes]]:
+        """Yield (rules, packed vectors) in batches, e.g. for import"""
+        for start in range(0, self.count, batch_size):
+            stop = min(start + batch_size, self.count)
+            yield self.rules[start:stop], self.vector_block(start, stop)
+
+    def search(self, query_vector: Sequence[float], k: int = 10) -> List[Tuple[Dict[str, Any], float]]:
+        """Exact cosine-similarity top-k over the mapped vectors (requires NumPy)"""
+        import numpy as np
+
+        vectors = self.vectors.astype(np.float32, copy=False)
+        query = np.asarray(query_vector, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1) * np.linalg.norm(query)
+        scores = (vectors @ query) / np.where(norms == 0, 1, norms)
+        k = min(k, self.count)
+        top = np.argpartition(-scores, k - 1)[:k] if k else []
+        top = sorted(top, key=lambda i: -scores[i])
+        return [(self.rules[i], float(scores[i])) for i in top]
+
+    def close(self) -> None:
+        try:
+            self._mmap.close()
+        except BufferError:
+            raise BufferError(f"{self.path} is still referenced by a vectors view; "
+                              "delete it or take a copy before closing the snapshot") from None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self.close()
+        except BufferError:
+            # Do not hide the exception that ended the block; the views
+            # still referencing the mapping keep it open until they go
+            if exc_type is None:
+                raise
+            self._file.close()
@@ -0,0 +1,20 @@
+"""
+Timing helpers shared by the benchmarks and operator tools
+"""
+
+import time
+from typing import Any, Callable, Sequence
+
+def percentile(samples: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile of the samples (pct in 0-100)"""
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+def best_of(repeats: int, fn: Callable[[], Any]) -> float:
+    """Fastest of ``repeats`` calls to fn, in milliseconds"""
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
@@ -7,6 +7,9 @@ resource "aws_api_gateway_rest_api" "governance_rules_api" {
     types = ["REGIONAL"]
   }
 
+  # Lets the Lambda return pre-compressed (base64-encoded) response bodies
+  binary_media_types = ["*/*"]
+
   tags = local.common_tags
 }
 
@@ -24,6 +27,34 @@ resource "aws_api_gateway_resource" "rules_query" {
   path_part   = "query"
 }
 
+# API Gateway Resource - /rules/export
+resource "aws_api_gateway_resource" "rules_export" {
+  rest_api_id = aws_api_gateway_rest_api.governance_rules_api.id
+  parent_id   = aws_api_gateway_resource.rules.id
+  path_part   = "export"
+}
+
+# API Gateway Resource - /rules/import
+resource "aws_api_gateway_resource" "rules_import" {
+  rest_api_id = aws_api_gateway_rest_api.governance_rules_api.id
+  parent_id   = aws_api_gateway_resource.rules.id
+  path_part   = "import"
+}
+
+# API Gateway Resource - /rules/{rule_id}
+resource "aws_api_gateway_resource" "rule_item" {
+  rest_api_id = aws_api_gateway_rest_api.governance_rules_api.id
+  parent_id   = aws_api_gateway_resource.rules.id
+  path_part   = "{rule_id}"
+}
+
+# API Gateway Resource - /rules/{rule_id}/status
+resource "aws_api_gateway_resource" "rule_item_status" {
+  rest_api_id = aws_api_gateway_rest_api.governance_rules_api.id
+  parent_id   = aws_api_gateway_resource.rule_item.id
+  path_part   = "status"
+}
+
 # POST method for /rules (load rules)
 resource "aws_api_gateway_method" "rules_post" {
   rest_api_id   = aws_api_gateway_rest_api.governance_rules_api.id
@@ -48,6 +79,38 @@ resource "aws_api_gateway_method" "rules_query_post" {
   authorization = "NONE"
 }
 
+# GET method for /rules/export (export rules with embeddings)
+resource "aws_api_gateway_method" "rules_export_get" {
+  rest_api_id   = aws_api_gateway_rest_api.governance_rules_api.id
+  resource_id   = aws_api_gateway_resource.rules_export.id
+  http_method   = "GET"
+  authorization = "NONE"
+}
+
+# POST method for /rules/import (bulk import exported rules)
+resource "aws_api_gateway_method" "rules_import_post" {
+  rest_api_id   = aws_api_gateway_rest_api.governance_rules_api.id
+  resource_id   = aws_api_gateway_resource.rules_import.id
+  http_method   = "POST"
+  authorization = "NONE"
+}
+
+# DELETE method for /rules/{rule_id} (delete rule)
+resource "aws_api_gateway_method" "rule_item_delete" {
+  rest_api_id   = aws_api_gateway_rest_api.governance_rules_api.id
+  resource_id   = aws_api_gateway_resource.rule_item.id
+  http_method   = "DELETE"
+  authorization = "NONE"
+}
+
+# GET method for /rules/{rule_id}/status (async ingestion status)
+resource "aws_api_gateway_method" "rule_item_status_get" {
+  rest_api_id   = aws_api_gateway_rest_api.governance_rules_api.id
+  resource_id   = aws_api_gateway_resource.rule_item_status.id
+  http_method   = "GET"
+  authorization = "NONE"
+}
+
 # Integration for POST /rules
 resource "aws_api_gateway_integration" "rules_post_integration" {
   rest_api_id = aws_api_gateway_rest_api.governance_rules_api.id
@@ -81,12 +144,60 @@ resource "aws_api_gateway_integration" "rules_query_post_integration" {
   uri                    = aws_lambda_function.governance_rules_handler.invoke_arn
 }
 
+# Integration for GET /rules/export
+resource "aws_api_gateway_integration" "rules_export_get_integration" {
+  rest_api_id = aws_api_gateway_rest_api.governance_rules_api.id
+  resource_id = aws_api_gateway_resource.rules_export.id
+  http_method = aws_api_gateway_method.rules_export_get.http_method
+
+  integration_http_method = "POST"
+  type                   = "AWS_PROXY"
+  uri                    = aws_lambda_function.governance_rules_handler.invoke_arn
+}
+
+# Integration for POST /rules/import
+resource "aws_api_gateway_integration" "rules_import_post_integration" {
+  rest_api_id = aws_api_gateway_rest_api.governance_rules_api.id
+  resource_id = aws_api_gateway_resource.rules_import.id
+  http_method = aws_api_gateway_method.rules_import_post.http_method
+
+  integration_http_method = "POST"
+  type                   = "AWS_PROXY"
+  uri                    = aws_lambda_function.governance_rules_handler.invoke_arn
+}
+
+# Integration for DELETE /rules/{rule_id}
+resource "aws_api_gateway_integration" "rule_item_delete_integration" {
+  rest_api_id = aws_api_gateway_rest_api.governance_rules_api.id
+  resource_id = aws_api_gateway_resource.rule_item.id
+  http_method = aws_api_gateway_method.rule_item_delete.http_method
+
+  integration_http_method = "POST"
+  type                   = "AWS_PROXY"
+  uri                    = aws_lambda_function.governance_rules_handler.invoke_arn
+}
+
+# Integration for GET /rules/{rule_id}/status
+resource "aws_api_gateway_integration" "rule_item_status_get_integration" {
+  rest_api_id = aws_api_gateway_rest_api.governance_rules_api.id
+  resource_id = aws_api_gateway_resource.rule_item_status.id
+  http_method = aws_api_gateway_method.rule_item_status_get.http_method
+
+  integration_http_method = "POST"
+  type                   = "AWS_PROXY"
+  uri                    = aws_lambda_function.governance_rules_handler.invoke_arn
+}
+
 # API Gateway Deployment
 resource "aws_api_gateway_deployment" "governance_rules_deployment" {
   depends_on = [
     aws_api_gateway_integration.rules_post_integration,
     aws_api_gateway_integration.rules_get_integration,
     aws_api_gateway_integration.rules_query_post_integration,
+    aws_api_gateway_integration.rule_item_delete_integration,
+    aws_api_gateway_integration.rules_export_get_integration,
+    aws_api_gateway_integration.rules_import_post_integration,
+    aws_api_gateway_integration.rule_item_status_get_integration,
   ]
 
   rest_api_id = aws_api_gateway_rest_api.governance_rules_api.id
@@ -136,8 +247,8 @@ resource "aws_api_gateway_integration_response" "rules_options_integration_respo
   status_code = aws_api_gateway_method_response.rules_options_200.status_code
 
   response_parameters = {
-    "method.response.header.Access-Control-Allow-Headers" = "'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token'"
-    "method.response.header.Access-Control-Allow-Methods" = "'GET,OPTIONS,POST,PUT'"
+    "method.response.header.Access-Control-Allow-Headers" = "'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token,If-None-Match,X-Profile'"
+    "method.response.header.Access-Control-Allow-Methods" = "'GET,OPTIONS,POST,PUT,DELETE'"
     "method.response.header.Access-Control-Allow-Origin"  = "'*'"
   }
 }
@@ -49,6 +49,16 @@ resource "aws_iam_role_policy" "lambda_opensearch_policy" {
           "bedrock:InvokeModel"
         ]
         Resource = "*"
+      },
+      {
+        Effect = "Allow"
+        Action = [
+          "sqs:SendMessage",
+          "sqs:ReceiveMessage",
+          "sqs:DeleteMessage",
+          "sqs:GetQueueAttributes"
+        ]
+        Resource = aws_sqs_queue.rule_ingest.arn
       }
     ]
   })
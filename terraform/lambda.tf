@@ -8,10 +8,53 @@ resource "aws_lambda_function" "governance_rules_handler" {
   timeout         = 30
   memory_size     = 512
 
+  environment {
+    variables = {
+      OPENSEARCH_ENDPOINT      = aws_opensearch_domain.governance_rules.endpoint
+      INDEX_NAME               = "governance-rules"
+      INDEX_SHARDS             = tostring(var.index_shards)
+      INDEX_REPLICAS           = tostring(var.index_replicas)
+      PARTITION_MODE           = var.partition_mode
+      PARTITION_SETTINGS       = jsonencode(var.partition_settings)
+      PROFILING_ENABLED        = tostring(var.profiling_enabled)
+      PROFILE_SAMPLE_RATE      = tostring(var.profile_sample_rate)
+      PROFILE_SINK             = "log"
+      INGEST_MODE              = var.ingest_mode
+      INGEST_QUEUE_URL         = aws_sqs_queue.rule_ingest.url
+      RESPONSE_CACHE_MAX_BYTES = tostring(var.response_cache_max_bytes)
+      EMBEDDING_MODEL_ID       = var.embedding_model_id
+      EMBEDDING_DIMENSION      = tostring(var.embedding_dimension)
+    }
+  }
+
+  depends_on = [
+    aws_iam_role_policy_attachment.lambda_basic,
+    aws_iam_role_policy.lambda_opensearch_policy,
+  ]
+
+  tags = local.common_tags
+}
+
+# Ingestion worker: drains queued rules in micro-batches (POST /rules in async mode)
+resource "aws_lambda_function" "rule_ingest_worker" {
+  filename         = "../lambda/governance_rules_handler.zip"
+  function_name    = "${local.name_prefix}-rule-ingest-worker"
+  role            = aws_iam_role.lambda_role.arn
+  handler         = "handler.sqs_handler"
+  runtime         = "python3.11"
+  timeout         = 60
+  memory_size     = 512
+
   environment {
     variables = {
       OPENSEARCH_ENDPOINT = aws_opensearch_domain.governance_rules.endpoint
-      INDEX_NAME         = "governance-rules"
+      INDEX_NAME          = "governance-rules"
+      INDEX_SHARDS        = tostring(var.index_shards)
+      INDEX_REPLICAS      = tostring(var.index_replicas)
+      PARTITION_MODE      = var.partition_mode
+      PARTITION_SETTINGS  = jsonencode(var.partition_settings)
+      EMBEDDING_MODEL_ID  = var.embedding_model_id
+      EMBEDDING_DIMENSION = tostring(var.embedding_dimension)
     }
   }
 
@@ -23,6 +66,14 @@ resource "aws_lambda_function" "governance_rules_handler" {
   tags = local.common_tags
 }
 
+resource "aws_lambda_event_source_mapping" "rule_ingest" {
+  event_source_arn                   = aws_sqs_queue.rule_ingest.arn
+  function_name                      = aws_lambda_function.rule_ingest_worker.arn
+  batch_size                         = var.ingest_batch_size
+  maximum_batching_window_in_seconds = var.ingest_max_wait_seconds
+  function_response_types            = ["ReportBatchItemFailures"]
+}
+
 # Lambda permission for API Gateway
 resource "aws_lambda_permission" "api_gateway_invoke" {
   statement_id  = "AllowExecutionFromAPIGateway"
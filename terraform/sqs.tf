@@ -0,0 +1,22 @@
+# Queue for write-behind rule ingestion
+resource "aws_sqs_queue" "rule_ingest" {
+  name                       = "${local.name_prefix}-rule-ingest"
+  # Must exceed the worker Lambda timeout
+  visibility_timeout_seconds = 180
+  message_retention_seconds  = 345600
+
+  redrive_policy = jsonencode({
+    deadLetterTargetArn = aws_sqs_queue.rule_ingest_dlq.arn
+    maxReceiveCount     = 5
+  })
+
+  tags = local.common_tags
+}
+
+# Rules that repeatedly fail to index
+resource "aws_sqs_queue" "rule_ingest_dlq" {
+  name                      = "${local.name_prefix}-rule-ingest-dlq"
+  message_retention_seconds = 1209600
+
+  tags = local.common_tags
+}
@@ -27,3 +27,88 @@ variable "opensearch_volume_size" {
   type        = number
   default     = 20
 }
+
+variable "partition_mode" {
+  description = "Rule index partitioning: none, index (one index per category behind an alias) or routing (shard routing by category)"
+  type        = string
+  default     = "none"
+
+  validation {
+    condition     = contains(["none", "index", "routing"], var.partition_mode)
+    error_message = "partition_mode must be one of: none, index, routing."
+  }
+}
+
+variable "index_shards" {
+  description = "Primary shard count for the rules index (and default for each partition index)"
+  type        = number
+  default     = 1
+}
+
+variable "index_replicas" {
+  description = "Replica count for the rules index (and default for each partition index)"
+  type        = number
+  default     = 0
+}
+
+variable "partition_settings" {
+  description = "Per-category shard/replica overrides used when partition_mode is index"
+  type = map(object({
+    shards   = number
+    replicas = number
+  }))
+  default = {}
+}
+
+variable "profiling_enabled" {
+  description = "Allow cProfile/tracemalloc profiling of API requests (X-Profile: 1 and sampling); keep false in production"
+  type        = bool
+  default     = false
+}
+
+variable "profile_sample_rate" {
+  description = "Fraction of API requests profiled when profiling_enabled is true (0 profiles only X-Profile: 1 requests)"
+  type        = number
+  default     = 0
+}
+
+variable "ingest_mode" {
+  description = "Default for POST /rules: sync (embed and index in the request) or async (queue and return 202)"
+  type        = string
+  default     = "sync"
+
+  validation {
+    condition     = contains(["sync", "async"], var.ingest_mode)
+    error_message = "ingest_mode must be sync or async."
+  }
+}
+
+variable "ingest_batch_size" {
+  description = "Maximum queued rules indexed per ingestion worker invocation"
+  type        = number
+  default     = 25
+}
+
+variable "ingest_max_wait_seconds" {
+  description = "Maximum time SQS buffers queued rules before invoking the ingestion worker"
+  type        = number
+  default     = 2
+}
+
+variable "response_cache_max_bytes" {
+  description = "Memory cap for cached list/query responses per Lambda container (0 disables the cache)"
+  type        = number
+  default     = 33554432
+}
+
+variable "embedding_model_id" {
+  description = "Bedrock embedding model used for rules and queries (re-embed existing rules with tools/migrate_embeddings.py when changing it)"
+  type        = string
+  default     = "amazon.titan-embed-text-v1"
+}
+
+variable "embedding_dimension" {
+  description = "Embedding vector size; must match the model (1536 for Titan v1; 256, 512 or 1024 for Titan v2)"
+  type        = number
+  default     = 1536
+}
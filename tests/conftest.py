@@ -0,0 +1,117 @@
+"""Shared setup for the offline unit tests: import paths, configuration and an in-memory OpenSearch"""
+
+import os
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+# "lambda" is a keyword, so its modules are imported from the directory
+sys.path.insert(0, str(ROOT / 'lambda'))
+
+# rules_api reads its configuration at import time
+os.environ.setdefault('OPENSEARCH_ENDPOINT', 'localhost')
+os.environ.setdefault('INDEX_NAME', 'governance-rules-test')
+os.environ.setdefault('AWS_REGION', 'us-east-1')
+
+def _matches(source, clause):
+    (kind, spec), = clause.items()
+    if kind == 'term':
+        (field, value), = spec.items()
+        return source.get(field) == value
+    if kind == 'terms':
+        (field, values), = spec.items()
+        return source.get(field) in values
+    if kind == 'range':
+        (field, bounds), = spec.items()
+        value = source.get(field)
+        if value is None:
+            return False
+        return all({'gte': value >= bound, 'gt': value > bound, 'lte': value <= bound, 'lt': value < bound}[op]
+                   for op, bound in bounds.items())
+    if kind == 'match_all':
+        return True
+    if kind == 'bool':
+        return all(_matches(source, inner) for inner in spec.get('filter', []))
+    raise NotImplementedError(kind)
+
+class FakeOpenSearch:
+    """Just enough of the OpenSearch client for the generation counter, change-feed searches and catch-up passes
+
+    Documents are held per index name; sorts support the change-feed order
+    (generation with missing first, then rule_id) and search_after paging.
+    The generation update scripts are emulated by matching rules_api's own
+    script sources.
+    """
+
+    def __init__(self, rules_api):
+        self.rules_api = rules_api
+        self.docs = {}
+        self.indices = SimpleNamespace(refresh=lambda index: None)
+
+    def put(self, index, doc_id, source):
+        self.docs.setdefault(index, {})[doc_id] = dict(source)
+
+    def get(self, index, id):
+        from opensearchpy.exceptions import NotFoundError
+        try:
+            return {'_source': self.docs[index][id]}
+        except KeyError:
+            raise NotFoundError(404, 'not_found', {})
+
+    def update(self, index, id, body, **kwargs):
+        doc = self.docs.setdefault(index, {}).get(id)
+        if doc is None:
+            doc = self.docs[index][id] = dict(body['upsert'])
+            return {'get': {'_source': doc}}
+        script, params = body['script']['source'], body['script'].get('params', {})
+        if script == self.rules_api.BEGIN_WRITE_SCRIPT:
+            pending = doc.setdefault('pending', {})
+            for generation, opened_at in list(pending.items()):
+                if opened_at < params['now'] - params['timeout']:
+                    del pending[generation]
+            doc['generation'] += 1
+            pending[str(doc['generation'])] = params['now']
+        elif script == self.rules_api.END_WRITE_SCRIPT:
+            doc['generation'] += 1
+            doc.get('pending', {}).pop(params['generation'], None)
+        else:
+            doc['generation'] += 1
+        return {'get': {'_source': doc}}
+
+    def delete_by_query(self, index, body, **kwargs):
+        docs = self.docs.get(index, {})
+        matched = [doc_id for doc_id, source in docs.items() if _matches(source, body['query'])]
+        for doc_id in matched:
+            del docs[doc_id]
+        return {'deleted': len(matched)}
+
+    def search(self, index, body):
+        sources = [source for source in self.docs.get(index, {}).values()
+                   if _matches(source, body.get('query', {'match_all': {}}))]
+        # Ascending sorts only; a missing value sorts first
+        fields = [field for clause in body.get('sort', []) for field in clause]
+
+        def sort_values(source):
+            return [source.get(field) if source.get(field) is not None else -2 ** 63 for field in fields]
+
+        hits = sorted(({'_source': source, 'sort': sort_values(source)} for source in sources),
+                      key=lambda hit: hit['sort'])
+        if 'search_after' in body:
+            hits = [hit for hit in hits if hit['sort'] > list(body['search_after'])]
+        return {'hits': {'hits': hits[:body.get('size', 10)], 'total': {'value': len(hits)}}}
+
+@pytest.fixture
+def rules_api():
+    pytest.importorskip('boto3')
+    pytest.importorskip('opensearchpy')
+    import rules_api
+    return rules_api
+
+@pytest.fixture
+def opensearch(rules_api):
+    """rules_api client wrapper around an empty FakeOpenSearch"""
+    return SimpleNamespace(client=FakeOpenSearch(rules_api))
@@ -0,0 +1,100 @@
+"""Unit tests for the generation counter and the since-based change feed in lambda/rules_api.py"""
+
+def add_rule(rules_api, opensearch, rule_id, generation):
+    opensearch.client.put(rules_api.INDEX_NAME, rule_id, {
+        'rule_id': rule_id, 'title': rule_id, 'generation': generation, 'updated_at': '2024-01-01T00:00:00'
+    })
+
+def add_tombstone(rules_api, opensearch, rule_id, generation):
+    opensearch.client.put(rules_api.META_INDEX_NAME, rules_api.tombstone_id(rule_id), {
+        'type': 'tombstone', 'rule_id': rule_id, 'generation': generation, 'deleted_at': '2024-01-01T00:00:00'
+    })
+
+def poll_all(rules_api, opensearch, since, limit):
+    """Follow has_more like the CLI does; returns the rule IDs in delivery order and the final generation"""
+    delivered = []
+    while True:
+        page = rules_api.list_all_rules(opensearch, limit=limit, since=str(since))
+        assert page['success']
+        delivered += [rule['rule_id'] for rule in page['rules']]
+        delivered += [deleted['rule_id'] for deleted in page['deleted']]
+        since = page['generation']
+        if not page['has_more']:
+            return delivered, since
+
+def test_write_generations_close_in_any_order(rules_api, opensearch):
+    first = rules_api.begin_write(opensearch)
+    second = rules_api.begin_write(opensearch)
+    assert (first, second) == (1, 2)
+    assert rules_api.feed_generation(opensearch) == first
+
+    rules_api.end_write(opensearch, first)
+    assert rules_api.feed_generation(opensearch) == second
+    assert rules_api.end_write(opensearch, second) == 4
+    assert rules_api.feed_generation(opensearch) == rules_api.current_generation(opensearch) == 4
+
+def test_feed_does_not_skip_a_slow_concurrent_writer(rules_api, opensearch):
+    # Writer A opens a generation but its document is not visible yet
+    slow = rules_api.begin_write(opensearch)
+    # Writer B opens, writes and closes while A is still in flight
+    fast = rules_api.begin_write(opensearch)
+    add_rule(rules_api, opensearch, 'fast', fast)
+    rules_api.end_write(opensearch, fast)
+
+    page = rules_api.list_all_rules(opensearch, since='0')
+    assert [rule['rule_id'] for rule in page['rules']] == ['fast']
+    # The resume point stays at A's generation, not past B's closing bump
+    assert page['generation'] == slow
+
+    add_rule(rules_api, opensearch, 'slow', slow)
+    rules_api.end_write(opensearch, slow)
+
+    page = rules_api.list_all_rules(opensearch, since=str(page['generation']))
+    assert 'slow' in [rule['rule_id'] for rule in page['rules']]
+    assert page['generation'] == rules_api.current_generation(opensearch)
+
+def test_abandoned_write_stops_holding_back_the_feed(rules_api, opensearch, monkeypatch):
+    rules_api.begin_write(opensearch)
+    generation = rules_api.bump_generation(opensearch)
+    monkeypatch.setattr(rules_api, 'PENDING_WRITE_TIMEOUT_SECONDS', -1)
+    assert rules_api.feed_generation(opensearch) == generation
+
+def test_feed_pages_without_splitting_a_generation(rules_api, opensearch):
+    for generation in range(1, 8):
+        for n in range(3):
+            add_rule(rules_api, opensearch, f'g{generation}-{n}', generation)
+    add_tombstone(rules_api, opensearch, 'gone', 4)
+    opensearch.client.put(rules_api.META_INDEX_NAME, rules_api.GENERATION_DOC_ID,
+                          {'type': 'generation', 'generation': 8})
+
+    page = rules_api.list_all_rules(opensearch, limit=4, since='0')
+    assert page['has_more']
+    # Two whole generations; the first change left out starts the next poll
+    assert [rule['rule_id'] for rule in page['rules']] == [f'g{g}-{n}' for g in (1, 2) for n in range(3)]
+    assert page['generation'] == 3
+
+    delivered, since = poll_all(rules_api, opensearch, 0, limit=4)
+    assert sorted(delivered) == sorted([f'g{g}-{n}' for g in range(1, 8) for n in range(3)] + ['gone'])
+    assert len(delivered) == len(set(delivered))
+    assert since == 8
+
+def test_generation_larger_than_limit_is_returned_whole(rules_api, opensearch):
+    for n in range(5):
+        add_rule(rules_api, opensearch, f'batch-{n}', 1)
+    add_rule(rules_api, opensearch, 'later', 2)
+    opensearch.client.put(rules_api.META_INDEX_NAME, rules_api.GENERATION_DOC_ID,
+                          {'type': 'generation', 'generation': 3})
+
+    page = rules_api.list_all_rules(opensearch, limit=2, since='0')
+    assert len(page['rules']) == 5
+    assert page['has_more'] and page['generation'] == 2
+
+def test_stream_done_record_reports_resume_point(rules_api, opensearch):
+    for generation in (1, 2, 3):
+        add_rule(rules_api, opensearch, f'rule-{generation}', generation)
+    opensearch.client.put(rules_api.META_INDEX_NAME, rules_api.GENERATION_DOC_ID,
+                          {'type': 'generation', 'generation': 4})
+
+    records = list(rules_api.stream_rules(opensearch, limit=1, since='0'))
+    assert records[0] == {'rule': opensearch.client.docs[rules_api.INDEX_NAME]['rule-1']}
+    assert records[-1] == {'done': True, 'count': 1, 'deleted': 0, 'generation': 2, 'has_more': True}
@@ -0,0 +1,56 @@
+"""Unit tests for rules_common/codec.py and the OpenSearch serializer built on it"""
+
+import importlib.util
+import json
+import sys
+from array import array
+
+import pytest
+
+from rules_common import codec
+from rules_common.rule import Rule
+
+@pytest.fixture(params=['installed', 'json'])
+def backend(request, monkeypatch):
+    """The codec as imported, and reloaded with orjson unavailable"""
+    if request.param == 'installed':
+        return codec
+    monkeypatch.setitem(sys.modules, 'orjson', None)
+    fallback = importlib.util.module_from_spec(importlib.util.find_spec('rules_common.codec'))
+    fallback.__spec__.loader.exec_module(fallback)
+    assert fallback.BACKEND == 'json'
+    return fallback
+
+def test_round_trip(backend):
+    data = {'rules': [{'rule_id': 'abc', 'tags': ['pii'], 'priority': 3}], 'total': 1, 'note': 'naïve'}
+    assert backend.loads(backend.dumps(data)) == data
+    assert backend.loads(backend.dumps_bytes(data)) == data
+    assert isinstance(backend.dumps_bytes(data), bytes)
+
+def test_float32_arrays_are_encoded_directly(backend):
+    vector = array('f', [0.5, -1.25, 3.0])
+    assert backend.loads(backend.dumps({'embedding': vector})) == {'embedding': [0.5, -1.25, 3.0]}
+
+def test_rules_are_encoded_without_embedding(backend):
+    rule = Rule('Title', 'Text', rule_id='r1', embedding=[0.5])
+    encoded = backend.loads(backend.dumps([rule]))
+    assert encoded == [rule.to_dict()]
+    assert 'embedding' not in encoded[0]
+
+def test_unknown_types_are_rejected(backend):
+    with pytest.raises(TypeError):
+        backend.dumps({'value': object()})
+
+def test_invalid_json_raises_decode_error(backend):
+    with pytest.raises(json.JSONDecodeError):
+        backend.loads(b'{"rules": [')
+
+def test_serializer_reports_serialization_errors(rules_api):
+    from opensearchpy.exceptions import SerializationError
+    serializer = rules_api.FastJSONSerializer()
+    assert serializer.loads('{"took": 3}') == {'took': 3}
+    assert serializer.dumps('{"already": "encoded"}') == '{"already": "encoded"}'
+    with pytest.raises(SerializationError):
+        serializer.loads('{"took": ')
+    with pytest.raises(SerializationError):
+        serializer.dumps({'value': object()})
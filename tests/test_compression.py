@@ -0,0 +1,73 @@
+"""Unit tests for rules_common/compression.py"""
+
+import gzip
+import zlib
+
+import pytest
+
+from rules_common import compression
+from rules_common.compression import (
+    GZIP, compress, compress_chunks, negotiate_encoding, parse_accept_encoding
+)
+
+def test_parse_accept_encoding():
+    assert parse_accept_encoding('x-gzip, deflate;q=0.5, BR;q=0.8, identity;q=bad, ') == {
+        'gzip': 1.0, 'deflate': 0.5, 'br': 0.8, 'identity': 0.0
+    }
+
+@pytest.mark.parametrize('header, expected', [
+    (None, None),
+    ('', None),
+    ('identity', None),
+    ('gzip', GZIP),
+    ('gzip;q=0', None),
+    ('*', GZIP),
+    ('*, gzip;q=0', None),
+    ('deflate, x-gzip', GZIP),
+])
+def test_negotiate_encoding_with_gzip_only(monkeypatch, header, expected):
+    monkeypatch.setattr(compression, 'SUPPORTED_ENCODINGS', (GZIP,))
+    assert negotiate_encoding(header) == expected
+
+@pytest.mark.parametrize('header, expected', [
+    ('gzip, br', 'br'),
+    ('gzip, br;q=0.5', 'gzip'),
+    ('br;q=0', None),
+])
+def test_negotiate_encoding_prefers_br_when_available(monkeypatch, header, expected):
+    monkeypatch.setattr(compression, 'SUPPORTED_ENCODINGS', ('br', GZIP))
+    assert negotiate_encoding(header) == expected
+
+def test_gzip_compress_round_trip():
+    body = b'{"rules": []}' * 100
+    assert gzip.decompress(compress(body, GZIP)) == body
+
+def test_compressed_chunks_form_one_stream_decodable_as_it_arrives():
+    chunks = [b'{"rule": 1}\n', b'{"rule": 2}\n', b'{"done": true}\n']
+    output = list(compress_chunks(iter(chunks), GZIP))
+    assert gzip.decompress(b''.join(output)) == b''.join(chunks)
+
+    # Each flushed chunk decodes on its own, before the trailer arrives
+    decoder = zlib.decompressobj(31)
+    assert decoder.decompress(output[0]) == chunks[0]
+    assert decoder.decompress(output[1]) == chunks[1]
+
+def test_compress_chunks_closes_the_source():
+    closed = []
+
+    def records():
+        try:
+            yield b'a'
+            yield b'b'
+        finally:
+            closed.append(True)
+
+    stream = compress_chunks(records(), GZIP)
+    next(stream)
+    stream.close()
+    assert closed == [True]
+
+def test_brotli_chunks_round_trip():
+    brotli = pytest.importorskip('brotli')
+    chunks = [b'{"rule": 1}\n', b'{"rule": 2}\n']
+    assert brotli.decompress(b''.join(compress_chunks(iter(chunks), 'br'))) == b''.join(chunks)
@@ -0,0 +1,77 @@
+"""Unit tests for GET /rules request parameters, ETags and conditional requests"""
+
+import pytest
+
+@pytest.mark.parametrize('value, expected', [
+    (None, None),
+    ('', None),
+    ([], None),
+    ('title, category', ('category', 'rule_id', 'title')),
+    (['priority', 'rule_id'], ('priority', 'rule_id')),
+    ('title,,', ('rule_id', 'title')),
+])
+def test_parse_fields(rules_api, value, expected):
+    assert rules_api.parse_fields(value) == expected
+
+@pytest.mark.parametrize('value, message', [
+    ('title,embedding', 'Unknown fields: embedding'),
+    (['title', 3], 'must be a list'),
+    ({'title': True}, 'must be a list'),
+])
+def test_parse_fields_rejects_invalid_projections(rules_api, value, message):
+    with pytest.raises(ValueError, match=message):
+        rules_api.parse_fields(value)
+
+def test_etag_depends_on_generation_and_representation(rules_api):
+    etag = rules_api.generation_etag(4, 'json', 100, None, None)
+    assert etag.startswith('W/"g4-')
+    assert etag == rules_api.generation_etag(4, 'json', 100, None, None)
+    assert len({etag,
+                rules_api.generation_etag(5, 'json', 100, None, None),
+                rules_api.generation_etag(4, 'json', 10, None, None),
+                rules_api.generation_etag(4, 'json', 100, '3', None),
+                rules_api.generation_etag(4, 'json', 100, None, ('rule_id', 'title')),
+                rules_api.generation_etag(4, 'application/x-ndjson', 100, None, None)}) == 6
+
+def test_etag_matching_is_weak(rules_api):
+    etag = 'W/"g4-abc"'
+    assert rules_api.etag_matches(etag, 'W/"g4-abc"')
+    assert rules_api.etag_matches(etag, '"g4-abc"')
+    assert rules_api.etag_matches(etag, '"other", W/"g4-abc"')
+    assert rules_api.etag_matches(etag, '*')
+    assert not rules_api.etag_matches(etag, 'W/"g5-abc"')
+    assert not rules_api.etag_matches(etag, None)
+
+@pytest.fixture
+def list_rules(rules_api, opensearch, monkeypatch):
+    monkeypatch.setattr(rules_api, '_response_cache', None)
+    monkeypatch.setattr(rules_api, 'list_all_rules', lambda client, limit, since, generation, fields: {
+        'success': True, 'rules': [{'rule_id': 'r1'}] * 200, 'generation': generation
+    })
+
+    def get(query_params=None, headers=None):
+        return rules_api.route_request(opensearch, 'GET', '/rules', query_params or {}, None, headers or {})
+    return get
+
+def test_conditional_get_revalidates_only_the_same_request(list_rules):
+    first = list_rules({'limit': '10'}, {'Accept-Encoding': 'gzip'})
+    assert first['statusCode'] == 200
+    assert first['headers']['Content-Encoding'] == 'gzip'
+    assert first['headers']['Vary'] == 'Accept-Encoding'
+    etag = first['headers']['ETag']
+
+    # The same request, with or without compression, is unchanged
+    for headers in ({'If-None-Match': etag}, {'If-None-Match': etag, 'Accept-Encoding': 'gzip'}):
+        response = list_rules({'limit': '10'}, headers)
+        assert response['statusCode'] == 304
+        assert response['headers']['Vary'] == 'Accept-Encoding'
+
+    # Another projection or page size is a different representation
+    assert list_rules({'limit': '10', 'fields': 'title'}, {'If-None-Match': etag})['statusCode'] == 200
+    assert list_rules({'limit': '20'}, {'If-None-Match': etag})['statusCode'] == 200
+    assert list_rules({'limit': '10', 'format': 'ndjson'}, {'If-None-Match': etag})['statusCode'] == 200
+
+def test_conditional_get_fails_after_a_write(rules_api, opensearch, list_rules):
+    etag = list_rules()['headers']['ETag']
+    rules_api.bump_generation(opensearch)
+    assert list_rules(headers={'If-None-Match': etag})['statusCode'] == 200
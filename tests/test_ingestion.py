@@ -0,0 +1,59 @@
+"""Unit tests for the asynchronous ingestion path: queue selection and the SQS worker"""
+
+import json
+
+import pytest
+
+def sqs_event(*bodies):
+    return {'Records': [{'messageId': f'm{i}', 'body': body} for i, body in enumerate(bodies)]}
+
+def rule_body(text):
+    return json.dumps({'title': text, 'rule_text': text, 'category': 'privacy'})
+
+@pytest.fixture
+def handler(rules_api, monkeypatch):
+    import handler
+    monkeypatch.setattr(handler, 'get_opensearch_client', lambda: None)
+    return handler
+
+def test_sqs_handler_reports_only_retryable_failures(handler, monkeypatch):
+    ids = {text: handler.generate_rule_id(text) for text in ('ok', 'throttled', 'bad mapping')}
+    monkeypatch.setattr(handler, 'index_rules_batch', lambda client, rules: {
+        'indexed': [ids['ok']],
+        'failed': {ids['throttled']: 'Embedding failed', ids['bad mapping']: 'mapper_parsing_exception'},
+        'retryable': [ids['throttled']],
+    })
+    result = handler.sqs_handler(sqs_event(rule_body('ok'), rule_body('throttled'), rule_body('bad mapping')), None)
+    assert result == {'batchItemFailures': [{'itemIdentifier': 'm1'}]}
+
+def test_sqs_handler_drops_malformed_messages(handler, monkeypatch):
+    batches = []
+
+    def index_rules_batch(client, rules):
+        batches.append(rules)
+        return {'indexed': [], 'failed': {}, 'retryable': []}
+
+    monkeypatch.setattr(handler, 'index_rules_batch', index_rules_batch)
+    result = handler.sqs_handler(sqs_event('{not json', json.dumps({'title': 'no text'}), rule_body('ok')), None)
+    assert result == {'batchItemFailures': []}
+    assert [[rule['rule_text'] for rule in rules] for rules in batches] == [['ok']]
+
+def test_sqs_handler_retries_whole_batch_on_error(handler, monkeypatch):
+    def index_rules_batch(client, rules):
+        raise RuntimeError('cluster unavailable')
+
+    monkeypatch.setattr(handler, 'index_rules_batch', index_rules_batch)
+    result = handler.sqs_handler(sqs_event(rule_body('a'), '{not json', rule_body('b')), None)
+    assert result == {'batchItemFailures': [{'itemIdentifier': 'm0'}, {'itemIdentifier': 'm2'}]}
+
+def test_no_in_process_queue_on_lambda(monkeypatch):
+    pytest.importorskip('boto3')
+    import ingest_queue
+    monkeypatch.setattr(ingest_queue, '_ingest_queue', None)
+    monkeypatch.setattr(ingest_queue, 'INGEST_QUEUE_URL', None)
+    monkeypatch.setattr(ingest_queue, 'ON_LAMBDA', True)
+    with pytest.raises(RuntimeError, match='INGEST_QUEUE_URL'):
+        ingest_queue.get_ingest_queue()
+
+    monkeypatch.setattr(ingest_queue, 'ON_LAMBDA', False)
+    assert isinstance(ingest_queue.get_ingest_queue(), ingest_queue.LocalIngestQueue)
@@ -0,0 +1,78 @@
+"""Unit tests for the catch-up passes of tools/migrate_embeddings.py"""
+
+from array import array
+
+import pytest
+
+from conftest import ROOT
+
+TARGET = 'governance-rules-test_v2'
+
+@pytest.fixture
+def migrate(rules_api, opensearch, monkeypatch, tmp_path):
+    monkeypatch.syspath_prepend(str(ROOT / 'tools'))
+    import migrate_embeddings
+
+    def copy_batch(opensearch, target, hits, model_id, dimension):
+        for hit in hits:
+            opensearch.client.put(target, hit['_source']['rule_id'], hit['_source'])
+        copies.append([hit['_source']['rule_id'] for hit in hits])
+
+    copies = []
+    monkeypatch.setattr(migrate_embeddings, 'copies', copies, raising=False)
+    monkeypatch.setattr(migrate_embeddings, 'copy_batch', copy_batch)
+    monkeypatch.setattr(migrate_embeddings, 'state_path', tmp_path / 'state.json', raising=False)
+    return migrate_embeddings
+
+def add_rule(rules_api, opensearch, rule_id, generation, category='privacy'):
+    opensearch.client.put(rules_api.INDEX_NAME, rule_id, {
+        'rule_id': rule_id, 'category': category, 'generation': generation, 'updated_at': f'2024-01-0{generation}'
+    })
+
+def catch_up(migrate, opensearch, since):
+    state = {'target': TARGET, 'model': 'model', 'dimension': 3, 'since': since, 'phase': 'catch-up'}
+    migrate.catch_up(opensearch, state, migrate.state_path, batch_size=10)
+    return state
+
+def test_catch_up_copies_changes_and_drops_deleted_rules(rules_api, opensearch, migrate):
+    add_rule(rules_api, opensearch, 'kept', 1)
+    add_rule(rules_api, opensearch, 'changed', 2)
+    opensearch.client.put(TARGET, 'kept', opensearch.client.docs[rules_api.INDEX_NAME]['kept'])
+    opensearch.client.put(TARGET, 'gone', {'rule_id': 'gone'})
+    opensearch.client.put(rules_api.META_INDEX_NAME, rules_api.tombstone_id('gone'), {
+        'type': 'tombstone', 'rule_id': 'gone', 'generation': 2, 'deleted_at': '2024-01-02'
+    })
+    opensearch.client.put(rules_api.META_INDEX_NAME, rules_api.GENERATION_DOC_ID,
+                          {'type': 'generation', 'generation': 3})
+
+    state = catch_up(migrate, opensearch, 1)
+    # Only the rule whose copy was out of date is re-embedded; the next pass finds nothing
+    assert migrate.copies == [['changed']]
+    assert sorted(opensearch.client.docs[TARGET]) == ['changed', 'kept']
+    assert (state['phase'], state['since']) == ('ready', 3)
+
+def test_catch_up_converges_while_writers_are_blocked(rules_api, opensearch, migrate):
+    add_rule(rules_api, opensearch, 'rule', 1)
+    opensearch.client.put(TARGET, 'rule', opensearch.client.docs[rules_api.INDEX_NAME]['rule'])
+    # A writer held up by the cutover's write block has opened a generation it cannot finish
+    rules_api.begin_write(opensearch)
+
+    state = catch_up(migrate, opensearch, 1)
+    assert migrate.copies == []
+    assert state['phase'] == 'ready'
+
+def test_copies_are_routed_by_category(rules_api, opensearch, monkeypatch):
+    monkeypatch.syspath_prepend(str(ROOT / 'tools'))
+    import migrate_embeddings
+
+    monkeypatch.setattr(rules_api, 'PARTITION_MODE', 'routing')
+    monkeypatch.setattr(migrate_embeddings, 'embed_batch', 
+                        lambda texts, model_id, dimension: [array('f', [0.0])] * len(texts))
+    bulks = []
+    monkeypatch.setattr(migrate_embeddings.helpers, 'bulk', lambda client, actions, **kwargs: bulks.append(actions))
+    opensearch.write_target = lambda category: rules_api.OpenSearchClient.write_target(opensearch, category)
+
+    hit = {'_source': {'rule_id': 'r1', 'title': 'T', 'rule_text': 'text', 'category': 'privacy'}}
+    migrate_embeddings.copy_batch(opensearch, TARGET, [hit], 'model', 1)
+    (action,), = bulks
+    assert (action['_index'], action['_routing']) == (TARGET, 'privacy')
@@ -0,0 +1,71 @@
+"""Unit tests for lambda/query_planner.py (no AWS or OpenSearch access needed)"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# "lambda" is a keyword, so the module is imported from its directory
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'lambda'))
+
+from query_planner import HYBRID, LEXICAL, RRF_K, VECTOR, plan_query, reciprocal_rank_fusion  # noqa: E402
+
+TAGS = {'gdpr', 'pii', 'data-protection'}
+CATEGORIES = {'privacy', 'security'}
+
+@pytest.mark.parametrize('query, mode', [
+    ('gdpr', LEXICAL),
+    ('PII', LEXICAL),
+    ('privacy gdpr', LEXICAL),
+    ('data-protection', LEXICAL),
+    ('', LEXICAL),
+    ('"personal data" retention', HYBRID),
+    ('gdpr retention period', HYBRID),
+    ('logging secrets', HYBRID),
+    ('how should we handle customer records that contain health information', VECTOR),
+])
+def test_plan_query_selects_mode(query, mode):
+    assert plan_query(query, TAGS, CATEGORIES).mode == mode
+
+def test_plan_query_reports_tag_and_category_hits():
+    plan = plan_query('GDPR privacy', TAGS, CATEGORIES)
+    assert plan.tag_hits == ['gdpr']
+    assert plan.category_hits == ['privacy']
+    assert not plan.forced
+
+def test_plan_query_accepts_dict_key_views():
+    tags = {tag: [tag] for tag in TAGS}
+    categories = {category: [category] for category in CATEGORIES}
+    assert plan_query('pii', tags.keys(), categories.keys()).mode == LEXICAL
+
+def test_plan_query_forced_mode_overrides_classification():
+    plan = plan_query('gdpr', TAGS, CATEGORIES, VECTOR)
+    assert plan.mode == VECTOR
+    assert plan.forced
+
+def test_plan_query_rejects_unknown_mode():
+    with pytest.raises(ValueError):
+        plan_query('gdpr', TAGS, CATEGORIES, 'fuzzy')
+
+def test_rrf_ranks_documents_found_by_both_lists_first():
+    lexical = [{'rule_id': 'a'}, {'rule_id': 'b'}, {'rule_id': 'c'}]
+    vector = [{'rule_id': 'c'}, {'rule_id': 'd'}, {'rule_id': 'a'}]
+    merged = reciprocal_rank_fusion([lexical, vector], limit=10)
+    assert [doc['rule_id'] for doc in merged] == ['a', 'c', 'b', 'd']
+    assert merged[0]['score'] == pytest.approx(1 / (RRF_K + 1) + 1 / (RRF_K + 3))
+
+def test_rrf_applies_limit_and_keeps_first_copy():
+    lexical = [{'rule_id': 'a', 'source': 'lexical'}, {'rule_id': 'b', 'source': 'lexical'}]
+    vector = [{'rule_id': 'a', 'source': 'vector'}]
+    merged = reciprocal_rank_fusion([lexical, vector], limit=1)
+    assert len(merged) == 1
+    assert merged[0]['rule_id'] == 'a'
+    assert merged[0]['source'] == 'lexical'
+
+def test_rrf_does_not_modify_input_documents():
+    hits = [{'rule_id': 'a', 'score': 12.5}]
+    reciprocal_rank_fusion([hits], limit=1)
+    assert hits[0]['score'] == 12.5
+
+def test_rrf_of_no_results_is_empty():
+    assert reciprocal_rank_fusion([[], []], limit=5) == []
@@ -0,0 +1,27 @@
+"""Unit tests for the sync steps of tools/reindex.py"""
+
+import pytest
+
+from conftest import ROOT
+
+TARGET = 'governance-rules-test_v2'
+
+@pytest.fixture
+def reindex(rules_api, monkeypatch):
+    monkeypatch.syspath_prepend(str(ROOT / 'tools'))
+    import reindex
+    return reindex
+
+def test_tombstoned_rules_are_deleted_by_rule_id(rules_api, opensearch, reindex):
+    # Routed documents are not addressable by _id alone, so the copies are keyed differently here
+    opensearch.client.put(TARGET, 'routed-copy-1', {'rule_id': 'gone', 'category': 'privacy'})
+    opensearch.client.put(TARGET, 'routed-copy-2', {'rule_id': 'kept', 'category': 'security'})
+    opensearch.client.put(rules_api.META_INDEX_NAME, rules_api.tombstone_id('gone'), {
+        'type': 'tombstone', 'rule_id': 'gone', 'generation': 3, 'deleted_at': '2024-01-03'
+    })
+    opensearch.client.put(rules_api.META_INDEX_NAME, rules_api.tombstone_id('old'), {
+        'type': 'tombstone', 'rule_id': 'old', 'generation': 1, 'deleted_at': '2024-01-01'
+    })
+
+    assert reindex.delete_tombstoned(opensearch, TARGET, 2) == 1
+    assert [doc['rule_id'] for doc in opensearch.client.docs[TARGET].values()] == ['kept']
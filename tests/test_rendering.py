@@ -0,0 +1,70 @@
+"""Unit tests for mcp-server/rendering.py"""
+
+import pytest
+
+from conftest import ROOT
+
+@pytest.fixture
+def rendering(monkeypatch):
+    monkeypatch.syspath_prepend(str(ROOT / 'mcp-server'))
+    import rendering
+    return rendering
+
+def rule_doc(rule_id, updated_at='2024-01-01', **fields):
+    doc = {'rule_id': rule_id, 'title': f'Rule {rule_id}', 'rule_text': 'Text', 'category': 'privacy',
+           'priority': 3, 'tags': ['pii'], 'updated_at': updated_at}
+    doc.update(fields)
+    return doc
+
+def test_fragments_are_rendered_once_per_rule_version(rendering, monkeypatch):
+    calls = []
+    render = rendering.STYLES['query']
+
+    def counting(rule, fields):
+        calls.append(rule.rule_id)
+        return render(rule, fields)
+
+    monkeypatch.setitem(rendering.STYLES, 'query', counting)
+    renderer = rendering.RuleRenderer()
+
+    first = renderer.fragment('query', rule_doc('r1'))
+    assert renderer.fragment('query', rule_doc('r1')) is first
+    assert calls == ['r1']
+    # A rewrite stamps a new updated_at, and another projection shows other fields
+    renderer.fragment('query', rule_doc('r1', '2024-02-01', rule_text='New text'))
+    renderer.fragment('query', rule_doc('r1'), ('rule_id', 'title'))
+    assert calls == ['r1'] * 3
+    assert len(renderer) == 3
+
+def test_documents_without_a_version_are_not_cached(rendering):
+    renderer = rendering.RuleRenderer()
+    text = renderer.fragment('list', rule_doc('r1', updated_at=None))
+    assert 'ID: r1' in text
+    assert len(renderer) == 0
+
+def test_least_recently_used_fragment_is_evicted(rendering):
+    renderer = rendering.RuleRenderer(max_entries=2)
+    for rule_id in ('a', 'b', 'a', 'c'):
+        renderer.fragment('prompt', rule_doc(rule_id))
+    assert [key[1] for key in renderer._fragments] == ['a', 'c']
+
+def test_projected_fields_are_left_out(rendering):
+    text = rendering.RuleRenderer().fragment('query', {'rule_id': 'r1', 'title': 'T', 'updated_at': 'x'},
+                                             ('rule_id', 'title', 'updated_at'))
+    assert text == '**T**\n'
+
+def test_assemble_joins_everything_under_the_cap(rendering):
+    assert rendering.assemble('H\n', [('1. ', 'a\n'), ('2. ', 'b\n')], 'F') == 'H\n1. a\n2. b\nF'
+
+def test_assemble_caps_entries_but_keeps_header_and_footer(rendering):
+    entries = [('x' * 10,)] * 5
+    output = rendering.assemble('H' * 20, entries, 'F' * 5, max_chars=50)
+    assert output.startswith('H' * 20 + 'x' * 20 + '... 3 more rules not shown')
+    assert 'capped at 50 characters' in output
+    assert output.endswith('F' * 5)
+
+def test_header_is_kept_even_when_it_exceeds_the_cap(rendering):
+    # Pinned rules go in the header, so they are never dropped
+    output = rendering.assemble('P' * 60, [('entry',)], max_chars=50)
+    assert output.startswith('P' * 60)
+    assert '1 more rules not shown' in output
@@ -0,0 +1,73 @@
+"""Unit tests for lambda/response_cache.py and what the API lets into it"""
+
+import gzip
+
+import pytest
+
+from response_cache import CachedResponse, ResponseCache
+
+def test_entry_served_only_at_its_generation():
+    cache = ResponseCache(1024)
+    cache.put('key', 3, b'{"rules": []}')
+    assert cache.get('key', 3).body == b'{"rules": []}'
+    # A write elsewhere bumped the generation: the entry is dropped, not served
+    assert cache.get('key', 4) is None
+    assert len(cache) == 0
+    assert cache.get('key', 3) is None
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResponseCache(30)
+    cache.put('a', 1, b'x' * 10)
+    cache.put('b', 1, b'x' * 10)
+    cache.put('c', 1, b'x' * 10)
+    assert cache.get('a', 1) is not None
+    cache.put('d', 1, b'x' * 10)
+    assert cache.get('b', 1) is None
+    assert [key for key in 'acd' if cache.get(key, 1) is not None] == ['a', 'c', 'd']
+
+def test_replacing_a_key_keeps_the_byte_count():
+    cache = ResponseCache(25)
+    cache.put('a', 1, b'x' * 10)
+    cache.put('a', 2, b'y' * 10)
+    cache.put('b', 2, b'z' * 10)
+    assert cache.get('a', 2).body == b'y' * 10
+    assert cache.get('b', 2) is not None
+
+def test_oversized_body_is_returned_but_not_stored():
+    cache = ResponseCache(8)
+    entry = cache.put('big', 1, b'x' * 9)
+    assert entry.body == b'x' * 9
+    assert len(cache) == 0
+
+def test_precompressed_copies_count_towards_the_cap():
+    entry = CachedResponse(1, '{"rules": []}', ['gzip'])
+    assert gzip.decompress(entry.encoded['gzip']) == entry.body
+    assert entry.size == len(entry.body) + len(entry.encoded['gzip'])
+
+    cache = ResponseCache(entry.size, ['gzip'])
+    cache.put('a', 1, '{"rules": []}')
+    cache.put('b', 1, '{"rules": []}')
+    assert len(cache) == 1 and cache.get('b', 1) is not None
+
+class FailingBedrock:
+    def invoke_model(self, **kwargs):
+        raise RuntimeError('ThrottlingException')
+
+@pytest.mark.parametrize('mode', ['vector', 'hybrid'])
+def test_query_fails_instead_of_using_a_fallback_embedding(rules_api, opensearch, monkeypatch, mode):
+    monkeypatch.setattr(rules_api, 'bedrock_runtime', FailingBedrock())
+    monkeypatch.setattr(rules_api, 'get_vocabulary', lambda client, generation: ({}, {}))
+    monkeypatch.setattr(rules_api, 'embedding_mismatch', lambda client, generation=None: None)
+    monkeypatch.setattr(rules_api, 'get_pinned_rules', lambda client, generation, category: [])
+    monkeypatch.setattr(rules_api, '_response_cache', ResponseCache(1 << 20))
+    opensearch.search_target = lambda category: {'index': rules_api.INDEX_NAME}
+
+    result = rules_api.query_rules(opensearch, 'retention of personal data', mode=mode, generation=1)
+    assert not result['success']
+    assert 'ThrottlingException' in result['error']
+    assert result['plan']['mode'] == mode
+
+    response = rules_api.route_request(opensearch, 'POST', '/rules/query', {},
+                                       '{"query": "retention of personal data", "mode": "%s"}' % mode, {})
+    assert response['statusCode'] == 400
+    assert len(rules_api._response_cache) == 0
@@ -0,0 +1,63 @@
+"""Unit tests for rules_common/rule.py"""
+
+from array import array
+
+import pytest
+
+from rules_common.rule import RULE_FIELDS, Rule, RuleValidationError, as_vector, generate_rule_id
+
+VALID = {'title': 'PII', 'rule_text': 'Never log personal data', 'description': 'Logging',
+         'category': 'privacy', 'priority': 5, 'tags': ['pii', 'logging']}
+
+def test_from_input_builds_a_rule():
+    rule = Rule.from_input(VALID)
+    assert rule.to_input() == VALID
+    assert rule.rule_id == generate_rule_id(VALID['rule_text'])
+    assert rule.generation is None and rule.embedding is None
+
+def test_from_input_defaults():
+    rule = Rule.from_input({'title': 'T', 'rule_text': 'Text'})
+    assert (rule.description, rule.category, rule.priority, rule.tags) == ('', 'general', 1, [])
+
+@pytest.mark.parametrize('data, message', [
+    (['not', 'a', 'dict'], 'JSON object'),
+    ({'title': 'T'}, 'rule_text is required'),
+    ({'title': 'T', 'rule_text': 7}, 'rule_text is required'),
+    ({'rule_text': 'Text'}, 'title is required'),
+    ({'title': 'T', 'rule_text': 'Text', 'priority': '5'}, 'priority must be an integer'),
+    ({'title': 'T', 'rule_text': 'Text', 'priority': True}, 'priority must be an integer'),
+    ({'title': 'T', 'rule_text': 'Text', 'tags': 'pii'}, 'tags must be a list'),
+    ({'title': 'T', 'rule_text': 'Text', 'tags': ['pii', 3]}, 'tags must be a list'),
+    ({'title': 'T', 'rule_text': 'Text', 'category': ''}, 'must be strings'),
+    ({'title': 'T', 'rule_text': 'Text', 'description': None}, 'must be strings'),
+])
+def test_from_input_rejects_invalid_rules(data, message):
+    with pytest.raises(RuleValidationError, match=message):
+        Rule.from_input(data)
+
+def test_validation_error_is_a_value_error():
+    assert issubclass(RuleValidationError, ValueError)
+
+def test_from_document_keeps_missing_fields_as_none():
+    rule = Rule.from_document({'rule_id': 'r1', 'title': 'T', 'score': 1.5})
+    assert rule.rule_text is None and rule.tags is None
+    assert rule.to_dict() == {'rule_id': 'r1', 'title': 'T', 'score': 1.5}
+
+def test_embeddings_are_float32_arrays():
+    rule = Rule.from_document({'rule_id': 'r1', 'embedding': [0.5, 1.0]})
+    assert isinstance(rule.embedding, array) and rule.embedding.typecode == 'f'
+    vector = array('f', [0.5])
+    assert as_vector(vector) is vector
+    assert as_vector(array('d', [0.5])).typecode == 'f'
+
+def test_document_round_trip():
+    rule = Rule.from_input(VALID)
+    rule.generation, rule.created_at, rule.updated_at = 4, '2024-01-01', '2024-01-02'
+    rule.embedding = as_vector([0.25, 0.5])
+    doc = rule.to_document()
+    assert list(doc) == list(RULE_FIELDS) + ['embedding']
+    assert Rule.from_document(doc).to_document() == doc
+    assert 'embedding' not in rule.to_dict()
+
+def test_embedding_text_combines_title_description_and_text():
+    assert Rule.from_input(VALID).embedding_text == 'PII Logging Never log personal data'
@@ -0,0 +1,100 @@
+"""Unit tests for rules_common/snapshot.py and snapshot import checks"""
+
+import struct
+from array import array
+
+import pytest
+
+from rules_common.snapshot import (
+    HEADER_SIZE, Snapshot, SnapshotWriter, decode_vectors, encode_vectors, pack_vectors, unpack_vectors
+)
+
+VECTORS = [[0.5, -1.25, 2.0], [0.0, 3.5, -0.75]]
+
+def sample_rules(count):
+    return [{'rule_id': f'rule-{i}', 'title': f'Rule {i}', 'category': 'privacy', 'priority': 5,
+             'tags': ['pii'], 'rule_text': f'Text {i}'} for i in range(count)]
+
+@pytest.mark.parametrize('dtype', ['float32', 'float16'])
+def test_pack_unpack_round_trip(dtype):
+    # Every value is exactly representable in float16
+    block = pack_vectors(VECTORS, dtype)
+    assert len(block) == 6 * (4 if dtype == 'float32' else 2)
+    assert [list(vector) for vector in unpack_vectors(block, 3, dtype)] == VECTORS
+
+def test_pack_accepts_float32_arrays():
+    assert pack_vectors([array('f', vector) for vector in VECTORS]) == pack_vectors(VECTORS)
+
+def test_pack_is_little_endian():
+    assert pack_vectors([[1.0]], 'float16') == struct.pack('<e', 1.0)
+    assert pack_vectors([[1.0]]) == struct.pack('<f', 1.0)
+
+def test_float16_rounds_to_nearest_half_precision_value():
+    (vector,) = unpack_vectors(pack_vectors([[0.1]], 'float16'), 1, 'float16')
+    assert vector[0] == pytest.approx(0.1, abs=1e-4)
+    assert vector[0] != pytest.approx(0.1, abs=1e-6)
+
+def test_base64_round_trip():
+    assert [list(vector) for vector in decode_vectors(encode_vectors(VECTORS, 'float16'), 3, 'float16')] == VECTORS
+
+def test_unsupported_dtype():
+    with pytest.raises(ValueError, match='Unsupported vector dtype'):
+        pack_vectors(VECTORS, 'int8')
+
+@pytest.mark.parametrize('dtype', ['float32', 'float16'])
+def test_writer_and_reader(tmp_path, dtype):
+    path = str(tmp_path / 'rules.snap')
+    rules = sample_rules(2)
+    with SnapshotWriter(path, 3, dtype, embedding_model='amazon.titan-embed-text-v2:0') as writer:
+        writer.add(rules[:1], pack_vectors(VECTORS[:1], dtype))
+        writer.add(rules[1:], pack_vectors(VECTORS[1:], dtype))
+
+    with Snapshot(path) as snapshot:
+        assert (snapshot.count, snapshot.dimension, snapshot.dtype) == (2, 3, dtype)
+        assert snapshot.embedding_model == 'amazon.titan-embed-text-v2:0'
+        assert snapshot.header['vectors_offset'] == HEADER_SIZE
+        assert [rule['rule_id'] for rule in snapshot.rules] == ['rule-0', 'rule-1']
+        assert snapshot.rules[0]['tags'] == ['pii']
+        assert snapshot.vector(1) == VECTORS[1]
+        batches = list(snapshot.batches(1))
+        assert [rules for rules, _ in batches] == [snapshot.rules[:1], snapshot.rules[1:]]
+        assert b''.join(block for _, block in batches) == pack_vectors(VECTORS, dtype)
+
+def test_writer_rejects_mismatched_vector_block(tmp_path):
+    with SnapshotWriter(str(tmp_path / 'rules.snap'), 3) as writer:
+        with pytest.raises(ValueError, match='expected 24'):
+            writer.add(sample_rules(2), pack_vectors(VECTORS[:1]))
+
+def test_reader_rejects_other_files(tmp_path):
+    path = tmp_path / 'not.snap'
+    path.write_bytes(b'x' * 64)
+    with pytest.raises(ValueError, match='not a governance rules snapshot'):
+        Snapshot(str(path))
+
+def test_close_with_live_view_explains(tmp_path):
+    path = str(tmp_path / 'rules.snap')
+    with SnapshotWriter(path, 3) as writer:
+        writer.add(sample_rules(2), pack_vectors(VECTORS))
+    snapshot = Snapshot(path)
+    view = snapshot.vectors
+    with pytest.raises(BufferError, match='still referenced'):
+        snapshot.close()
+    del view
+    snapshot.close()
+
+def import_page(rules_api, model_id, dimension=None):
+    dimension = dimension or rules_api.EMBEDDING_DIMENSION
+    return {'rules': sample_rules(1), 'dimension': dimension, 'dtype': 'float32', 'embedding_model': model_id,
+            'vectors': encode_vectors([[0.0] * dimension])}
+
+@pytest.mark.parametrize('model_id, dimension', [
+    ('amazon.titan-embed-text-v2:0', None),
+    (None, None),
+    ('configured', 8),
+])
+def test_import_refuses_other_embeddings(rules_api, opensearch, monkeypatch, model_id, dimension):
+    monkeypatch.setattr(rules_api, 'embedding_mismatch', lambda client: None)
+    model_id = rules_api.EMBEDDING_MODEL_ID if model_id == 'configured' else model_id
+    result = rules_api.import_rules(opensearch, import_page(rules_api, model_id, dimension))
+    assert not result['success']
+    assert 'configured for' in result['error']
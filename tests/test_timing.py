@@ -0,0 +1,16 @@
+"""Unit tests for rules_common/timing.py"""
+
+from rules_common.timing import best_of, percentile
+
+def test_percentile_is_nearest_rank():
+    samples = [5.0, 1.0, 4.0, 2.0, 3.0]
+    assert percentile(samples, 0) == 1.0
+    assert percentile(samples, 50) == 3.0
+    assert percentile(samples, 99) == 5.0
+    assert percentile(samples, 100) == 5.0
+
+def test_best_of_calls_repeatedly_and_reports_milliseconds():
+    calls = []
+    elapsed = best_of(3, lambda: calls.append(1))
+    assert len(calls) == 3
+    assert 0 <= elapsed < 1000
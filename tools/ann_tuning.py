@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Measure the recall/latency trade-off of the HNSW settings used for the rules
+index, against exact ground truth.
+
+Vectors come from a snapshot written by `./gr export`. The exact top-k for
+each query is computed with a brute-force NumPy cosine scan. Each (m,
+ef_construction) pair is built as a scratch index on the running cluster,
+loaded with the snapshot vectors, and queried at every ef_search value
+(ef_search is a dynamic setting, so the index is not rebuilt for it). The
+report lists recall@k with p50/p99 latency per setting and picks the
+cheapest one that meets --target-recall.
+
+Queries are either text (--queries FILE, embedded with the configured
+Bedrock model) or, by default, snapshot vectors with a little Gaussian noise.
+No live index is modified. Apply the chosen settings with tools/reindex.py.
+"""
+
+import argparse
+import csv
+import itertools
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+os.environ.setdefault('INDEX_NAME', 'governance-rules')
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'lambda'))
+
+import numpy as np  # noqa: E402
+from opensearchpy import helpers  # noqa: E402
+import rules_api  # noqa: E402
+from rules_common.snapshot import Snapshot  # noqa: E402
+from rules_common.timing import percentile  # noqa: E402
+
+def int_list(value):
+    return [int(item) for item in value.split(',')]
+
+def normalize(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms == 0, 1, norms)
+
+def exact_top_k(corpus, queries, k, batch_size=256):
+    """Indices of the k most cosine-similar corpus rows for each query, best first"""
+    corpus = normalize(corpus)
+    results = []
+    for start in range(0, len(queries), batch_size):
+        scores = normalize(queries[start:start + batch_size]) @ corpus.T
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        order = np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1)
+        results.extend(np.take_along_axis(top, order, axis=1))
+    return results
+
+def load_queries(args, snapshot, corpus):
+    if args.queries:
+        texts = [line.strip() for line in Path(args.queries).read_text().splitlines() if line.strip()]
+        vectors = rules_api.get_embeddings(texts, strict=True)
+        if len(vectors[0]) != snapshot.dimension:
+            sys.exit(f"Query embeddings have {len(vectors[0])} dimensions, the snapshot {snapshot.dimension}")
+        return np.asarray(vectors, dtype=np.float32)
+
+    # Perturbed corpus vectors: realistic neighbourhoods without Bedrock calls
+    rng = np.random.default_rng(args.seed)
+    picks = rng.choice(len(corpus), size=min(args.sample, len(corpus)), replace=False)
+    base = corpus[picks]
+    scale = np.linalg.norm(base, axis=1, keepdims=True) / np.sqrt(snapshot.dimension)
+    return base + rng.normal(0.0, args.noise, base.shape).astype(np.float32) * scale
+
+def build_index(client, name, snapshot, corpus, m, ef_construction, batch_size):
+    body = rules_api.build_index_body(1, 0, snapshot.dimension,
+                                      hnsw_parameters={'m': m, 'ef_construction': ef_construction})
+    client.indices.create(index=name, body=body)
+    start = time.perf_counter()
+    actions = (
+        {'_index': name, '_id': rule['rule_id'], '_source': {'rule_id': rule['rule_id'], 'embedding': vector.tolist()}}
+        for rule, vector in zip(snapshot.rules, corpus)
+    )
+    helpers.bulk(client, actions, chunk_size=batch_size)
+    client.indices.refresh(index=name)
+    client.indices.forcemerge(index=name, max_num_segments=1)
+    build_seconds = time.perf_counter() - start
+    client.transport.perform_request('GET', f"/_plugins/_knn/warmup/{name}")
+    return build_seconds
+
+def run_queries(client, index, queries, k, warmup):
+    body_for = lambda vector: {
+        "size": k,
+        "query": {"knn": {"embedding": {"vector": vector.tolist(), "k": k}}},
+        "_source": False
+    }
+    for vector in queries[:warmup]:
+        client.search(index=index, body=body_for(vector))
+
+    results, latencies = [], []
+    for vector in queries:
+        start = time.perf_counter()
+        response = client.search(index=index, body=body_for(vector))
+        latencies.append((time.perf_counter() - start) * 1000)
+        results.append([hit['_id'] for hit in response['hits']['hits']])
+    return results, latencies
+
+def recall_at_k(results, truth, k):
+    return statistics.mean(len(set(found) & set(expected)) / k for found, expected in zip(results, truth))
+
+def main():
+    parser = argparse.ArgumentParser(description="HNSW recall/latency sweep against exact ground truth")
+    parser.add_argument('snapshot', help='Snapshot file written by ./gr export')
+    parser.add_argument('--queries', help='File with one text query per line (default: perturbed snapshot vectors)')
+    parser.add_argument('--sample', type=int, default=200, help='Sampled query vectors when --queries is not given')
+    parser.add_argument('--noise', type=float, default=0.05, help='Relative Gaussian noise added to sampled queries')
+    parser.add_argument('--seed', type=int, default=7, help='Random seed for query sampling')
+    parser.add_argument('--k', type=int, default=10, help='Neighbours per query')
+    parser.add_argument('--m', type=int_list, default=[8, 16, 32], help='Comma-separated HNSW m values')
+    parser.add_argument('--ef-construction', type=int_list, default=[128, 256, 512],
+                        help='Comma-separated HNSW ef_construction values')
+    parser.add_argument('--ef-search', type=int_list, default=[16, 32, 64, 100, 200, 400],
+                        help='Comma-separated ef_search values')
+    parser.add_argument('--target-recall', type=float, default=0.95, help='Recall@k the chosen setting must reach')
+    parser.add_argument('--warmup', type=int, default=20, help='Unmeasured queries before each measurement')
+    parser.add_argument('--batch-size', type=int, default=500, help='Documents per bulk request')
+    parser.add_argument('--csv', help='Also write the results to this CSV file')
+    parser.add_argument('--keep', action='store_true', help='Keep the scratch indices')
+    args = parser.parse_args()
+
+    client = rules_api.OpenSearchClient(bootstrap=False).client
+    with Snapshot(args.snapshot) as snapshot:
+        corpus = np.array(snapshot.vectors, dtype=np.float32)
+        if args.k > len(corpus):
+            sys.exit(f"--k {args.k} exceeds the {len(corpus)} vectors in the snapshot")
+        queries = load_queries(args, snapshot, corpus)
+
+        print(f"Exact top-{args.k} for {len(queries)} queries over {len(corpus)} x {snapshot.dimension} vectors...")
+        ids = [rule['rule_id'] for rule in snapshot.rules]
+        truth = [[ids[i] for i in row] for row in exact_top_k(corpus, queries, args.k)]
+
+        rows = []
+        scratch = []
+        try:
+            for m, ef_construction in itertools.product(args.m, args.ef_construction):
+                name = f"{rules_api.INDEX_NAME}-tune-m{m}-efc{ef_construction}"
+                scratch.append(name)
+                build_seconds = build_index(client, name, snapshot, corpus, m, ef_construction, args.batch_size)
+                for ef_search in args.ef_search:
+                    client.indices.put_settings(index=name, body={"index": {"knn.algo_param.ef_search": ef_search}})
+                    results, latencies = run_queries(client, name, queries, args.k, args.warmup)
+                    row = {
+                        'm': m,
+                        'ef_construction': ef_construction,
+                        'ef_search': ef_search,
+                        'recall': recall_at_k(results, truth, args.k),
+                        'p50_ms': percentile(latencies, 50),
+                        'p99_ms': percentile(latencies, 99),
+                        'build_s': build_seconds
+                    }
+                    rows.append(row)
+                    print(f"  m={m:<3} ef_construction={ef_construction:<4} ef_search={ef_search:<4} "
+                          f"recall@{args.k}={row['recall']:.3f}  p50={row['p50_ms']:.1f} ms  "
+                          f"p99={row['p99_ms']:.1f} ms  build={build_seconds:.1f} s")
+        finally:
+            if not args.keep and scratch:
+                client.indices.delete(index=','.join(scratch), ignore=404)
+
+    if args.csv:
+        with open(args.csv, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+
+    meeting = [row for row in rows if row['recall'] >= args.target_recall]
+    if not meeting:
+        best = max(rows, key=lambda row: row['recall'])
+        print(f"\nNo setting reached recall@{args.k} {args.target_recall}; best was {best['recall']:.3f} "
+              f"(m={best['m']}, ef_construction={best['ef_construction']}, ef_search={best['ef_search']})")
+        return
+    # Cheapest: lowest tail latency, then the smallest graph and build cost
+    best = min(meeting, key=lambda row: (row['p99_ms'], row['m'], row['ef_construction']))
+    print(f"\nCheapest setting with recall@{args.k} >= {args.target_recall}: "
+          f"m={best['m']}, ef_construction={best['ef_construction']}, ef_search={best['ef_search']} "
+          f"(recall {best['recall']:.3f}, p50 {best['p50_ms']:.1f} ms, p99 {best['p99_ms']:.1f} ms)")
+    print(f"Apply with: python tools/reindex.py --m {best['m']} --ef-construction {best['ef_construction']} "
+          f"--ef-search {best['ef_search']}")
+
+if __name__ == "__main__":
+    main()
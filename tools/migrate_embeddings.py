@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+Re-embed every governance rule with a different embedding model/dimension
+into the next versioned index behind the INDEX_NAME alias, compare
+retrieval between the old and new index, then swap the alias.
+
+The live index keeps serving while the migration runs. Progress is
+checkpointed to a state file after every batch, so an interrupted run
+resumes where it stopped. Rules written or deleted during the copy are picked
+up by catch-up passes based on the index generation. A batch whose
+embeddings fail is retried and never written with placeholder vectors.
+
+--cutover write-blocks the old index, runs a last catch-up and swaps the
+alias the way tools/reindex.py does, so the meta index (generation counter,
+tombstones, pinned tier) carries over unchanged. Then deploy the API with
+EMBEDDING_MODEL_ID / EMBEDDING_DIMENSION set to match; until it is
+redeployed it refuses kNN queries and writes against the new index.
+
+Uses the same OPENSEARCH_ENDPOINT, INDEX_NAME and AWS credentials as the
+Lambda handler.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+os.environ.setdefault('INDEX_NAME', 'governance-rules')
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'lambda'))
+
+from opensearchpy import helpers  # noqa: E402
+import rules_api  # noqa: E402
+from reindex import counts_match, delete_copies, live_indices, next_version  # noqa: E402
+from rules_common.rule import Rule  # noqa: E402
+
+# Fixed query set used when --queries is not given
+DEFAULT_QUERIES = [
+    "handling personally identifiable information",
+    "data retention and deletion",
+    "code review requirements",
+    "secrets and credentials in source code",
+    "logging sensitive data",
+    "third-party dependency approval",
+    "model output safety checks",
+    "access control for production systems",
+    "incident response and escalation",
+    "documentation standards for APIs",
+]
+
+# Catch-up passes before giving up on a source that never stops changing
+MAX_CATCH_UP_PASSES = 5
+# Attempts at embedding a batch before the run stops (rerun to resume)
+EMBED_ATTEMPTS = 4
+
+def load_state(path, client, model_id, dimension):
+    if path.exists():
+        state = json.loads(path.read_text())
+        if (state['model'], state['dimension']) != (model_id, dimension):
+            sys.exit(f"{path} belongs to a migration to {state['model']} ({state['dimension']} dimensions) "
+                     f"into {state['target']}; finish it or use another --state file")
+        print(f"Resuming migration into {state['target']} ({state['copied']} rules copied so far)")
+        return state
+    target = rules_api.physical_index_name(next_version(client))
+    return {'target': target, 'model': model_id, 'dimension': dimension,
+            'phase': 'copy', 'after': None, 'copied': 0, 'since': None}
+
+def save_state(path, state):
+    tmp = path.with_suffix('.tmp')
+    tmp.write_text(json.dumps(state, indent=2))
+    tmp.replace(path)
+
+def ensure_target(opensearch, target, model_id, dimension):
+    client = opensearch.client
+    if not client.indices.exists(index=target):
+        client.indices.create(index=target, body=rules_api.build_index_body(
+            rules_api.INDEX_SHARDS, rules_api.INDEX_REPLICAS, dimension, model_id))
+        print(f"Created index {target} ({model_id}, {dimension} dimensions)")
+        return
+    for index, config in rules_api.index_embedding_config(opensearch, target).items():
+        if config != (model_id, dimension):
+            sys.exit(f"Index {index} already exists with embedding config {config}")
+
+def embed_batch(texts, model_id, dimension):
+    """Embed a batch, retrying it with backoff; exits rather than store unusable vectors"""
+    for attempt in range(1, EMBED_ATTEMPTS + 1):
+        try:
+            return rules_api.get_embeddings(texts, model_id, dimension, strict=True)
+        except Exception as e:
+            if attempt == EMBED_ATTEMPTS:
+                sys.exit(f"Embedding failed {attempt} times ({str(e)}); rerun to resume from the last checkpoint")
+            print(f"  embedding failed ({str(e)}); retrying batch")
+            time.sleep(2 ** attempt)
+
+def copy_batch(opensearch, target, hits, model_id, dimension):
+    rules = [Rule.from_document(hit['_source']) for hit in hits]
+    embeddings = embed_batch([rule.embedding_text for rule in rules], model_id, dimension)
+    actions = []
+    for rule, embedding in zip(rules, embeddings):
+        rule.embedding = embedding
+        doc = rule.to_document()
+        action = {'_index': target, '_id': rule.rule_id, '_source': doc}
+        # Route like the live write path, or queries scoped to a category miss the copy
+        routing = opensearch.write_target(doc['category']).get('routing')
+        if routing:
+            action['_routing'] = routing
+        actions.append(action)
+    helpers.bulk(opensearch.client, actions)
+
+def copy_version(source):
+    return (source.get('generation'), source.get('updated_at'))
+
+def stale_hits(opensearch, target, hits):
+    """Source hits whose copy in the target is missing or older than the source document"""
+    if not hits:
+        return []
+    body = {
+        "query": {"terms": {"rule_id": [hit['_source']['rule_id'] for hit in hits]}},
+        "_source": ["rule_id", "generation", "updated_at"],
+        "size": len(hits)
+    }
+    copies = {hit['_source']['rule_id']: copy_version(hit['_source'])
+              for hit in opensearch.client.search(index=target, body=body)['hits']['hits']}
+    return [hit for hit in hits if copies.get(hit['_source']['rule_id']) != copy_version(hit['_source'])]
+
+def copy_rules(opensearch, state, state_path, batch_size):
+    """Re-embed the whole source index in rule_id order, checkpointing after each batch"""
+    if state['since'] is None:
+        # Anything written from here on is re-copied by the catch-up passes
+        state['since'] = rules_api.feed_generation(opensearch)
+        save_state(state_path, state)
+
+    search_body = {
+        "query": {"match_all": {}},
+        "_source": {"excludes": ["embedding"]},
+        "sort": [{"rule_id": {"order": "asc"}}]
+    }
+    if state['after']:
+        search_body['search_after'] = [state['after']]
+
+    batch = []
+    for hit in rules_api.iter_hits(opensearch, rules_api.INDEX_NAME, search_body, page_size=batch_size):
+        batch.append(hit)
+        if len(batch) == batch_size:
+            flush(opensearch, state, state_path, batch)
+            batch = []
+    if batch:
+        flush(opensearch, state, state_path, batch)
+
+    state['phase'] = 'catch-up'
+    save_state(state_path, state)
+
+def flush(opensearch, state, state_path, batch):
+    copy_batch(opensearch, state['target'], batch, state['model'], state['dimension'])
+    state['after'] = batch[-1]['_source']['rule_id']
+    state['copied'] += len(batch)
+    save_state(state_path, state)
+    print(f"  copied {state['copied']} rules (last {state['after']})")
+
+def catch_up(opensearch, state, state_path, batch_size):
+    """Re-copy rules changed and drop rules deleted since the last pass
+
+    The target is in sync once a pass finds nothing to copy or delete. The
+    generation counter is no guide: the feed resends the generation it
+    resumes from, and writers held up by a cutover's write block have
+    already bumped it. Exits non-zero if the source is still changing after
+    MAX_CATCH_UP_PASSES; rerunning continues from the last pass.
+    """
+    for _ in range(MAX_CATCH_UP_PASSES):
+        generation = rules_api.feed_generation(opensearch)
+        since = str(state['since'])
+        changed = {
+            "query": {"bool": {"filter": [rules_api.change_filter(since, 'updated_at')]}},
+            "_source": {"excludes": ["embedding"]},
+            "sort": [{"rule_id": {"order": "asc"}}]
+        }
+        copied = 0
+        hits = list(rules_api.iter_hits(opensearch, rules_api.INDEX_NAME, changed, page_size=batch_size))
+        for start in range(0, len(hits), batch_size):
+            stale = stale_hits(opensearch, state['target'], hits[start:start + batch_size])
+            if stale:
+                copy_batch(opensearch, state['target'], stale, state['model'], state['dimension'])
+            copied += len(stale)
+
+        tombstones = {
+            "query": {"bool": {"filter": [
+                {"term": {"type": "tombstone"}},
+                rules_api.change_filter(since, 'deleted_at')
+            ]}},
+            "sort": [{"rule_id": {"order": "asc"}}]
+        }
+        deleted = delete_copies(opensearch, state['target'], [
+            hit['_source']['rule_id'] for hit in rules_api.iter_hits(opensearch, rules_api.META_INDEX_NAME, tombstones)
+        ], batch_size)
+
+        print(f"  catch-up from generation {since}: {copied} copied, {deleted} deleted")
+        state['since'] = generation
+        save_state(state_path, state)
+        if not copied and not deleted:
+            break
+    else:
+        sys.exit(f"{rules_api.INDEX_NAME} still changed after {MAX_CATCH_UP_PASSES} catch-up passes; "
+                 f"rerun to continue (--cutover blocks writes for a last pass)")
+
+    opensearch.client.indices.refresh(index=state['target'])
+    state['phase'] = 'ready'
+    save_state(state_path, state)
+
+def cutover(opensearch, state, state_path, batch_size):
+    """Write-block the live index, run a last catch-up and swap the alias to the new index"""
+    client = opensearch.client
+    sources, is_alias = live_indices(client)
+    target = state['target']
+    rules_api.set_write_block(opensearch, sources, True)
+    try:
+        client.indices.refresh(index=','.join(sources))
+        catch_up(opensearch, state, state_path, batch_size)
+        # Drop anything the blocked sources no longer hold, whatever its tombstone says
+        extra = rules_api.rule_ids(opensearch, target) - set().union(
+            *(rules_api.rule_ids(opensearch, source) for source in sources))
+        delete_copies(opensearch, target, sorted(extra), batch_size)
+        if not counts_match(client, sources, target):
+            sys.exit("Document counts differ; the alias was not swapped (rerun --cutover to retry)")
+        rules_api.swap_alias(opensearch, sources, is_alias, target)
+    except BaseException:
+        rules_api.set_write_block(opensearch, sources, None)
+        raise
+    rules_api.bump_generation(opensearch)
+    state['phase'] = 'done'
+    save_state(state_path, state)
+    print(f"{rules_api.INDEX_NAME} now points to {target}; {','.join(sources)} is write-blocked")
+    print(f"Deploy the API with EMBEDDING_MODEL_ID={state['model']} EMBEDDING_DIMENSION={state['dimension']}")
+
+def top_k(opensearch, index, vector, k):
+    start = time.perf_counter()
+    response = opensearch.client.search(index=index, body=rules_api.vector_search_body(vector, None, k))
+    latency = (time.perf_counter() - start) * 1000
+    return [hit['_source']['rule_id'] for hit in response['hits']['hits']], latency
+
+def compare_recall(opensearch, target, model_id, dimension, source_model, source_dimension, queries, k):
+    """Report how much of the old index's top-k each query still finds in the new index"""
+    print(f"\nRecall of {target} against {rules_api.INDEX_NAME} (top {k}, {len(queries)} queries)")
+    overlaps, old_latencies, new_latencies = [], [], []
+    for query in queries:
+        old_ids, old_ms = top_k(opensearch, rules_api.INDEX_NAME,
+                                rules_api.get_embedding(query, source_model, source_dimension, strict=True), k)
+        new_ids, new_ms = top_k(opensearch, target,
+                                rules_api.get_embedding(query, model_id, dimension, strict=True), k)
+        overlap = len(set(old_ids) & set(new_ids)) / len(old_ids) if old_ids else 1.0
+        overlaps.append(overlap)
+        old_latencies.append(old_ms)
+        new_latencies.append(new_ms)
+        print(f"  {overlap:6.1%}  {query}")
+
+    print(f"\nold: {source_model} ({source_dimension} dims), median kNN latency {statistics.median(old_latencies):.1f} ms")
+    print(f"new: {model_id} ({dimension} dims), median kNN latency {statistics.median(new_latencies):.1f} ms")
+    print(f"mean recall@{k} of new vs old: {statistics.mean(overlaps):.1%} (worst query {min(overlaps):.1%})")
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-embed governance rules into a new index behind the alias")
+    parser.add_argument('--model', required=True, help='Target embedding model ID, e.g. amazon.titan-embed-text-v2:0')
+    parser.add_argument('--dimension', type=int, required=True, help='Target embedding dimension')
+    parser.add_argument('--batch-size', type=int, default=100, help='Rules re-embedded per bulk request')
+    parser.add_argument('--state', help='Checkpoint file (default: .migrate-<INDEX_NAME>.json)')
+    parser.add_argument('--queries', help='File with one recall query per line (default: built-in set)')
+    parser.add_argument('--k', type=int, default=10, help='Neighbours compared per query')
+    parser.add_argument('--skip-recall', action='store_true', help='Do not run the recall comparison')
+    parser.add_argument('--cutover', action='store_true',
+                        help='Once caught up, swap the INDEX_NAME alias to the new index')
+    args = parser.parse_args()
+
+    if rules_api.PARTITION_MODE == 'index':
+        sys.exit("Partitioned indices are managed per category; migration is not supported with PARTITION_MODE=index")
+    opensearch = rules_api.OpenSearchClient(bootstrap=False)
+    client = opensearch.client
+    if not client.indices.exists(index=rules_api.META_INDEX_NAME):
+        sys.exit(f"{rules_api.META_INDEX_NAME} does not exist; start the API once to create its indices")
+    if rules_api.reindex_target(opensearch):
+        sys.exit("A reindex is in progress; let it finish (or abort it) first")
+    state_path = Path(args.state or f".migrate-{rules_api.INDEX_NAME}.json")
+
+    source_configs = rules_api.index_embedding_config(opensearch)
+    if not source_configs:
+        sys.exit(f"No rules index found behind {rules_api.INDEX_NAME}")
+    source_model, source_dimension = next(iter(source_configs.values()))
+    # Indices created before the model was recorded were embedded with Titan v1
+    source_model = source_model or 'amazon.titan-embed-text-v1'
+
+    state = load_state(state_path, client, args.model, args.dimension)
+    if state['phase'] == 'done':
+        print(f"Migration into {state['target']} is already complete")
+        return
+    target = state['target']
+    ensure_target(opensearch, target, args.model, args.dimension)
+    if state['phase'] == 'copy':
+        print(f"Re-embedding {rules_api.INDEX_NAME} into {target}...")
+        copy_rules(opensearch, state, state_path, args.batch_size)
+    if state['phase'] in ('catch-up', 'ready'):
+        catch_up(opensearch, state, state_path, args.batch_size)
+    print(f"Copy complete: {state['copied']} rules in {target}")
+
+    if not args.skip_recall:
+        queries = DEFAULT_QUERIES
+        if args.queries:
+            queries = [line.strip() for line in Path(args.queries).read_text().splitlines() if line.strip()]
+        compare_recall(opensearch, target, args.model, args.dimension,
+                       source_model, source_dimension, queries, args.k)
+
+    if args.cutover:
+        cutover(opensearch, state, state_path, args.batch_size)
+    else:
+        print("\nRerun with --cutover to swap the alias to the new index")
+
+if __name__ == "__main__":
+    main()
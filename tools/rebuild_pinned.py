@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Rebuild the pinned rule tier from the rules index.
+
+The API keeps the tier up to date as rules are written. Run this once for
+rules loaded before pinning existed, or after changing PINNED_PRIORITY:
+every rule at or above the threshold gets a pinned entry in the meta index,
+stale entries are removed, and the generation is bumped so warm containers
+reload the tier.
+
+Uses the same OPENSEARCH_ENDPOINT, INDEX_NAME, PINNED_PRIORITY and AWS
+credentials as the Lambda handler.
+"""
+
+import argparse
+import os
+import sys
+from pathlib import Path
+
+os.environ.setdefault('INDEX_NAME', 'governance-rules')
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'lambda'))
+
+from opensearchpy import helpers  # noqa: E402
+import rules_api  # noqa: E402
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the pinned rule tier")
+    parser.add_argument('--dry-run', action='store_true', help='Report the changes without writing them')
+    args = parser.parse_args()
+
+    opensearch = rules_api.OpenSearchClient(bootstrap=False)
+    if not opensearch.client.indices.exists(index=rules_api.META_INDEX_NAME):
+        sys.exit(f"{rules_api.META_INDEX_NAME} does not exist; start the API once to create its indices")
+    by_rule_id = {'_source': {'excludes': ['embedding']}, 'sort': [{'rule_id': {'order': 'asc'}}]}
+
+    pinned = [
+        hit['_source'] for hit in rules_api.iter_hits(opensearch, rules_api.INDEX_NAME, dict(
+            by_rule_id, query={'range': {'priority': {'gte': rules_api.PINNED_PRIORITY}}}))
+    ]
+    existing = {
+        hit['_source']['rule_id'] for hit in rules_api.iter_hits(opensearch, rules_api.META_INDEX_NAME, {
+            'query': {'term': {'type': 'pinned'}},
+            '_source': ['rule_id'],
+            'sort': [{'rule_id': {'order': 'asc'}}]
+        })
+    }
+    stale = existing - {rule['rule_id'] for rule in pinned}
+
+    print(f"{len(pinned)} rules with priority >= {rules_api.PINNED_PRIORITY}; "
+          f"{len(stale)} stale pinned entries to remove")
+    for rule in pinned:
+        print(f"  [{rule['category']}] {rule['priority']:>2}  {rule['title']}")
+    if args.dry_run:
+        return
+
+    actions = rules_api.pinned_actions(pinned) + [
+        {'_op_type': 'delete', '_index': rules_api.META_INDEX_NAME, '_id': rules_api.pinned_id(rule_id)}
+        for rule_id in stale
+    ]
+    helpers.bulk(opensearch.client, actions, refresh='wait_for')
+    generation = rules_api.bump_generation(opensearch)
+    print(f"Pinned tier rebuilt at generation {generation}")
+
+if __name__ == "__main__":
+    main()
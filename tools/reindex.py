@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Rebuild the governance rules index with new settings without downtime.
+
+The API reads and writes through the INDEX_NAME alias. This tool creates the
+next versioned physical index (<INDEX_NAME>_v<n>) with the requested
+shard/replica/HNSW settings. While it copies the documents server-side with
+_reindex, a dual-write marker in the meta index makes the API write new
+rules to both indices. Embeddings are copied as stored, so Bedrock is not
+called.
+
+The copy is throttled, and the new index is loaded with replicas and
+refresh disabled. Its graphs are warmed before the swap, so queries against
+the live index keep their latency. For the swap the old index is
+write-blocked: writes still in flight there are copied over by a final
+sync, and later writers fail and retry through the alias (see
+rules_api.retry_write_blocked). Once the document counts match, the alias
+moves to the new index in a single atomic _aliases call, and only then is
+the dual-write marker cleared. A legacy concrete index named INDEX_NAME is
+removed in that same call. The old index stays write-blocked.
+
+Uses the same OPENSEARCH_ENDPOINT, INDEX_NAME and AWS credentials as the
+Lambda handler.
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+os.environ.setdefault('INDEX_NAME', 'governance-rules')
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'lambda'))
+
+from opensearchpy.exceptions import NotFoundError  # noqa: E402
+import rules_api  # noqa: E402
+
+INDEX_NAME = rules_api.INDEX_NAME
+
+def live_indices(client):
+    """Physical indices currently behind INDEX_NAME, and whether INDEX_NAME is an alias"""
+    if client.indices.exists_alias(name=INDEX_NAME):
+        return sorted(client.indices.get_alias(name=INDEX_NAME)), True
+    if client.indices.exists(index=INDEX_NAME):
+        return [INDEX_NAME], False
+    sys.exit(f"No index or alias named {INDEX_NAME}")
+
+def next_version(client):
+    pattern = re.compile(rf"^{re.escape(INDEX_NAME)}_v(\d+)$")
+    versions = [int(match.group(1)) for name in client.indices.get(index=f"{INDEX_NAME}_v*")
+                if (match := pattern.match(name))]
+    return max(versions, default=0) + 1
+
+def wait_for_task(client, task_id, poll_seconds):
+    while True:
+        task = client.tasks.get(task_id=task_id)
+        status = task['task']['status']
+        print(f"  copied {status['created']} of {status['total']} documents")
+        if task.get('completed'):
+            response = task.get('response', {})
+            if task.get('error') or response.get('failures'):
+                sys.exit(f"Reindex failed: {task.get('error') or response['failures'][:3]}")
+            return response
+        time.sleep(poll_seconds)
+
+def delete_copies(opensearch, target, ids, batch_size=500):
+    """Delete rules from the target by rule_id, whatever shard routing put them on; returns the count deleted
+
+    Tombstones do not record the category a rule was routed by, so a bulk
+    delete by _id would miss documents on other shards in routing mode.
+    """
+    deleted = 0
+    for start in range(0, len(ids), batch_size):
+        response = opensearch.client.delete_by_query(
+            index=target,
+            body={"query": {"terms": {"rule_id": ids[start:start + batch_size]}}},
+            conflicts='proceed',
+            refresh=True
+        )
+        deleted += response.get('deleted', 0)
+    return deleted
+
+def delete_tombstoned(opensearch, target, generation):
+    """Drop rules deleted after the copy began; _reindex may have copied them first"""
+    tombstones = {
+        "query": {"bool": {"filter": [
+            {"term": {"type": "tombstone"}},
+            rules_api.change_filter(str(generation), 'deleted_at')
+        ]}},
+        "sort": [{"rule_id": {"order": "asc"}}]
+    }
+    return delete_copies(opensearch, target, [
+        hit['_source']['rule_id'] for hit in rules_api.iter_hits(opensearch, rules_api.META_INDEX_NAME, tombstones)
+    ])
+
+def final_sync(opensearch, sources, target, generation):
+    """Make the target match the write-blocked sources exactly
+
+    A writer can land a rule in a source just before the block and still be
+    waiting for its refresh when the marker would otherwise be cleared, so
+    its dual write never happens. Rules written since the copy began are
+    copied again, and rules the sources no longer hold are deleted.
+    """
+    client = opensearch.client
+    client.indices.refresh(index=','.join(sources))
+    response = client.reindex(body={
+        "source": {"index": sources, "query": {"bool": {"filter": [
+            rules_api.change_filter(str(generation), 'updated_at')
+        ]}}},
+        "dest": {"index": target}
+    }, refresh=True, wait_for_completion=True)
+    if response.get('failures'):
+        raise RuntimeError(f"Final sync failed: {response['failures'][:3]}")
+    extra = rules_api.rule_ids(opensearch, target) - set().union(
+        *(rules_api.rule_ids(opensearch, source) for source in sources))
+    return response.get('total', 0), delete_copies(opensearch, target, sorted(extra))
+
+def counts_match(client, sources, target, attempts=5):
+    for _ in range(attempts):
+        client.indices.refresh(index=','.join(sources + [target]))
+        source_count = client.count(index=','.join(sources))['count']
+        target_count = client.count(index=target)['count']
+        print(f"  {','.join(sources)}: {source_count} documents, {target}: {target_count}")
+        if source_count == target_count:
+            return True
+        time.sleep(2)
+    return False
+
+def clear_marker(opensearch):
+    opensearch.client.delete(index=rules_api.META_INDEX_NAME, id=rules_api.REINDEX_DOC_ID,
+                             refresh=True, ignore=404)
+
+def abort(opensearch):
+    try:
+        marker = opensearch.client.get(index=rules_api.META_INDEX_NAME, id=rules_api.REINDEX_DOC_ID)['_source']
+    except NotFoundError:
+        print("No reindex in progress")
+        return
+    # A run stopped during the swap may have left the sources write-blocked
+    sources = [source for source in marker.get('source', []) if opensearch.client.indices.exists(index=source)]
+    if sources:
+        rules_api.set_write_block(opensearch, sources, None)
+    clear_marker(opensearch)
+    opensearch.client.indices.delete(index=marker['target'], ignore=404)
+    print(f"Aborted reindex into {marker['target']}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Zero-downtime reindex of the governance rules index")
+    parser.add_argument('--shards', type=int, default=rules_api.INDEX_SHARDS, help='Primary shards of the new index')
+    parser.add_argument('--replicas', type=int, default=rules_api.INDEX_REPLICAS, help='Replicas of the new index')
+    parser.add_argument('--ef-search', type=int, default=100, help='HNSW ef_search of the new index')
+    parser.add_argument('--m', type=int, help='HNSW m of the new index (default: engine default)')
+    parser.add_argument('--ef-construction', type=int, help='HNSW ef_construction of the new index')
+    parser.add_argument('--requests-per-second', type=float, default=500,
+                        help='_reindex throttle in documents per second (-1 for unthrottled)')
+    parser.add_argument('--poll-seconds', type=float, default=5, help='Progress polling interval')
+    parser.add_argument('--delete-old', action='store_true', help='Delete the previous physical index after the swap')
+    parser.add_argument('--abort', action='store_true', help='Abandon a reindex left in progress')
+    args = parser.parse_args()
+
+    if rules_api.PARTITION_MODE == 'index':
+        sys.exit("Partitioned indices are managed per category; reindex is not supported with PARTITION_MODE=index")
+
+    opensearch = rules_api.OpenSearchClient(bootstrap=False)
+    client = opensearch.client
+    if not client.indices.exists(index=rules_api.META_INDEX_NAME):
+        sys.exit(f"{rules_api.META_INDEX_NAME} does not exist; start the API once to create its indices")
+    if args.abort:
+        abort(opensearch)
+        return
+    if rules_api.reindex_target(opensearch):
+        sys.exit(f"A reindex into {rules_api.reindex_target(opensearch)} is already in progress (use --abort)")
+
+    sources, is_alias = live_indices(client)
+    configs = rules_api.index_embedding_config(opensearch)
+    model_id, dimension = next(iter(configs.values()))
+    target = rules_api.physical_index_name(next_version(client))
+    hnsw_parameters = {name: value for name, value in
+                       (('m', args.m), ('ef_construction', args.ef_construction)) if value}
+
+    # 1. Build the new index with replicas and refresh off for the bulk load
+    index_body = rules_api.build_index_body(args.shards, 0, dimension, model_id or rules_api.EMBEDDING_MODEL_ID,
+                                            args.ef_search, hnsw_parameters or None)
+    index_body['settings']['index']['refresh_interval'] = '-1'
+    client.indices.create(index=target, body=index_body)
+    print(f"Created {target} ({args.shards} shards, ef_search {args.ef_search}, {hnsw_parameters or 'default HNSW'})")
+
+    # 2. Dual-write from here on; everything older is covered by the copy
+    generation = rules_api.feed_generation(opensearch)
+    client.index(index=rules_api.META_INDEX_NAME, id=rules_api.REINDEX_DOC_ID, refresh=True, body={
+        'type': 'reindex',
+        'state': 'copying',
+        'source': sources,
+        'target': target,
+        'generation': generation,
+        'started_at': datetime.utcnow().isoformat()
+    })
+
+    # 3. Copy server-side. op_type create keeps newer dual-written documents
+    print(f"Copying {','.join(sources)} -> {target}...")
+    task = client.reindex(
+        body={
+            "source": {"index": sources},
+            "dest": {"index": target, "op_type": "create"},
+            "conflicts": "proceed"
+        },
+        wait_for_completion=False,
+        requests_per_second=args.requests_per_second
+    )
+    wait_for_task(client, task['task'], args.poll_seconds)
+    deleted = delete_tombstoned(opensearch, target, generation)
+    print(f"  removed {deleted} rules deleted during the copy")
+
+    # 4. Restore serving settings and warm the HNSW graphs before taking traffic
+    client.indices.put_settings(index=target, body={"index": {
+        "number_of_replicas": args.replicas,
+        "refresh_interval": None
+    }})
+    health = client.cluster.health(index=target, wait_for_status='green' if args.replicas else 'yellow',
+                                   timeout='10m')
+    if health.get('timed_out'):
+        sys.exit(f"{target} did not become healthy; rerun with --abort to clean up")
+    client.transport.perform_request('GET', f"/_plugins/_knn/warmup/{target}")
+
+    # 5. Block writes to the sources, catch up the writes still in flight,
+    #    verify, then swap the alias atomically. The marker stays until the
+    #    alias has moved; blocked writers retry and land in the new index.
+    rules_api.set_write_block(opensearch, sources, True)
+    try:
+        copied, removed = final_sync(opensearch, sources, target, generation)
+        print(f"  final sync: {copied} rules re-copied, {removed} removed")
+        if not counts_match(client, sources, target):
+            sys.exit("Document counts differ; the alias was not swapped (rerun with --abort to clean up)")
+        rules_api.swap_alias(opensearch, sources, is_alias, target)
+    except BaseException:
+        rules_api.set_write_block(opensearch, sources, None)
+        raise
+    clear_marker(opensearch)
+    rules_api.bump_generation(opensearch)
+    print(f"{INDEX_NAME} now points to {target}")
+
+    if args.delete_old and is_alias:
+        client.indices.delete(index=','.join(sources))
+        print(f"Deleted {','.join(sources)}")
+
+if __name__ == "__main__":
+    main()